@@ -0,0 +1,25 @@
+"""Compare the raw value fast path of `parse` with the generic parser.
+
+Run from the repository root with `python -m benchmarks.bench_parser`.
+"""
+
+import timeit
+from thinkgear.parser import parse, parse_raw_value, _parse_payload
+
+RAW_PAYLOAD = b"\x80\x02\xff\x38"
+NUMBER = 200000
+
+
+def bench(name: str, stmt: str) -> float:
+    seconds = min(timeit.repeat(stmt, globals=globals(), number=NUMBER, repeat=5))
+    nanoseconds = seconds / NUMBER * 1e9
+    print(f"{name:<24} {nanoseconds:8.1f} ns/packet")
+    return nanoseconds
+
+
+if __name__ == "__main__":
+    generic = bench("generic parser", "_parse_payload(RAW_PAYLOAD)")
+    fast = bench("parse", "parse(RAW_PAYLOAD)")
+    value = bench("parse_raw_value", "parse_raw_value(RAW_PAYLOAD)")
+    print(f"parse speedup:           {generic / fast:8.1f}x")
+    print(f"parse_raw_value speedup: {generic / value:8.1f}x")
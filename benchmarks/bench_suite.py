@@ -0,0 +1,307 @@
+"""Benchmark framing, parsing and the end-to-end read path without hardware.
+
+Run from the repository root with `python -m benchmarks.bench_suite`. Every
+benchmark reports ns/packet, packets/s and the peak memory allocated per packet
+during a call, traced with `tracemalloc`. Times are the median of all runs of a
+benchmark, made in several rounds over the whole suite, which varies less from one
+invocation to the next than the best run. Results are compared with the baseline
+stored in `benchmarks/baseline.json`; benchmarks slower than the baseline by more
+than the tolerance, 50% by default, are flagged and the exit status is 1. Record a
+new baseline with `--save`. Baselines are only comparable on the machine and Python
+version they were recorded with, which are stored along with them.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import timeit
+import tracemalloc
+
+from thinkgear.data_points import _eeg_from_bytes
+from thinkgear.encoder import encode_eeg, encode_raw, frame
+from thinkgear.hub import ThinkGearHub
+from thinkgear.parser import _create_data_point, parse
+from thinkgear.think_gear import ThinkGearProtocol
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+REPEAT = 3
+
+EEG_POWERS = [1000, 2000, 3000, 4000, 5000, 6000, 7000, 8000]
+RAW_PAYLOAD = b"\x80\x02\xff\x38"
+EEG_PAYLOAD = encode_eeg(EEG_POWERS, 0, 50, 50)[3:-1]
+# One second of a headset: 512 raw values and the EEG powers.
+SECOND = encode_raw(range(-256, 256)) + encode_eeg(EEG_POWERS, 0, 50, 50)
+SECOND_PACKETS = 513
+CHUNK_SIZE = 4096
+
+# A benchmark is a call and the number of packets it handles.
+Benchmark = Tuple[Callable[[], object], int]
+
+
+class MemoryTransport(ThinkGearProtocol):
+    """A device that receives a stream from memory in chunks, endlessly."""
+
+    def __init__(self, stream: bytes, chunk_size: int = CHUNK_SIZE):
+        super().__init__()
+        self._stream = memoryview(stream * 2)
+        self._length = len(stream)
+        self._position = 0
+        self._chunk_size = chunk_size
+
+    def _recv(self, size: int = 1) -> memoryview:
+        start = self._position
+        self._position = (start + self._chunk_size) % self._length
+        return self._stream[start : start + self._chunk_size]
+
+
+def _parse(payload: bytes, lazy: bool = False) -> Benchmark:
+    return lambda: parse(payload, lazy), 1
+
+
+def _create(code: int, data: bytes) -> Benchmark:
+    return lambda: _create_data_point(0, code, data), 1
+
+
+def _feed(stream: bytes, packets: int) -> Benchmark:
+    device = ThinkGearProtocol()
+    return lambda: device.feed(stream), packets
+
+
+def _feed_devices(count: int) -> Benchmark:
+    devices = [ThinkGearProtocol() for _ in range(count)]
+    chunks = [SECOND[start : start + 512] for start in range(0, len(SECOND), 512)]
+
+    def run() -> None:
+        for chunk in chunks:
+            for device in devices:
+                device.feed(chunk)
+
+    return run, count * SECOND_PACKETS
+
+
+def _read(count: int, lazy: bool = False) -> Benchmark:
+    device = MemoryTransport(SECOND)
+    read = device.read
+
+    def run() -> None:
+        for _ in range(count):
+            read(lazy)
+
+    return run, count
+
+
+def _process(count: int) -> Benchmark:
+    device = MemoryTransport(SECOND)
+    received: List[object] = []
+    device.subscribe(0x80, received.append)
+    device.subscribe(0x83, received.append)
+    process = device.process
+
+    def run() -> None:
+        for _ in range(count):
+            process()
+        received.clear()
+
+    return run, count
+
+
+class _SocketDevice(ThinkGearProtocol):
+    """A device connected to the other end of a socket pair."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.device, self.remote = socket.socketpair()
+
+    def fileno(self) -> int:
+        return self.device.fileno()
+
+    def _recv(self, size: int = 1) -> bytes:
+        return self.device.recv(CHUNK_SIZE)
+
+
+def _hub(count: int) -> Benchmark:
+    hub = ThinkGearHub()
+    remotes = []
+    for device_id in range(count):
+        device = _SocketDevice()
+        hub.add(device_id, device)
+        remotes.append(device.remote)
+
+    def run() -> None:
+        for remote in remotes:
+            remote.sendall(SECOND)
+        received = 0
+        while received < count * SECOND_PACKETS:
+            received += len(hub.read(1))
+
+    return run, count * SECOND_PACKETS
+
+
+BENCHMARKS: Dict[str, Callable[[], Benchmark]] = {
+    "parse raw": lambda: _parse(RAW_PAYLOAD),
+    "parse eeg": lambda: _parse(EEG_PAYLOAD),
+    "parse poor signal": lambda: _parse(b"\x02\x1a"),
+    "parse blink": lambda: _parse(b"\x16\x40"),
+    "parse battery": lambda: _parse(b"\x01\x7f"),
+    "parse extended": lambda: _parse(b"\x55\x55\x04\x10\x90\x03\x01\x02\x03"),
+    "parse lazy raw": lambda: _parse(RAW_PAYLOAD, True),
+    "parse lazy eeg": lambda: _parse(EEG_PAYLOAD, True),
+    "create raw": lambda: _create(0x80, RAW_PAYLOAD[2:]),
+    "create eeg": lambda: _create(0x83, EEG_PAYLOAD[4:28]),
+    "create attention": lambda: _create(0x04, b"\x32"),
+    "eeg from bytes": lambda: ((lambda: _eeg_from_bytes(EEG_PAYLOAD[4:28])), 1),
+    "frame": lambda: ((lambda: frame(EEG_PAYLOAD)), 1),
+    "feed raw": lambda: _feed(encode_raw(range(1024)), 1024),
+    "feed headset": lambda: _feed(SECOND, SECOND_PACKETS),
+    "feed 64 devices": lambda: _feed_devices(64),
+    "read": lambda: _read(1024),
+    "read lazy": lambda: _read(1024, True),
+    "process": lambda: _process(1024),
+    "hub 16 devices": lambda: _hub(16),
+}
+
+
+def calibrate(benchmark: Benchmark) -> int:
+    """
+    Get the number of calls of a benchmark that take at least 0.2 seconds.
+
+    Args:
+        benchmark (Benchmark): The call and its number of packets.
+
+    Returns:
+        int: The number of calls timed per run.
+    """
+    number, _ = timeit.Timer(benchmark[0]).autorange()
+    return number
+
+
+def measure(benchmark: Benchmark, number: int) -> List[float]:
+    """
+    Time `REPEAT` runs of a benchmark.
+
+    Args:
+        benchmark (Benchmark): The call and its number of packets.
+        number (int): Number of calls per run, see `calibrate`.
+
+    Returns:
+        List[float]: Nanoseconds per packet of every run.
+    """
+    call, packets = benchmark
+    runs = timeit.Timer(call).repeat(REPEAT, number)
+    return [seconds / (number * packets) * 1e9 for seconds in runs]
+
+
+def allocated(benchmark: Benchmark) -> float:
+    """
+    Trace the allocations of a call of a benchmark, after a first call.
+
+    Args:
+        benchmark (Benchmark): The call and its number of packets.
+
+    Returns:
+        float: Peak bytes allocated per packet during the call.
+    """
+    call, packets = benchmark
+    tracemalloc.start()
+    try:
+        call()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(peak - before, 0) / packets
+
+
+def machine() -> Dict[str, str]:
+    """Describe the machine and Python the results are comparable on."""
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+    }
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", default="", help="run benchmarks containing this text")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="flag benchmarks slower than the baseline by this fraction",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=5,
+        help="run the benchmarks this many times, interleaved, and take the median",
+    )
+    parser.add_argument("--save", action="store_true", help="store as the baseline")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    expected: Dict[str, float] = baseline["results"] if baseline else {}
+    if baseline and baseline["machine"] != machine():
+        print(f"Baseline recorded on {baseline['machine']}, comparison is unreliable.")
+
+    print(
+        f"{'benchmark':<20} {'ns/packet':>10} {'packets/s':>12} {'B/packet':>9}"
+        f" {'baseline':>10} {'change':>8}"
+    )
+    benchmarks = {name: setup() for name, setup in BENCHMARKS.items() if args.k in name}
+    numbers = {name: calibrate(benchmark) for name, benchmark in benchmarks.items()}
+    # Rounds over all benchmarks spread the runs of each one over the whole suite,
+    # so a slow phase of the machine does not skew a single benchmark.
+    runs: Dict[str, List[float]] = {name: [] for name in benchmarks}
+    for _ in range(args.rounds):
+        for name, benchmark in benchmarks.items():
+            runs[name] += measure(benchmark, numbers[name])
+
+    results: Dict[str, float] = {}
+    regressions = []
+    for name, benchmark in benchmarks.items():
+        nanoseconds = statistics.median(runs[name])
+        results[name] = round(nanoseconds, 1)
+        line = (
+            f"{name:<20} {nanoseconds:10.1f} {1e9 / nanoseconds:12,.0f}"
+            f" {allocated(benchmark):9.1f}"
+        )
+        if name in expected:
+            change = nanoseconds / expected[name] - 1
+            line += f" {expected[name]:10.1f} {change:+8.1%}"
+            if change > args.tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if args.save:
+        if baseline and args.k:
+            results = {**expected, **results}
+        with open(args.baseline, "w") as file:
+            json.dump({"machine": machine(), "results": results}, file, indent=2)
+            file.write("\n")
+        print(f"Stored the baseline in {args.baseline}.")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) above {args.tolerance:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
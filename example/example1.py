@@ -1,13 +1,12 @@
-import time
-from thinkgear import ThinkGear, RawDataPoint
+import thinkgear
+from thinkgear import RawDataPoint
 
 if __name__ == "__main__":
-    device = ThinkGear(("0C:61:CF:29:D5:9B", 5))
-    device.connect()
-    if device.is_connected():
+    device = thinkgear.open("bt://0C:61:CF:29:D5:9B:5")
+    try:
         while True:
-            data = device.read()
-            if data and not isinstance(data, RawDataPoint):
-                print(data)
-    else:
-        print("Failed to connect.")
+            for data_point in device.read():
+                if not isinstance(data_point, RawDataPoint):
+                    print(data_point)
+    finally:
+        device.disconnect()
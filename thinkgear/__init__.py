@@ -8,11 +8,16 @@ from thinkgear.data_points import (
     RawDataPoint,
     EegDataPoints,
     UnknownDataPoint,
+    LazyDataPoint,
     DataPointType,
     DATA_POINTS,
 )
 from thinkgear.think_gear import ThinkGearProtocol
 
+# Only available as `thinkgear.open`, it is not in `__all__` so `import *` does not
+# shadow the builtin.
+from thinkgear.factory import open
+
 __all__ = (
     "DataPoint",
     "BatteryDataPoint",
@@ -23,6 +28,7 @@ __all__ = (
     "RawDataPoint",
     "EegDataPoints",
     "UnknownDataPoint",
+    "LazyDataPoint",
     "DataPointType",
     "DATA_POINTS",
     "ThinkGearProtocol",
@@ -0,0 +1,172 @@
+from typing import Any, AsyncIterator, Deque, List, Literal, Optional, Union, overload
+from collections import deque
+import asyncio
+
+from thinkgear.think_gear import ThinkGearProtocol
+from thinkgear.parser import parse
+from thinkgear.data_points import DataPointType, LazyDataPoint
+
+__all__ = ("AsyncThinkGearProtocol",)
+
+
+class AsyncThinkGearProtocol:
+    """
+    An asyncio interface to a ThinkGear device.
+
+    Wraps a transport, such as `ThinkGearSerial` or `ThinkGearBluetooth`, and receives
+    from it only when the event loop reports its file descriptor as readable, using
+    `loop.add_reader`. Received bytes are framed by the transport, so any number of
+    devices can be served from one event loop without a thread per device.
+
+    Requires an event loop that supports `add_reader` for the file descriptor, which
+    is the case for the default event loop on POSIX systems.
+
+    Attributes:
+        transport (ThinkGearProtocol): The wrapped transport.
+    """
+
+    def __init__(self, transport: ThinkGearProtocol) -> None:
+        """
+        Initialize the AsyncThinkGearProtocol instance.
+
+        Args:
+            transport (ThinkGearProtocol): The transport to receive data with.
+        """
+        self.transport: ThinkGearProtocol = transport
+        self._payloads: Deque[bytes] = deque()
+        self._waiter: Optional["asyncio.Future[None]"] = None
+        self._error: Optional[Exception] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fileno: Optional[int] = None
+
+    async def connect(self, address: Any) -> None:
+        """
+        Connect the transport to the device and start receiving data.
+
+        The blocking connect of the transport runs in the default executor, so a slow
+        Bluetooth connection does not block the event loop.
+
+        Args:
+            address (Any): Address of the device, as accepted by the transport.
+        """
+        self._loop = asyncio.get_running_loop()
+        await self._loop.run_in_executor(None, self.transport.connect, address)
+        self._error = None
+        self._fileno = self.transport.fileno()
+        self._loop.add_reader(self._fileno, self._on_readable)
+
+    async def disconnect(self) -> None:
+        """
+        Stop receiving data and disconnect the transport.
+        """
+        self._stop(IOError("Disconnected from device."))
+        self.transport.disconnect()
+
+    def is_connected(self) -> bool:
+        """
+        Check if data is being received from the device.
+
+        Returns:
+            bool: True if connected, False otherwise.
+        """
+        return self._fileno is not None
+
+    def _stop(self, error: Exception) -> None:
+        """Remove the reader and wake up a waiting read with the error."""
+        if self._loop is not None and self._fileno is not None:
+            self._loop.remove_reader(self._fileno)
+        self._fileno = None
+        self._error = error
+        self._wake_up()
+
+    def _wake_up(self) -> None:
+        """Wake up a read waiting for payloads."""
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def _on_readable(self) -> None:
+        """Receive available data, called by the event loop."""
+        try:
+            self._payloads.extend(self.transport.read_payloads())
+        except Exception as error:
+            self._stop(error)
+            return
+        if self._payloads:
+            self._wake_up()
+
+    async def read_payload(self) -> bytes:
+        """
+        Wait for the next complete, checksum-verified payload.
+
+        Returns:
+            bytes: The payload.
+
+        Raises:
+            IOError: If the device is disconnected or the connection is closed.
+        """
+        while not self._payloads:
+            if self._error is not None:
+                raise self._error
+            if self._loop is None:
+                raise IOError("Not connected to a device.")
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._payloads.popleft()
+
+    @overload
+    async def read(self, lazy: Literal[False] = ...) -> List[DataPointType]: ...
+
+    @overload
+    async def read(self, lazy: Literal[True]) -> List[LazyDataPoint]: ...
+
+    @overload
+    async def read(
+        self, lazy: bool
+    ) -> Union[List[DataPointType], List[LazyDataPoint]]: ...
+
+    async def read(
+        self, lazy: bool = False
+    ) -> Union[List[DataPointType], List[LazyDataPoint]]:
+        """
+        Wait for the next payload and parse it into data points.
+
+        Args:
+            lazy (bool): If True, return `LazyDataPoint` records. Defaults to False.
+
+        Returns:
+            Union[List[DataPointType], List[LazyDataPoint]]: A list of parsed data points.
+
+        Raises:
+            IOError: If the device is disconnected or the connection is closed.
+        """
+        return parse(await self.read_payload(), lazy)
+
+    async def process(self) -> None:
+        """
+        Wait for the next payload and dispatch it to handlers subscribed on the
+        transport, see `ThinkGearProtocol.subscribe`.
+
+        Raises:
+            IOError: If the device is disconnected or the connection is closed.
+        """
+        self.transport.dispatch(await self.read_payload())
+
+    def __aiter__(self) -> AsyncIterator[DataPointType]:
+        """
+        Iterate over received data points.
+
+        The iteration raises IOError when the device is disconnected or the connection
+        is closed.
+
+        Returns:
+            AsyncIterator[DataPointType]: Data points in the order they were received.
+        """
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[DataPointType]:
+        while True:
+            for data_point in await self.read():
+                yield data_point
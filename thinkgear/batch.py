@@ -0,0 +1,247 @@
+from typing import Dict, Optional, Sequence, Union
+from collections import namedtuple
+import numpy as np
+
+from thinkgear.parser import EXCODE, RAW_CODE
+from thinkgear.think_gear import SYNC
+
+__all__ = (
+    "Column",
+    "BATCH_DTYPES",
+    "parse_batch",
+    "encode_raw_batch",
+    "encode_eeg_batch",
+)
+
+
+class Column(namedtuple("Column", "index, values")):
+    """
+    Columnar values of a single code collected from many payloads.
+
+    Attributes:
+        index (np.ndarray): Index of the payload each value was found in (int64).
+        values (np.ndarray): Decoded values, one row per data point.
+    """
+
+
+# Decoded dtype of every code collected by `parse_batch`.
+BATCH_DTYPES: Dict[int, np.dtype] = {
+    0x01: np.dtype(np.uint8),
+    0x02: np.dtype(np.uint8),
+    0x04: np.dtype(np.uint8),
+    0x05: np.dtype(np.uint8),
+    0x16: np.dtype(np.uint8),
+    0x80: np.dtype(np.int16),
+    0x83: np.dtype(np.uint32),
+}
+
+_EEG_BANDS = 8
+_EEG_LENGTH = _EEG_BANDS * 3
+# Every read of the parser stays within this many bytes after a row start.
+_PADDING = 2 + _EEG_LENGTH
+
+
+def _decode(padded: np.ndarray, code: int, start: np.ndarray) -> np.ndarray:
+    """
+    Decode values of a single code from the data starting at `start`.
+
+    Args:
+        padded (np.ndarray): All payload bytes followed by zero padding.
+        code (int): Operation code of the rows.
+        start (np.ndarray): Offsets of the data bytes of each row.
+
+    Returns:
+        np.ndarray: Decoded values with the dtype from `BATCH_DTYPES`.
+    """
+    if code == 0x80:
+        high = padded[start].astype(np.uint16)
+        return ((high << 8) | padded[start + 1]).view(np.int16)
+    if code == 0x83:
+        rows = padded[start[:, None] + np.arange(_EEG_LENGTH)].astype(np.uint32)
+        rows = rows.reshape(-1, _EEG_BANDS, 3)
+        return (rows[:, :, 0] << 16) | (rows[:, :, 1] << 8) | rows[:, :, 2]
+    return padded[start]
+
+
+def parse_batch(
+    payloads: Union[Sequence[bytes], bytes, bytearray, memoryview],
+    offsets: Optional[Sequence[int]] = None,
+) -> Dict[int, Column]:
+    """
+    Parse many payloads at once into per-code columns.
+
+    All payloads are walked in lockstep: every iteration decodes the next data row of
+    each payload with NumPy vector operations, so the number of Python-level steps
+    depends on the number of rows in the longest payload, not on the number of payloads.
+
+    Only rows of EXCODE level 0 with the expected length are collected, that is
+    2 bytes for raw values (0x80) and 24 bytes for EEG powers (0x83).
+
+    Args:
+        payloads (Union[Sequence[bytes], bytes, bytearray, memoryview]): A sequence of payloads, or a single
+                                                 buffer with all payloads concatenated.
+        offsets (Optional[Sequence[int]]): Start offsets of the payloads in the buffer,
+                                           required if `payloads` is a single buffer.
+
+    Returns:
+        Dict[int, Column]: A column for every code in `BATCH_DTYPES`. EEG powers have
+                           shape (N, 8), other values are one-dimensional.
+    """
+    if offsets is None:
+        if isinstance(payloads, (bytes, bytearray, memoryview)):
+            raise ValueError("Offsets are required for a concatenated buffer.")
+        lengths = np.fromiter(map(len, payloads), dtype=np.int64, count=len(payloads))
+        buffer: Union[bytes, bytearray, memoryview] = b"".join(payloads)
+        ends = np.cumsum(lengths)
+        starts = ends - lengths
+    elif isinstance(payloads, (bytes, bytearray, memoryview)):
+        buffer = payloads
+        starts = np.asarray(offsets, dtype=np.int64)
+        ends = np.append(starts[1:], len(buffer))
+    else:
+        raise ValueError("Offsets require a single concatenated buffer.")
+
+    padded = np.zeros(len(buffer) + _PADDING, dtype=np.uint8)
+    padded[: len(buffer)] = np.frombuffer(buffer, dtype=np.uint8)
+
+    found: Dict[int, list] = {code: [] for code in BATCH_DTYPES}
+    packet = np.flatnonzero(starts < ends)
+    cursor = starts[packet]
+    end = ends[packet]
+    while packet.size:
+        # Parse the extendedCodeLevel, code, and length
+        level = np.zeros(packet.size, dtype=np.int64)
+        while True:
+            extended = (padded[cursor] == EXCODE) & (cursor < end)
+            if not extended.any():
+                break
+            level += extended
+            cursor = cursor + extended
+        code = padded[cursor]
+        has_length = ((code & 0x80) != 0) & ((code & 0xB0) != 0xB0)
+        length = np.where(has_length, padded[cursor + 1], 1).astype(np.int64)
+        start = cursor + 1 + has_length
+        cursor = start + length
+
+        valid = (level == 0) & (cursor <= end)
+        for value, rows in found.items():
+            selected = valid & (code == value)
+            if value == 0x80:
+                selected &= length == 2
+            elif value == 0x83:
+                selected &= length == _EEG_LENGTH
+            if selected.any():
+                rows.append((packet[selected], _decode(padded, value, start[selected])))
+
+        remaining = cursor < end
+        packet = packet[remaining]
+        cursor = cursor[remaining]
+        end = end[remaining]
+
+    columns: Dict[int, Column] = {}
+    for value, rows in found.items():
+        if rows:
+            index = np.concatenate([row[0] for row in rows])
+            values = np.concatenate([row[1] for row in rows])
+            order = np.argsort(index, kind="stable")
+            columns[value] = Column(index[order], values[order])
+        else:
+            shape = (0, _EEG_BANDS) if value == 0x83 else (0,)
+            columns[value] = Column(
+                np.zeros(0, dtype=np.int64), np.zeros(shape, dtype=BATCH_DTYPES[value])
+            )
+    return columns
+
+
+def _frame_rows(payloads: np.ndarray) -> np.ndarray:
+    """Wrap equally long payloads, one per row, into packets, one per row."""
+    count, length = payloads.shape
+    packets = np.empty((count, length + 4), dtype=np.uint8)
+    packets[:, 0] = SYNC
+    packets[:, 1] = SYNC
+    packets[:, 2] = length
+    packets[:, 3:-1] = payloads
+    packets[:, -1] = ~payloads.sum(axis=1, dtype=np.uint64).astype(np.uint8)
+    return packets
+
+
+def encode_raw_batch(values: Union[Sequence[int], np.ndarray]) -> bytes:
+    """
+    Encode raw values into one packet per value, see `thinkgear.encoder.encode_raw`.
+
+    All packets are built at once with NumPy vector operations, millions per second.
+
+    Args:
+        values (Union[Sequence[int], np.ndarray]): Signed 16-bit raw values.
+
+    Returns:
+        bytes: The packets, 8 bytes per value.
+
+    Raises:
+        ValueError: If a value is out of the 16-bit range.
+    """
+    values = np.asarray(values)
+    if values.size and (values.min() < -32768 or values.max() > 32767):
+        raise ValueError("Raw values must be in the signed 16-bit range.")
+    payloads = np.empty((values.size, 4), dtype=np.uint8)
+    payloads[:, 0] = RAW_CODE
+    payloads[:, 1] = 2
+    payloads[:, 2:] = values.astype(">i2").reshape(-1, 1).view(np.uint8)
+    return _frame_rows(payloads).tobytes()
+
+
+def encode_eeg_batch(
+    powers: Union[Sequence[Sequence[int]], np.ndarray],
+    poor_signal: Union[None, int, Sequence[int], np.ndarray] = None,
+    attention: Union[None, int, Sequence[int], np.ndarray] = None,
+    meditation: Union[None, int, Sequence[int], np.ndarray] = None,
+) -> bytes:
+    """
+    Encode rows of EEG powers into one packet per row, see
+    `thinkgear.encoder.encode_eeg`.
+
+    Args:
+        powers (Union[Sequence[Sequence[int]], np.ndarray]): Unsigned 24-bit band
+                                                             powers of shape (N, 8).
+        poor_signal (Union[None, int, Sequence[int], np.ndarray]): Poor signal values
+                                                                   (0x02), one for all
+                                                                   or one per row.
+                                                                   Defaults to None,
+                                                                   not encoded.
+        attention (Union[None, int, Sequence[int], np.ndarray]): Attention values
+                                                                 (0x04). Defaults to
+                                                                 None.
+        meditation (Union[None, int, Sequence[int], np.ndarray]): Meditation values
+                                                                  (0x05). Defaults to
+                                                                  None.
+
+    Returns:
+        bytes: The packets.
+
+    Raises:
+        ValueError: If the powers do not have 8 columns or are out of the 24-bit range.
+    """
+    powers = np.asarray(powers, dtype=np.int64).reshape(-1, _EEG_BANDS)
+    if powers.size and (powers.min() < 0 or powers.max() > 0xFFFFFF):
+        raise ValueError("EEG powers must be in the unsigned 24-bit range.")
+    count = len(powers)
+
+    def column(code: int, values: Union[int, Sequence[int], np.ndarray]) -> np.ndarray:
+        rows = np.empty((count, 2), dtype=np.uint8)
+        rows[:, 0] = code
+        rows[:, 1] = np.broadcast_to(np.asarray(values, dtype=np.uint8), count)
+        return rows
+
+    eeg = np.empty((count, 2 + _EEG_LENGTH), dtype=np.uint8)
+    eeg[:, 0] = 0x83
+    eeg[:, 1] = _EEG_LENGTH
+    shifted = powers[:, :, None] >> np.array([16, 8, 0])
+    eeg[:, 2:] = (shifted & 0xFF).reshape(count, _EEG_LENGTH)
+    parts = [eeg]
+    if poor_signal is not None:
+        parts.insert(0, column(0x02, poor_signal))
+    if attention is not None:
+        parts.append(column(0x04, attention))
+    if meditation is not None:
+        parts.append(column(0x05, meditation))
+    return _frame_rows(np.concatenate(parts, axis=1)).tobytes()
@@ -1,4 +1,4 @@
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Union
 import socket  # type: ignore
 from thinkgear.think_gear import ThinkGearProtocol
 
@@ -14,26 +14,40 @@ class ThinkGearBluetooth(ThinkGearProtocol):
     data transfer, and manages the connection lifecycle.
 
     Attributes:
-        socket (Optional[socket.socket]): The Bluetooth socket used for communication.
+        device (Optional[socket.socket]): The Bluetooth socket used for communication.
     """
 
-    def __init__(self, debug: bool = False):
+    def __init__(
+        self,
+        debug: bool = False,
+        chunk_size: int = 4096,
+        timeout: Optional[float] = None,
+    ):
         """
         Initialize the ThinkGearBluetooth instance.
 
         Args:
             debug (bool): Enables debugging mode if True. Defaults to False.
+            chunk_size (int): Size of the reusable receive buffer, the maximum number of
+                              bytes returned by a single read. Defaults to 4096.
+            timeout (Optional[float]): Read timeout in seconds, None blocks until data
+                                       arrives. Defaults to None.
         """
         super().__init__(debug)
-        self.socket: Optional[socket.socket] = None
+        self.device: Optional[socket.socket] = None
+        self._timeout: Optional[float] = timeout
+        self._chunk: memoryview = memoryview(bytearray(chunk_size))
 
     @staticmethod
-    def connect_device(address: Tuple[str, int]) -> Optional[socket.socket]:
+    def connect_device(
+        address: Tuple[str, int], timeout: Optional[float] = None
+    ) -> Optional[socket.socket]:
         """
         Establish a Bluetooth connection to a ThinkGear device.
 
         Args:
             address (Tuple[str, int]): A tuple containing the Bluetooth address and port.
+            timeout (Optional[float]): Read timeout in seconds. Defaults to None.
 
         Returns:
             Optional[socket.socket]: The connected socket object, or None if the connection fails.
@@ -42,6 +56,7 @@ class ThinkGearBluetooth(ThinkGearProtocol):
             socket.AF_BLUETOOTH, socket.SOCK_STREAM, socket.BTPROTO_RFCOMM
         )
         soc.connect(address)
+        soc.settimeout(timeout)
         return soc
 
     def connect(self, address: Tuple[str, int]) -> None:
@@ -54,7 +69,7 @@ class ThinkGearBluetooth(ThinkGearProtocol):
         Raises:
             socket.error: If the connection fails.
         """
-        self.device = self.connect_device(address)
+        self.device = self.connect_device(address, self._timeout)
         if self._debug:
             print(f"Connected to device at {address}.")
 
@@ -88,23 +103,47 @@ class ThinkGearBluetooth(ThinkGearProtocol):
         """
         return self.device
 
-    def _recv(self, size: int = 1) -> bytes:
+    def fileno(self) -> int:
+        """
+        Get the file descriptor of the connection.
+
+        Returns:
+            int: The file descriptor.
+
+        Raises:
+            IOError: If not connected.
+        """
+        if self.device is None:
+            raise IOError("Not connected to a device.")
+        return self.device.fileno()
+
+    def _recv(self, size: int = 1) -> Union[bytes, memoryview]:
         """
         Receive data from the ThinkGear device via Bluetooth.
 
-        This method overrides the `_recv` method from `ThinkGearProtocol`.
+        This method overrides the `_recv` method from `ThinkGearProtocol`. Everything
+        that is already available on the socket, up to the size of the reusable receive
+        buffer, is read at once.
 
         Args:
-            size (int): The number of bytes to receive. Defaults to 1.
+            size (int): The number of bytes needed by the caller. Defaults to 1. The socket
+                        returns as soon as any data is available, so fewer bytes may be returned.
 
         Returns:
-            bytes: The received data. Returns an empty byte string if not connected.
+            Union[bytes, memoryview]: A view of the received data, valid until the next call.
+                                      Returns an empty byte string if not connected.
+
+        Raises:
+            socket.timeout: If no data arrives within the timeout.
+            IOError: If the connection is closed by the device.
         """
         if self.device is None:
             if self._debug:
                 print("Attempt to receive data without an active connection.")
             return b""
-        data = self.device.recv(size)
+        data = self._chunk[: self.device.recv_into(self._chunk)]
+        if not data:
+            raise IOError("Connection closed by the device.")
         if self._debug:
-            print(f"Received data: {data!r}")
+            print(f"Received data: {bytes(data)!r}")
         return data
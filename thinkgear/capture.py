@@ -0,0 +1,390 @@
+"""
+Append-only capture files of ThinkGear sessions.
+
+A capture file starts with a header::
+
+    [MAGIC "TGCP"] [VERSION u8] [KIND u8] [2 reserved bytes] [START TIME f64]
+
+followed by records::
+
+    [TIMESTAMP u64] [LENGTH u16] [DATA...]
+
+All integers are little-endian. TIMESTAMP is in nanoseconds of a monotonic clock since
+the start of the capture, START TIME is the wall-clock time of the start in seconds
+since the epoch. KIND tells whether records hold verified payloads or raw chunks of
+the transport stream.
+
+Records are written in chunks of `chunk_duration` nanoseconds. When a chunk is
+flushed, the timestamp and byte offset of its first record are appended to a sparse
+index in a sidecar file with the ".idx" suffix::
+
+    [MAGIC "TGIX"] [VERSION u8] [7 reserved bytes]
+    [TIMESTAMP u64] [OFFSET u64] ...
+
+so a reader can seek to any time with a binary search and a scan of a single chunk.
+"""
+
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from collections import namedtuple
+import bisect
+import mmap
+import os
+import struct
+import time
+
+from thinkgear.parser import parse
+from thinkgear.data_points import DataPointType
+from thinkgear.think_gear import ThinkGearProtocol
+
+if TYPE_CHECKING:
+    import numpy as np
+    from thinkgear.batch import Column
+
+__all__ = (
+    "PAYLOADS",
+    "CHUNKS",
+    "CaptureRecord",
+    "CaptureWriter",
+    "CaptureReader",
+    "index_path",
+)
+
+MAGIC = b"TGCP"
+VERSION = 1
+# Records hold verified payloads.
+PAYLOADS = 0
+# Records hold chunks of the transport stream, as received.
+CHUNKS = 1
+
+_HEADER = struct.Struct("<4sBBxxd")
+_RECORD = struct.Struct("<QH")
+MAX_RECORD_LENGTH = 0xFFFF
+
+INDEX_MAGIC = b"TGIX"
+_INDEX_HEADER = struct.Struct("<4sB7x")
+_INDEX_ENTRY = struct.Struct("<QQ")
+
+
+def index_path(path: Union[str, os.PathLike]) -> str:
+    """
+    Get the path of the sidecar index of a capture file.
+
+    Args:
+        path (Union[str, os.PathLike]): Path of the capture file.
+
+    Returns:
+        str: Path of the index file.
+    """
+    return os.fspath(path) + ".idx"
+
+
+class CaptureRecord(namedtuple("CaptureRecord", "timestamp, data")):
+    """
+    A record of a capture file.
+
+    Attributes:
+        timestamp (int): Nanoseconds since the start of the capture.
+        data (bytes): A payload or a chunk of the stream, see `CaptureReader.kind`.
+    """
+
+
+class CaptureWriter:
+    """
+    Write a capture file.
+
+    If the capture is created from a path, a sparse time index is written next to it,
+    see `index_path`. Records must be written with non-decreasing timestamps.
+
+    Can be used as a context manager, which closes the file on exit.
+
+    Attributes:
+        kind (int): `PAYLOADS` or `CHUNKS`.
+        chunk_duration (int): Nanoseconds of records between flushes and index entries.
+    """
+
+    def __init__(
+        self,
+        file: Union[str, os.PathLike, BinaryIO],
+        kind: int = PAYLOADS,
+        chunk_duration: int = 1000000000,
+    ):
+        """
+        Initialize the CaptureWriter instance and write the header.
+
+        Args:
+            file (Union[str, os.PathLike, BinaryIO]): Path of the file to create, or a
+                                                      binary file open for writing.
+            kind (int): `PAYLOADS` or `CHUNKS`. Defaults to `PAYLOADS`.
+            chunk_duration (int): Nanoseconds of records between flushes and index
+                                  entries. Defaults to one second.
+        """
+        if kind not in (PAYLOADS, CHUNKS):
+            raise ValueError(f"Unknown capture kind: {kind}.")
+        self.kind: int = kind
+        self.chunk_duration: int = chunk_duration
+        self._index: Optional[BinaryIO] = None
+        if isinstance(file, (str, os.PathLike)):
+            self._file: BinaryIO = open(file, "wb")
+            self._index = open(index_path(file), "wb")
+            self._index.write(_INDEX_HEADER.pack(INDEX_MAGIC, VERSION))
+        else:
+            self._file = file
+        self._start: int = time.monotonic_ns()
+        self._file.write(_HEADER.pack(MAGIC, VERSION, kind, time.time()))
+        self._offset: int = _HEADER.size
+        self._chunk_start: Optional[int] = None
+        self._pending: List[bytes] = []
+
+    def write(self, data: bytes, timestamp: Optional[int] = None) -> None:
+        """
+        Append a record.
+
+        Args:
+            data (bytes): A verified payload or a chunk of the stream.
+            timestamp (Optional[int]): Nanoseconds since the start of the capture.
+                                       Defaults to the time elapsed since the writer was
+                                       created.
+
+        Raises:
+            ValueError: If the data is longer than `MAX_RECORD_LENGTH`.
+        """
+        if len(data) > MAX_RECORD_LENGTH:
+            raise ValueError(f"Record is too long: {len(data)} bytes.")
+        if timestamp is None:
+            timestamp = time.monotonic_ns() - self._start
+        if self._chunk_start is None or (
+            timestamp - self._chunk_start >= self.chunk_duration
+        ):
+            if self._chunk_start is not None:
+                self.flush()
+            self._chunk_start = timestamp
+            self._pending.append(_INDEX_ENTRY.pack(timestamp, self._offset))
+        self._file.write(_RECORD.pack(timestamp, len(data)))
+        self._file.write(data)
+        self._offset += _RECORD.size + len(data)
+
+    def flush(self) -> None:
+        """
+        Flush written records to the file, and then the index entries of the flushed
+        chunks, so the index never points past the flushed data.
+        """
+        self._file.flush()
+        if self._index is not None:
+            self._index.write(b"".join(self._pending))
+            self._index.flush()
+        self._pending.clear()
+
+    def close(self) -> None:
+        """
+        Flush and close the file and its index.
+        """
+        self.flush()
+        self._file.close()
+        if self._index is not None:
+            self._index.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class CaptureReader:
+    """
+    Read a capture file through a memory map.
+
+    If the sparse time index of the capture exists, it is used to seek to a time
+    in O(log n), otherwise seeking scans the capture from the start.
+
+    Can be used as a context manager, which closes the file on exit.
+
+    Attributes:
+        kind (int): `PAYLOADS` or `CHUNKS`.
+        start_time (float): Wall-clock time of the start of the capture.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        """
+        Initialize the CaptureReader instance and read the header.
+
+        Args:
+            path (Union[str, os.PathLike]): Path of the capture file.
+
+        Raises:
+            ValueError: If the file is not a capture file.
+        """
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < _HEADER.size:
+                raise ValueError("Not a ThinkGear capture file.")
+            self._map: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, kind, start_time = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError("Not a ThinkGear capture file.")
+        self.kind: int = kind
+        self.start_time: float = start_time
+        self._index_timestamps: List[int] = []
+        self._index_offsets: List[int] = []
+        try:
+            with open(index_path(path), "rb") as file:
+                index = file.read()
+        except FileNotFoundError:
+            index = b""
+        if index[: len(INDEX_MAGIC)] == INDEX_MAGIC:
+            entries = index[_INDEX_HEADER.size :]
+            entries = entries[: len(entries) - len(entries) % _INDEX_ENTRY.size]
+            for timestamp, offset in _INDEX_ENTRY.iter_unpack(entries):
+                self._index_timestamps.append(timestamp)
+                self._index_offsets.append(offset)
+
+    def seek(self, timestamp: int) -> int:
+        """
+        Find the first record at or after the timestamp.
+
+        Args:
+            timestamp (int): Nanoseconds since the start of the capture.
+
+        Returns:
+            int: Byte offset of the record, or the end of the file if there is none.
+        """
+        position = bisect.bisect_right(self._index_timestamps, timestamp) - 1
+        offset = self._index_offsets[position] if position >= 0 else _HEADER.size
+        data = self._map
+        size = len(data)
+        while offset + _RECORD.size <= size:
+            record_timestamp, length = _RECORD.unpack_from(data, offset)
+            if record_timestamp >= timestamp:
+                return offset
+            offset += _RECORD.size + length
+        return size
+
+    def window(self, start: int, end: int) -> Iterator[CaptureRecord]:
+        """
+        Iterate over records with timestamps in the range from start to end.
+
+        Args:
+            start (int): First timestamp in nanoseconds, inclusive.
+            end (int): Last timestamp in nanoseconds, exclusive.
+
+        Returns:
+            Iterator[CaptureRecord]: Records in the range.
+        """
+        for record in self.records(self.seek(start)):
+            if record.timestamp >= end:
+                break
+            yield record
+
+    def window_payloads(self, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+        """
+        Iterate over verified payloads received in the range from start to end.
+
+        Chunk captures are framed, payloads get the timestamp of the chunk that
+        completes them. A packet started before the range is skipped.
+
+        Args:
+            start (int): First timestamp in nanoseconds, inclusive.
+            end (int): Last timestamp in nanoseconds, exclusive.
+
+        Returns:
+            Iterator[Tuple[int, bytes]]: Timestamps and payloads.
+        """
+        if self.kind == PAYLOADS:
+            for timestamp, data in self.window(start, end):
+                yield timestamp, data
+            return
+        framer = ThinkGearProtocol()
+        for timestamp, data in self.window(start, end):
+            for payload in framer.feed(data):
+                yield timestamp, payload
+
+    def read_points(
+        self, start: int, end: int
+    ) -> List[Tuple[int, List[DataPointType]]]:
+        """
+        Parse the payloads received in the range from start to end.
+
+        Args:
+            start (int): First timestamp in nanoseconds, inclusive.
+            end (int): Last timestamp in nanoseconds, exclusive.
+
+        Returns:
+            List[Tuple[int, List[DataPointType]]]: Timestamps and data points of each
+                                                   payload.
+        """
+        return [
+            (timestamp, parse(payload))
+            for timestamp, payload in self.window_payloads(start, end)
+        ]
+
+    def read_columns(
+        self, start: int, end: int
+    ) -> Tuple["np.ndarray", Dict[int, "Column"]]:
+        """
+        Parse the payloads received in the range from start to end into columns, see
+        `thinkgear.batch.parse_batch`. Requires NumPy.
+
+        Args:
+            start (int): First timestamp in nanoseconds, inclusive.
+            end (int): Last timestamp in nanoseconds, exclusive.
+
+        Returns:
+            Tuple[np.ndarray, Dict[int, Column]]: Timestamps of the payloads, indexed by
+                                                  the index column, and the columns.
+        """
+        import numpy as np
+        from thinkgear.batch import parse_batch
+
+        records = list(self.window_payloads(start, end))
+        timestamps = np.fromiter(
+            (timestamp for timestamp, _ in records), dtype=np.uint64, count=len(records)
+        )
+        return timestamps, parse_batch([payload for _, payload in records])
+
+    def records(self, offset: int = _HEADER.size) -> Iterator[CaptureRecord]:
+        """
+        Iterate over records.
+
+        A truncated record at the end of the file, e.g. of a capture that is still
+        being written, is ignored.
+
+        Args:
+            offset (int): Byte offset of the first record. Defaults to the first record
+                          of the file.
+
+        Returns:
+            Iterator[CaptureRecord]: Records in the order they were written.
+        """
+        data = self._map
+        size = len(data)
+        while offset + _RECORD.size <= size:
+            timestamp, length = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            if offset + length > size:
+                break
+            yield CaptureRecord(timestamp, data[offset : offset + length])
+            offset += length
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        return self.records()
+
+    def close(self) -> None:
+        """
+        Close the file.
+        """
+        self._map.close()
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
@@ -1,4 +1,4 @@
-from typing import List, Dict, Union, Type
+from typing import Any, List, Dict, Optional, Tuple, Union, Type
 from collections import namedtuple
 
 
@@ -12,6 +12,7 @@ __all__ = (
     "RawDataPoint",
     "EegDataPoints",
     "UnknownDataPoint",
+    "LazyDataPoint",
     "DataPointType",
     "DATA_POINTS",
 )
@@ -29,7 +30,7 @@ def _eeg_from_bytes(data: bytes) -> List[int]:
     """
     return [
         int.from_bytes(data[i : i + 3], byteorder="big")
-        for i in range(int(len(data) / 3))
+        for i in range(0, len(data) - 2, 3)
     ]
 
 
@@ -211,3 +212,111 @@ DATA_POINTS: Dict[int, Type[DataPointType]] = {
     0xBA: UnknownDataPoint,
     0xBC: UnknownDataPoint,
 }
+
+
+def _point_type(code: int, length: int) -> Type[DataPointType]:
+    """
+    Get the data point class for the code, falling back to RawDataPoint for unknown
+    codes and for data shorter than the class expects.
+
+    Args:
+        code (int): Operation code.
+        length (int): Length of the data bytes.
+
+    Returns:
+        Type[DataPointType]: The class to decode the data with.
+    """
+    point_type = DATA_POINTS.get(code, RawDataPoint)
+    if length < point_type.SIZE:
+        point_type = RawDataPoint
+    return point_type
+
+
+def _restore_lazy(level: int, code: int, data: bytes) -> "LazyDataPoint":
+    """Recreate a pickled or copied `LazyDataPoint` from its data bytes."""
+    return LazyDataPoint(level, code, memoryview(data), 0, len(data))
+
+
+class LazyDataPoint:
+    """
+    A data point that is decoded only when its value is accessed.
+
+    Keeps the level and code of the data point and the location of its data in a
+    memoryview of the payload shared by all data points of the packet. Any other
+    attribute, like `value`, `has_contact` or the EEG band powers, is taken from the
+    decoded data point, which is created on first access and cached.
+
+    Attributes:
+        level (int): The EXCODE level.
+        code (int): The operation code for the data point.
+    """
+
+    __slots__ = ("level", "code", "_payload", "_offset", "_length", "_point")
+
+    def __init__(
+        self, level: int, code: int, payload: memoryview, offset: int, length: int
+    ) -> None:
+        """
+        Initialize the LazyDataPoint instance.
+
+        Args:
+            level (int): EXCODE level.
+            code (int): Operation code.
+            payload (memoryview): The whole payload of the packet.
+            offset (int): Offset of the data bytes in the payload.
+            length (int): Length of the data bytes.
+        """
+        self.level: int = level
+        self.code: int = code
+        self._payload: memoryview = payload
+        self._offset: int = offset
+        self._length: int = length
+        self._point: Optional[DataPointType] = None
+
+    @property
+    def point_type(self) -> Type[DataPointType]:
+        """
+        Get the class the data point is decoded into, without decoding it.
+
+        Returns:
+            Type[DataPointType]: The data point class.
+        """
+        return _point_type(self.code, self._length)
+
+    @property
+    def data(self) -> memoryview:
+        """
+        Get the raw data bytes without copying them.
+
+        Returns:
+            memoryview: A view of the data bytes in the payload.
+        """
+        return self._payload[self._offset : self._offset + self._length]
+
+    def decode(self) -> DataPointType:
+        """
+        Decode the data point, or return the already decoded one.
+
+        Returns:
+            DataPointType: The decoded data point.
+        """
+        if self._point is None:
+            self._point = self.point_type(self.level, self.code, bytes(self.data))
+        return self._point
+
+    def __getattr__(self, name: str) -> Any:
+        # Private and special names, e.g. an unset slot or `__setstate__` looked up by
+        # `copy`, are not attributes of the decoded data point.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.decode(), name)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # The memoryview of the payload can not be pickled, only the data bytes are.
+        return _restore_lazy, (self.level, self.code, bytes(self.data))
+
+    def __repr__(self) -> str:
+        return f"LazyDataPoint(level={self.level}, code={self.code})"
+
+    def __str__(self) -> str:
+        return str(self.decode())
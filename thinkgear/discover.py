@@ -1,20 +1,225 @@
-from typing import Any, Tuple, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import tempfile
+import time
 
-try:
-    from bluetooth import discover_devices, find_service
-except AttributeError:
+__all__ = ("DEFAULT_CACHE_PATH", "DiscoveryCache", "discover", "discover_all")
 
-    def discover_devices(*args: Any, **kwargs: Any) -> Optional[list[Any]]:
-        raise NotImplementedError("Failed to import bluetooth")
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "thinkgear",
+    "discover.json",
+)
+
+
+def _import_bluetooth() -> Any:
+    """
+    Import PyBluez on first use, so importing this module does not load it.
+
+    Returns:
+        Any: The `bluetooth` module.
 
-    def find_service(*args: Any, **kwargs: Any) -> list[Any]:
+    Raises:
+        NotImplementedError: If PyBluez fails to initialize on this platform.
+    """
+    try:
+        import bluetooth
+    except AttributeError:
         raise NotImplementedError("Failed to import bluetooth")
+    return bluetooth
 
 
-__all__ = ("discover",)
+class DiscoveryCache:
+    """
+    Discovered headsets stored on disk by lookup name.
 
+    Entries older than `ttl` seconds are ignored. The file is JSON and is replaced
+    atomically on every update, so concurrent processes never read a partial file.
 
-def discover(lookup_name: str = "MindWave") -> Optional[Tuple[str, int]]:
+    Attributes:
+        path (str): Path of the cache file.
+        ttl (float): Maximum age of entries in seconds.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 7 * 24 * 3600):
+        """
+        Initialize the DiscoveryCache instance.
+
+        Args:
+            path (str): Path of the cache file, created on the first update. Defaults
+                        to `DEFAULT_CACHE_PATH` in the user's cache directory.
+            ttl (float): Maximum age of entries in seconds. Defaults to a week.
+        """
+        self.path: str = path
+        self.ttl: float = ttl
+
+    def _load(self) -> Dict[str, Any]:
+        """Read all entries, an empty dict if the file is missing or invalid."""
+        try:
+            with open(self.path) as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _store(self, entries: Dict[str, Any]) -> None:
+        """Replace the file with the entries."""
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A unique name, as other threads and processes may update the file too.
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, suffix=".tmp", delete=False
+        ) as file:
+            try:
+                json.dump(entries, file)
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        os.replace(file.name, self.path)
+
+    def get(self, lookup_name: str) -> Optional[List[Tuple[str, int]]]:
+        """
+        Get the headsets cached for a lookup name.
+
+        Args:
+            lookup_name (str): The lookup name they were discovered with.
+
+        Returns:
+            Optional[List[Tuple[str, int]]]: Addresses and RFCOMM ports, or None if
+                                             there is no entry or it is expired.
+        """
+        entry = self._load().get(lookup_name)
+        if not entry or time.time() - entry["time"] > self.ttl:
+            return None
+        return [(address, port) for address, port in entry["headsets"]]
+
+    def put(self, lookup_name: str, headsets: List[Tuple[str, int]]) -> None:
+        """
+        Cache the headsets discovered for a lookup name, replacing the entry.
+
+        Args:
+            lookup_name (str): The lookup name they were discovered with.
+            headsets (List[Tuple[str, int]]): Addresses and RFCOMM ports.
+        """
+        entries = self._load()
+        entries[lookup_name] = {"time": time.time(), "headsets": headsets}
+        self._store(entries)
+
+    def remove(self, lookup_name: str) -> None:
+        """
+        Remove the entry of a lookup name, if any.
+
+        Args:
+            lookup_name (str): The lookup name.
+        """
+        entries = self._load()
+        if entries.pop(lookup_name, None) is not None:
+            self._store(entries)
+
+
+def _find_port(bluetooth: Any, address: str) -> Optional[int]:
+    """Find the RFCOMM port of a device, None if it has no RFCOMM service."""
+    services = bluetooth.find_service(address=address)
+    return next(
+        (i["port"] for i in services if i["protocol"] == "RFCOMM" and i["port"]),
+        None,
+    )
+
+
+def _answers(bluetooth: Any, address: str, lookup_name: str, timeout: float) -> bool:
+    """Check if a device answers a name request with a matching name."""
+    try:
+        name = bluetooth.lookup_name(address, timeout=timeout)
+    except Exception:
+        return False
+    return name is not None and lookup_name in name
+
+
+def _map(function: Any, items: List[Any], workers: int) -> List[Any]:
+    """Apply the function to the items, concurrently if there are many workers."""
+    if workers <= 1 or len(items) <= 1:
+        return list(map(function, items))
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(function, items))
+
+
+def _cached(
+    bluetooth: Any,
+    lookup_name: str,
+    cache: Optional[DiscoveryCache],
+    timeout: float,
+    workers: int,
+) -> List[Tuple[str, int]]:
+    """Get the cached headsets that answer."""
+    headsets = cache.get(lookup_name) if cache is not None else None
+    if not headsets:
+        return []
+    alive = _map(
+        lambda headset: _answers(bluetooth, headset[0], lookup_name, timeout),
+        headsets,
+        workers,
+    )
+    return [headset for headset, answers in zip(headsets, alive) if answers]
+
+
+def discover_all(
+    lookup_name: str = "MindWave",
+    cache: Optional[DiscoveryCache] = None,
+    workers: int = 8,
+    timeout: float = 2.0,
+) -> List[Tuple[str, int]]:
+    """
+    Discover all Bluetooth devices by name and retrieve their RFCOMM ports.
+
+    With a cache, the cached headsets are checked with a name request, which takes
+    about a second instead of the ten seconds of an inquiry. The ones that answer are
+    returned without an inquiry, and the cache entry is kept for the others, which
+    may be switched off for now. Only if none answers, an inquiry is made and its
+    result replaces the cache entry. The services of the devices found by the
+    inquiry are searched by `workers` threads concurrently.
+
+    Args:
+        lookup_name (str): The name or part of the name of the target Bluetooth
+                           devices. Defaults to "MindWave".
+        cache (Optional[DiscoveryCache]): Cache of previous discoveries. Defaults to
+                                          None, always making an inquiry.
+        workers (int): Maximum number of concurrent service searches and checks of
+                       cached devices. Defaults to 8.
+        timeout (float): Timeout of the name request to every cached device in
+                         seconds. Defaults to 2.0.
+
+    Returns:
+        List[Tuple[str, int]]: Bluetooth addresses and RFCOMM ports of the devices, in
+                               the order they were found by the inquiry.
+    """
+    bluetooth = _import_bluetooth()
+    headsets = _cached(bluetooth, lookup_name, cache, timeout, workers)
+    if headsets:
+        return headsets
+
+    candidates = [
+        address
+        for address, name in bluetooth.discover_devices(lookup_names=True)
+        if lookup_name in name
+    ]
+    ports = _map(lambda address: _find_port(bluetooth, address), candidates, workers)
+    headsets = [(address, port) for address, port in zip(candidates, ports) if port]
+    if cache is not None:
+        if headsets:
+            cache.put(lookup_name, headsets)
+        else:
+            cache.remove(lookup_name)
+    return headsets
+
+
+def discover(
+    lookup_name: str = "MindWave",
+    cache: Optional[DiscoveryCache] = None,
+    timeout: float = 2.0,
+) -> Optional[Tuple[str, int]]:
     """
     Discover a Bluetooth device by name and retrieve its RFCOMM service details.
 
@@ -23,33 +228,41 @@ def discover(lookup_name: str = "MindWave") -> Optional[Tuple[str, int]]:
     found, it searches for an RFCOMM service on the device and returns its address
     and port.
 
+    With a cache, the first cached device that answers a name request is returned
+    without an inquiry, see `discover_all`.
+
     Args:
         lookup_name (str): The name or part of the name of the target Bluetooth device.
                           Defaults to "MindWave".
+        cache (Optional[DiscoveryCache]): Cache of previous discoveries. Defaults to
+                                          None, always making an inquiry.
+        timeout (float): Timeout of the name request to every cached device in
+                         seconds. Defaults to 2.0.
 
     Returns:
         Optional[Tuple[str, int]]: A tuple containing the Bluetooth address and RFCOMM port
                                    of the discovered device, or None if no matching device
                                    or service is found.
     """
+    bluetooth = _import_bluetooth()
+    cached = (cache.get(lookup_name) if cache is not None else None) or []
+    for headset in cached:
+        if _answers(bluetooth, headset[0], lookup_name, timeout):
+            return headset
+
     # Discover nearby Bluetooth devices and their names
-    nearby_devices = discover_devices(lookup_names=True)
+    nearby_devices = bluetooth.discover_devices(lookup_names=True)
 
     # Iterate through each discovered device
     for address, name in nearby_devices:
         if lookup_name in name:  # Check if the device name matches the target name
-            services = find_service(address=address)  # Fetch services for the device
-
             # Search for an RFCOMM service and extract its port
-            try:
-                port = next(
-                    i["port"]
-                    for i in services
-                    if i["protocol"] == "RFCOMM" and i["port"]
-                )
+            port = _find_port(bluetooth, address)
+            if port:
+                if cache is not None:
+                    others = [headset for headset in cached if headset[0] != address]
+                    cache.put(lookup_name, [(address, port)] + others)
                 return (address, port)  # Return the device address and port if found
-            except StopIteration:
-                pass  # Continue searching if no RFCOMM service with a port is found
 
     # Return None if no matching device or service is found
     return None
@@ -0,0 +1,170 @@
+"""
+Encoding of data points into ThinkGear packets, the inverse of `thinkgear.parser`.
+
+Every function returns framed packets, [SYNC] [SYNC] [PLENGTH] [PAYLOAD...] [CKSUM],
+that are parsed back into equal data points. `thinkgear.batch` encodes columns of
+raw values and EEG powers into many packets at once with NumPy.
+"""
+
+from typing import Any, Iterable, Optional, Sequence
+import struct
+
+from thinkgear.parser import EXCODE, RAW_CODE
+from thinkgear.think_gear import MAX_PLENGTH, SYNC
+
+__all__ = (
+    "EEG_CODE",
+    "frame",
+    "encode_row",
+    "encode_payload",
+    "encode",
+    "encode_raw",
+    "encode_eeg",
+)
+
+EEG_CODE: int = 0x83
+
+_RAW_PACKET = struct.Struct(">BBBBBhB")
+# Sum of the payload bytes of a raw value packet besides the value.
+_RAW_SUM = RAW_CODE + 2
+
+
+def frame(payload: bytes) -> bytes:
+    """
+    Wrap a payload into a packet with [SYNC] [SYNC] [PLENGTH] and [CKSUM] bytes.
+
+    Args:
+        payload (bytes): The payload.
+
+    Returns:
+        bytes: The packet.
+
+    Raises:
+        ValueError: If the payload is longer than the maximum [PLENGTH].
+    """
+    if len(payload) > MAX_PLENGTH:
+        raise ValueError(
+            f"Payload of {len(payload)} bytes exceeds the maximum of {MAX_PLENGTH}."
+        )
+    checksum = ~sum(payload) & 0xFF
+    return bytes((SYNC, SYNC, len(payload))) + payload + bytes((checksum,))
+
+
+def encode_row(level: int, code: int, data: bytes) -> bytes:
+    """
+    Encode a single data row: [EXCODE...] [CODE] [VLENGTH] [VALUE...].
+
+    Codes from 0x80 carry a [VLENGTH] byte, others a single value byte, as read by the
+    parser.
+
+    Args:
+        level (int): The EXCODE level.
+        code (int): The operation code.
+        data (bytes): The value bytes.
+
+    Returns:
+        bytes: The row.
+
+    Raises:
+        ValueError: If a single byte code has not exactly one value byte.
+    """
+    prefix = bytes((EXCODE,)) * level
+    if code & 0x80 and code & 0xB0 != 0xB0:
+        return prefix + bytes((code, len(data))) + data
+    if len(data) != 1:
+        raise ValueError(f"Code 0x{code:02x} takes one value byte, got {len(data)}.")
+    return prefix + bytes((code,)) + data
+
+
+def encode_payload(points: Iterable[Any]) -> bytes:
+    """
+    Encode data points into a payload.
+
+    Args:
+        points (Iterable[Any]): Data points with `level`, `code` and `data`, e.g. from
+                                `parse`, in the order of the payload.
+
+    Returns:
+        bytes: The payload.
+    """
+    return b"".join(
+        encode_row(point.level, point.code, bytes(point.data)) for point in points
+    )
+
+
+def encode(points: Iterable[Any]) -> bytes:
+    """
+    Encode data points into a single packet.
+
+    Args:
+        points (Iterable[Any]): Data points with `level`, `code` and `data`.
+
+    Returns:
+        bytes: The packet.
+
+    Raises:
+        ValueError: If the payload is longer than the maximum [PLENGTH].
+    """
+    return frame(encode_payload(points))
+
+
+def encode_raw(values: Iterable[int]) -> bytes:
+    """
+    Encode raw values into one packet per value, as sent by headsets.
+
+    See `thinkgear.batch.encode_raw_batch` for large arrays.
+
+    Args:
+        values (Iterable[int]): Signed 16-bit raw values.
+
+    Returns:
+        bytes: The packets.
+
+    Raises:
+        struct.error: If a value is out of the 16-bit range.
+    """
+    pack = _RAW_PACKET.pack
+    return b"".join(
+        pack(
+            SYNC, SYNC, 4, RAW_CODE, 2, value, ~(_RAW_SUM + (value >> 8) + value) & 0xFF
+        )
+        for value in values
+    )
+
+
+def encode_eeg(
+    powers: Sequence[int],
+    poor_signal: Optional[int] = None,
+    attention: Optional[int] = None,
+    meditation: Optional[int] = None,
+) -> bytes:
+    """
+    Encode EEG powers into a packet, with the values headsets send along once per
+    second.
+
+    Args:
+        powers (Sequence[int]): The 8 unsigned 24-bit band powers, delta to midGamma.
+        poor_signal (Optional[int]): Poor signal value (0x02), placed before the powers.
+                                     Defaults to None, not encoded.
+        attention (Optional[int]): Attention value (0x04). Defaults to None.
+        meditation (Optional[int]): Meditation value (0x05). Defaults to None.
+
+    Returns:
+        bytes: The packet.
+
+    Raises:
+        ValueError: If there are not 8 powers.
+        OverflowError: If a power is out of the 24-bit range.
+    """
+    if len(powers) != 8:
+        raise ValueError(f"Expected 8 EEG powers, got {len(powers)}.")
+    data = b"".join(power.to_bytes(3, "big") for power in powers)
+    payload = bytearray()
+    if poor_signal is not None:
+        payload += bytes((0x02, poor_signal))
+    payload += encode_row(0, EEG_CODE, data)
+    if attention is not None:
+        payload += bytes((0x04, attention))
+    if meditation is not None:
+        payload += bytes((0x05, meditation))
+    return frame(bytes(payload))
@@ -0,0 +1,92 @@
+"""
+Open devices by URL.
+
+The transport module of a scheme, and with it pyserial or the replay support, is only
+imported when a URL with that scheme is opened.
+
+Schemes:
+    serial: A serial port, e.g. "serial:///dev/ttyUSB0?baud=57600" or
+            "serial://COM1". The baud rate defaults to 57600.
+    bt: A Bluetooth RFCOMM address and port, e.g. "bt://0C:61:CF:29:D5:9B:5".
+    file: A capture file to replay, e.g. "file://session.tgcap?speed=10" or
+          "file:///var/captures/session.tgcap?speed=none". The speed defaults to 1,
+          "none" replays as fast as possible.
+
+The serial and bt schemes accept a read timeout in seconds, e.g. "?timeout=1".
+"""
+
+from typing import TYPE_CHECKING, Dict, Optional
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+if TYPE_CHECKING:
+    from thinkgear.think_gear import ThinkGearProtocol
+
+__all__ = ("SCHEMES", "open")
+
+SCHEMES = ("serial", "bt", "file")
+
+_OPTIONS = {
+    "serial": ("baud", "timeout"),
+    "bt": ("timeout",),
+    "file": ("speed",),
+}
+
+
+def _timeout(options: Dict[str, str]) -> Optional[float]:
+    """Get the timeout option, None if it is not given."""
+    timeout = options.get("timeout")
+    return None if timeout is None else float(timeout)
+
+
+def open(url: str, debug: bool = False) -> "ThinkGearProtocol":
+    """
+    Create and connect a device for a URL, see the module for the schemes.
+
+    Args:
+        url (str): The URL of the device.
+        debug (bool): Enables debugging mode of the device if True. Defaults to False.
+
+    Returns:
+        ThinkGearProtocol: The connected device.
+
+    Raises:
+        ValueError: If the scheme, the address or an option of the URL is invalid.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in SCHEMES:
+        raise ValueError(
+            f"Unsupported scheme {parts.scheme!r}, expected one of {SCHEMES}."
+        )
+    # Locations of these schemes are not host names, e.g. relative paths or addresses.
+    location = unquote(parts.netloc + parts.path)
+    if not location:
+        raise ValueError(f"The URL {url!r} has no address.")
+    options = dict(parse_qsl(parts.query, keep_blank_values=True))
+    unknown = set(options) - set(_OPTIONS[scheme])
+    if unknown:
+        raise ValueError(f"Unsupported options {sorted(unknown)} for {scheme!r}.")
+
+    device: "ThinkGearProtocol"
+    if scheme == "serial":
+        from thinkgear.serial import ThinkGearSerial
+
+        device = ThinkGearSerial(debug, timeout=_timeout(options))
+        device.connect((location, int(options.get("baud", 57600))))
+    elif scheme == "bt":
+        from thinkgear.bluetooth import ThinkGearBluetooth
+
+        address, _, port = location.rpartition(":")
+        if not address or not port.isdigit():
+            raise ValueError(f"Expected bt://ADDRESS:PORT, got {url!r}.")
+        device = ThinkGearBluetooth(debug, timeout=_timeout(options))
+        device.connect((address, int(port)))
+    else:
+        from thinkgear.replay import ThinkGearReplay
+
+        speed = options.get("speed", "1")
+        device = ThinkGearReplay(
+            debug, None if speed.lower() == "none" else float(speed)
+        )
+        device.connect(location)
+    return device
@@ -0,0 +1,225 @@
+"""
+Streaming IIR filters of the raw signal.
+
+Filters are cascades of biquad sections in the layout of SciPy's second-order
+sections, one row ``[b0, b1, b2, a0, a1, a2]`` per section, designed with `notch`,
+`low_pass`, `high_pass` and `band_pass` or any other tool.
+
+`BiquadFilter` filters blocks of values without a per-value Python loop. Every section
+is written in state-space form, so the output of a block is the convolution of the
+block with the impulse response of the section plus the response to the state left by
+the previous block, and the state after the block is a matrix product as well. The
+result is the same as filtering the whole signal at once, up to floating-point
+rounding.
+"""
+
+from typing import Iterable, List
+import math
+import numpy as np
+
+from thinkgear.data_points import DataPointType, RawDataPoint
+from thinkgear.parser import RAW_CODE
+
+__all__ = ("notch", "low_pass", "high_pass", "band_pass", "BiquadFilter")
+
+
+def _normalize(b: List[float], a: List[float]) -> np.ndarray:
+    """Get a section with a0 equal to 1."""
+    return np.array([b + a]) / a[0]
+
+
+def notch(
+    frequency: float, sampling_rate: float = 512.0, quality: float = 30.0
+) -> np.ndarray:
+    """
+    Design a notch section, e.g. to remove 50 or 60 Hz mains noise.
+
+    Args:
+        frequency (float): Frequency to remove in Hz.
+        sampling_rate (float): Sampling rate in Hz. Defaults to 512.0.
+        quality (float): Quality factor, the frequency divided by the width of the
+                         notch. Defaults to 30.0.
+
+    Returns:
+        np.ndarray: The section, with shape (1, 6).
+    """
+    omega = 2 * math.pi * frequency / sampling_rate
+    alpha = math.sin(omega) / (2 * quality)
+    cos = math.cos(omega)
+    return _normalize([1, -2 * cos, 1], [1 + alpha, -2 * cos, 1 - alpha])
+
+
+def low_pass(
+    cutoff: float, sampling_rate: float = 512.0, quality: float = math.sqrt(0.5)
+) -> np.ndarray:
+    """
+    Design a second-order low-pass section, Butterworth by default.
+
+    Args:
+        cutoff (float): Cutoff frequency in Hz.
+        sampling_rate (float): Sampling rate in Hz. Defaults to 512.0.
+        quality (float): Quality factor. Defaults to 1/sqrt(2), Butterworth.
+
+    Returns:
+        np.ndarray: The section, with shape (1, 6).
+    """
+    omega = 2 * math.pi * cutoff / sampling_rate
+    alpha = math.sin(omega) / (2 * quality)
+    cos = math.cos(omega)
+    return _normalize(
+        [(1 - cos) / 2, 1 - cos, (1 - cos) / 2], [1 + alpha, -2 * cos, 1 - alpha]
+    )
+
+
+def high_pass(
+    cutoff: float, sampling_rate: float = 512.0, quality: float = math.sqrt(0.5)
+) -> np.ndarray:
+    """
+    Design a second-order high-pass section, Butterworth by default.
+
+    Args:
+        cutoff (float): Cutoff frequency in Hz.
+        sampling_rate (float): Sampling rate in Hz. Defaults to 512.0.
+        quality (float): Quality factor. Defaults to 1/sqrt(2), Butterworth.
+
+    Returns:
+        np.ndarray: The section, with shape (1, 6).
+    """
+    omega = 2 * math.pi * cutoff / sampling_rate
+    alpha = math.sin(omega) / (2 * quality)
+    cos = math.cos(omega)
+    return _normalize(
+        [(1 + cos) / 2, -1 - cos, (1 + cos) / 2], [1 + alpha, -2 * cos, 1 - alpha]
+    )
+
+
+def band_pass(low: float, high: float, sampling_rate: float = 512.0) -> np.ndarray:
+    """
+    Design a band-pass filter as a high-pass and a low-pass Butterworth section.
+
+    Args:
+        low (float): Lower cutoff frequency in Hz.
+        high (float): Upper cutoff frequency in Hz.
+        sampling_rate (float): Sampling rate in Hz. Defaults to 512.0.
+
+    Returns:
+        np.ndarray: The sections, with shape (2, 6).
+    """
+    return np.concatenate(
+        (high_pass(low, sampling_rate), low_pass(high, sampling_rate))
+    )
+
+
+class _Section:
+    """
+    Block responses of a biquad section in state-space form, for blocks of up to
+    `size` values.
+    """
+
+    def __init__(self, section: np.ndarray, size: int):
+        b0, b1, b2, a0, a1, a2 = section / section[3]
+        transition = np.array([[-a1, 1.0], [-a2, 0.0]])
+        # Powers of the transition matrix, from 0 to `size`.
+        self.powers: np.ndarray = np.empty((size + 1, 2, 2))
+        self.powers[0] = np.eye(2)
+        for power in range(size):
+            self.powers[power + 1] = transition @ self.powers[power]
+        # Response of the state to an input value after `j` steps.
+        self.gains: np.ndarray = self.powers[:size] @ np.array(
+            [b1 - a1 * b0, b2 - a2 * b0]
+        )
+        # Impulse response of the output.
+        self.impulse: np.ndarray = np.concatenate(([b0], self.gains[: size - 1, 0]))
+        self.state: np.ndarray = np.zeros(2)
+
+    def filter(self, values: np.ndarray) -> np.ndarray:
+        """Filter a block of at most `size` values, updating the state."""
+        count = len(values)
+        output = np.convolve(values, self.impulse[:count])[:count]
+        output += self.powers[:count, 0] @ self.state
+        self.state = (
+            self.powers[count] @ self.state + values @ self.gains[count - 1 :: -1]
+        )
+        return output
+
+
+class BiquadFilter:
+    """
+    Filter blocks of raw values with cascaded biquad sections, carrying the state of
+    the sections across blocks.
+
+    Use one filter per device.
+
+    Attributes:
+        block_size (int): Maximum number of values filtered in one step, longer
+                          inputs are split.
+    """
+
+    def __init__(self, sections: np.ndarray, block_size: int = 512):
+        """
+        Initialize the BiquadFilter instance.
+
+        Args:
+            sections (np.ndarray): Sections with shape (N, 6), rows of
+                                   ``[b0, b1, b2, a0, a1, a2]``, e.g.
+                                   ``np.concatenate((notch(50), band_pass(1, 40)))``.
+            block_size (int): Maximum number of values filtered in one step. The cost
+                              of a step grows with its square. Defaults to 512.
+
+        Raises:
+            ValueError: If the sections do not have 6 coefficients.
+        """
+        sections = np.atleast_2d(np.asarray(sections, dtype=np.float64))
+        if sections.ndim != 2 or sections.shape[1] != 6:
+            raise ValueError("Sections must have shape (N, 6).")
+        self.block_size: int = block_size
+        self._sections: List[_Section] = [
+            _Section(section, block_size) for section in sections
+        ]
+
+    def reset(self) -> None:
+        """
+        Clear the state of the sections, e.g. after a gap in the signal.
+        """
+        for section in self._sections:
+            section.state = np.zeros(2)
+
+    def filter(self, values: np.ndarray) -> np.ndarray:
+        """
+        Filter the next block of values.
+
+        Args:
+            values (np.ndarray): Raw values in the order they were received, e.g.
+                                 `thinkgear.batch.Column.values` of code 0x80.
+
+        Returns:
+            np.ndarray: Filtered values as float64.
+        """
+        output = np.array(values, dtype=np.float64).ravel()
+        for start in range(0, len(output), self.block_size):
+            block = output[start : start + self.block_size]
+            for section in self._sections:
+                block = section.filter(block)
+            output[start : start + self.block_size] = block
+        return output
+
+    def filter_points(self, points: Iterable[DataPointType]) -> np.ndarray:
+        """
+        Filter the raw values of parsed data points, ignoring others.
+
+        Args:
+            points (Iterable[DataPointType]): Parsed data points, e.g. from `read`.
+
+        Returns:
+            np.ndarray: Filtered values as float64.
+        """
+        return self.filter(
+            np.array(
+                [
+                    point.value
+                    for point in points
+                    if isinstance(point, RawDataPoint) and point.code == RAW_CODE
+                ],
+                dtype=np.float64,
+            )
+        )
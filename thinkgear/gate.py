@@ -0,0 +1,146 @@
+from typing import Any, Container, Dict, Iterable, List, Optional
+
+from thinkgear.parser import RAW_CODE, _is_raw_packet, _iter_rows
+
+__all__ = ("POOR_SIGNAL_CODE", "SignalGate")
+
+POOR_SIGNAL_CODE = 0x02
+
+
+class SignalGate:
+    """
+    Skip data while the headset has no contact with the skin.
+
+    The gate tracks the poor signal values (0x02) of a single device. Contact is lost
+    once a value reaches `threshold`, and regained once `hold` consecutive values are
+    below `recover`. While contact is lost, raw value payloads are dropped before they
+    are parsed, and other payloads are reduced to the rows with `keep` codes, so the
+    poor signal values still arrive and tell when contact is back. Skipped data points
+    are counted by code.
+
+    Attributes:
+        threshold (int): Poor signal value from which contact is lost.
+        recover (int): Poor signal value below which contact is regained.
+        hold (int): Number of consecutive values below `recover` to regain contact.
+        keep (Container[int]): Codes kept while contact is lost.
+        contact (bool): Whether the headset has contact.
+        skipped (Dict[int, int]): Number of skipped data points by code.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 200,
+        recover: Optional[int] = None,
+        hold: int = 1,
+        keep: Container[int] = (0x01, POOR_SIGNAL_CODE),
+    ):
+        """
+        Initialize the SignalGate instance, assuming contact.
+
+        Args:
+            threshold (int): Poor signal value from which contact is lost. Defaults to
+                             200, see `PoorSignalDataPoint.has_contact`.
+            recover (Optional[int]): Poor signal value below which contact is regained,
+                                     lower than the threshold for hysteresis. Defaults
+                                     to the threshold.
+            hold (int): Number of consecutive values below `recover` to regain contact.
+                        Defaults to 1.
+            keep (Container[int]): Codes kept while contact is lost. Defaults to the
+                                   battery level and the poor signal value.
+        """
+        self.threshold: int = threshold
+        self.recover: int = threshold if recover is None else recover
+        self.hold: int = hold
+        self.keep: Container[int] = keep
+        self.contact: bool = True
+        self.skipped: Dict[int, int] = {}
+        self._good: int = 0
+
+    def update(self, value: int) -> bool:
+        """
+        Track a poor signal value.
+
+        Args:
+            value (int): The poor signal value.
+
+        Returns:
+            bool: Whether the headset has contact after the value.
+        """
+        if value >= self.threshold:
+            self.contact = False
+            self._good = 0
+        elif not self.contact and value < self.recover:
+            self._good += 1
+            if self._good >= self.hold:
+                self.contact = True
+        else:
+            self._good = 0
+        return self.contact
+
+    def _skip(self, code: int) -> None:
+        self.skipped[code] = self.skipped.get(code, 0) + 1
+
+    def apply(self, payload: bytes) -> bytes:
+        """
+        Gate a verified payload.
+
+        Args:
+            payload (bytes): The payload.
+
+        Returns:
+            bytes: The payload, the payload reduced to the kept rows while contact is
+                   lost, or an empty byte string if nothing is kept.
+        """
+        if _is_raw_packet(payload):
+            if self.contact:
+                return payload
+            self._skip(RAW_CODE)
+            return b""
+        rows = list(_iter_rows(payload))
+        for level, code, offset, length in rows:
+            if level == 0 and code == POOR_SIGNAL_CODE and length:
+                self.update(payload[offset])
+        if self.contact:
+            return payload
+        kept = []
+        start = 0
+        for level, code, offset, length in rows:
+            end = offset + length
+            if code in self.keep:
+                kept.append(payload[start:end])
+            else:
+                self._skip(code)
+            start = end
+        return b"".join(kept)
+
+    def filter(self, payloads: Iterable[bytes]) -> List[bytes]:
+        """
+        Gate verified payloads, see `apply`.
+
+        Args:
+            payloads (Iterable[bytes]): The payloads.
+
+        Returns:
+            List[bytes]: The payloads that are not dropped, possibly reduced.
+        """
+        return [payload for payload in map(self.apply, payloads) if payload]
+
+    def filter_points(self, points: Iterable[Any]) -> List[Any]:
+        """
+        Gate data points that are already parsed.
+
+        Args:
+            points (Iterable[Any]): Data points in the order they were parsed.
+
+        Returns:
+            List[Any]: The data points that are not skipped.
+        """
+        kept = []
+        for point in points:
+            if point.level == 0 and point.code == POOR_SIGNAL_CODE:
+                self.update(point.value)
+            if self.contact or point.code in self.keep:
+                kept.append(point)
+            else:
+                self._skip(point.code)
+        return kept
@@ -0,0 +1,200 @@
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+from collections import namedtuple
+import selectors
+import struct
+
+from thinkgear.think_gear import ThinkGearProtocol
+from thinkgear.parser import parse
+from thinkgear.data_points import DataPointType
+from thinkgear.metrics import DeviceMetrics
+
+try:
+    import fcntl
+    import termios
+except ImportError:
+    fcntl = None  # type: ignore
+
+__all__ = ("Backlog", "ThinkGearHub")
+
+
+class Backlog(namedtuple("Backlog", "unread, buffered")):
+    """
+    Data of a device that is received but not yet framed.
+
+    Attributes:
+        unread (int): Bytes waiting in the operating system buffer of the connection.
+                      Always zero where it can not be queried.
+        buffered (int): Bytes in the framer buffer, i.e. an incomplete packet.
+    """
+
+
+def _unread(fileno: int) -> int:
+    """Get the number of bytes waiting to be read from the file descriptor."""
+    if fcntl is None:
+        return 0
+    try:
+        result = fcntl.ioctl(fileno, termios.FIONREAD, b"\0\0\0\0")
+    except OSError:
+        return 0
+    return struct.unpack("i", result)[0]
+
+
+class ThinkGearHub:
+    """
+    Receive data from many ThinkGear devices in a single thread.
+
+    File descriptors of connected devices are multiplexed with `selectors`, and the
+    bytes received from each device are fed into its own framer, so no thread per
+    device is needed.
+
+    A device whose connection fails is disconnected and removed from the hub, and the
+    error is kept in `errors`.
+
+    Attributes:
+        errors (Dict[Hashable, Exception]): Errors of removed devices, by device id.
+    """
+
+    def __init__(self, debug: bool = False) -> None:
+        """
+        Initialize the ThinkGearHub instance.
+
+        Args:
+            debug (bool): Enables debugging mode if True. Defaults to False.
+        """
+        self._debug: bool = debug
+        self._selector: selectors.BaseSelector = selectors.DefaultSelector()
+        self._devices: Dict[Hashable, ThinkGearProtocol] = {}
+        self._filenos: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, Exception] = {}
+
+    def add(self, device_id: Hashable, device: ThinkGearProtocol) -> None:
+        """
+        Add a connected device to the hub.
+
+        Args:
+            device_id (Hashable): Identifier of the device in the results.
+            device (ThinkGearProtocol): A connected transport, e.g. `ThinkGearSerial`.
+
+        Raises:
+            KeyError: If a device with the id is already added.
+        """
+        if device_id in self._devices:
+            raise KeyError(f"Device {device_id!r} is already added.")
+        fileno = device.fileno()
+        self._selector.register(fileno, selectors.EVENT_READ, device_id)
+        self._devices[device_id] = device
+        self._filenos[device_id] = fileno
+
+    def remove(self, device_id: Hashable) -> ThinkGearProtocol:
+        """
+        Remove a device from the hub without disconnecting it.
+
+        Args:
+            device_id (Hashable): Identifier of the device.
+
+        Returns:
+            ThinkGearProtocol: The removed device.
+        """
+        device = self._devices.pop(device_id)
+        self._selector.unregister(self._filenos.pop(device_id))
+        return device
+
+    def devices(self) -> Dict[Hashable, ThinkGearProtocol]:
+        """
+        Get the devices in the hub.
+
+        Returns:
+            Dict[Hashable, ThinkGearProtocol]: Devices by id.
+        """
+        return dict(self._devices)
+
+    def metrics(self) -> Dict[Hashable, DeviceMetrics]:
+        """
+        Get the metrics of the devices in the hub, e.g. for `MetricsServer`.
+
+        Returns:
+            Dict[Hashable, DeviceMetrics]: Metrics by device id.
+        """
+        return {
+            device_id: device.metrics for device_id, device in self._devices.items()
+        }
+
+    def backlog(self) -> Dict[Hashable, Backlog]:
+        """
+        Get the received but not yet framed data of every device.
+
+        A growing backlog means that the hub does not keep up with the device.
+
+        Returns:
+            Dict[Hashable, Backlog]: Backlog by device id.
+        """
+        return {
+            device_id: Backlog(_unread(self._filenos[device_id]), len(device._buffer))
+            for device_id, device in self._devices.items()
+        }
+
+    def poll(self, timeout: Optional[float] = None) -> List[Tuple[Hashable, bytes]]:
+        """
+        Wait until any device has data and frame all available bytes.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds, None waits until
+                                       any device has data. Defaults to None.
+
+        Returns:
+            List[Tuple[Hashable, bytes]]: Device ids and verified payloads in the order
+                                          they were received, empty right away if the
+                                          hub has no devices.
+        """
+        payloads: List[Tuple[Hashable, bytes]] = []
+        if not self._devices:
+            return payloads
+        for key, _ in self._selector.select(timeout):
+            device_id = key.data
+            try:
+                received = self._devices[device_id].read_payloads()
+            except Exception as error:
+                if self._debug:
+                    print(f"Removed device {device_id!r}: {error}")
+                self.remove(device_id).disconnect()
+                self.errors[device_id] = error
+                continue
+            payloads.extend((device_id, payload) for payload in received)
+        return payloads
+
+    def read(
+        self, timeout: Optional[float] = None
+    ) -> List[Tuple[Hashable, List[DataPointType]]]:
+        """
+        Wait until any device has data and parse all available payloads.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds, None waits until
+                                       any device has data. Defaults to None.
+
+        Returns:
+            List[Tuple[Hashable, List[DataPointType]]]: Device ids and parsed data points
+                                                        of each received payload.
+        """
+        return [
+            (device_id, parse(payload)) for device_id, payload in self.poll(timeout)
+        ]
+
+    def __iter__(self) -> Iterator[Tuple[Hashable, List[DataPointType]]]:
+        """
+        Iterate over parsed payloads of all devices while any device is in the hub.
+
+        Returns:
+            Iterator[Tuple[Hashable, List[DataPointType]]]: Device ids and parsed data
+                                                            points in arrival order.
+        """
+        while self._devices:
+            yield from self.read()
+
+    def close(self) -> None:
+        """
+        Disconnect all devices and close the selector.
+        """
+        for device_id in list(self._devices):
+            self.remove(device_id).disconnect()
+        self._selector.close()
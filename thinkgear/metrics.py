@@ -0,0 +1,231 @@
+"""
+Counters of the link health and throughput of devices.
+
+Every `ThinkGearProtocol` keeps a `DeviceMetrics` instance in its `metrics` attribute,
+updated by the framer with a few integer additions per received chunk. `render`
+formats the counters of many devices in the Prometheus text format, and
+`MetricsServer` serves them over HTTP for scraping.
+"""
+
+from typing import Callable, Dict, Hashable, List, Mapping, Tuple, Union
+import threading
+import time
+
+__all__ = ("DeviceMetrics", "render", "MetricsServer")
+
+
+class DeviceMetrics:
+    """
+    Counters of a single device.
+
+    Attributes:
+        bytes_received (int): Bytes received from the device.
+        packets (int): Packets with a valid checksum.
+        checksum_errors (int): Packets with a checksum mismatch.
+        length_errors (int): Packets with an invalid [PLENGTH] byte.
+        sync_losses (int): Times bytes were skipped, i.e. sync was lost, until the
+                           next verified packet.
+        skipped_bytes (int): Bytes skipped while out of sync.
+        lost_packets (int): Estimated number of lost packets, the packets that failed
+                            verification while out of sync, at least one per loss of
+                            sync.
+        points (Dict[int, int]): Received data points by code, before gating.
+        interval (float): Minimum number of seconds between the measurements of
+                          `rates`.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        """
+        Initialize the DeviceMetrics instance.
+
+        Args:
+            interval (float): Minimum number of seconds between the measurements of
+                              `rates`. Defaults to 1.0.
+        """
+        self.bytes_received: int = 0
+        self.packets: int = 0
+        self.checksum_errors: int = 0
+        self.length_errors: int = 0
+        self.sync_losses: int = 0
+        self.skipped_bytes: int = 0
+        self.lost_packets: int = 0
+        self.points: Dict[int, int] = {}
+        self.interval: float = interval
+        self._mark: Tuple[float, int, int] = (time.monotonic(), 0, 0)
+        self._rates: Tuple[float, float] = (0.0, 0.0)
+        self._measured: bool = False
+
+    def count_point(self, code: int, count: int = 1) -> None:
+        """
+        Count received data points.
+
+        Args:
+            code (int): Operation code of the data points.
+            count (int): Number of data points. Defaults to 1.
+        """
+        self.points[code] = self.points.get(code, 0) + count
+
+    def rates(self) -> Tuple[float, float]:
+        """
+        Get the packets and bytes received per second.
+
+        The rates are measured over the time since the previous measurement, once at
+        least `interval` seconds have passed, and the last measurement is returned
+        in between. Until the first measurement, the rates since the creation are
+        returned.
+
+        Returns:
+            Tuple[float, float]: Packets per second and bytes per second.
+        """
+        now = time.monotonic()
+        start, packets, received = self._mark
+        elapsed = now - start
+        if elapsed >= self.interval or not self._measured and elapsed > 0:
+            self._rates = (
+                (self.packets - packets) / elapsed,
+                (self.bytes_received - received) / elapsed,
+            )
+        if elapsed >= self.interval:
+            self._mark = (now, self.packets, self.bytes_received)
+            self._measured = True
+        return self._rates
+
+    def snapshot(self) -> Dict[str, Union[int, float, Dict[int, int]]]:
+        """
+        Get all counters and rates.
+
+        Returns:
+            Dict[str, Union[int, float, Dict[int, int]]]: Counters and rates by name.
+        """
+        packets_rate, bytes_rate = self.rates()
+        return {
+            "bytes_received": self.bytes_received,
+            "packets": self.packets,
+            "checksum_errors": self.checksum_errors,
+            "length_errors": self.length_errors,
+            "sync_losses": self.sync_losses,
+            "skipped_bytes": self.skipped_bytes,
+            "lost_packets": self.lost_packets,
+            "points": dict(self.points),
+            "packets_per_second": packets_rate,
+            "bytes_per_second": bytes_rate,
+        }
+
+
+_COUNTERS = (
+    ("bytes_received", "Bytes received from the device."),
+    ("packets", "Packets with a valid checksum."),
+    ("checksum_errors", "Packets with a checksum mismatch."),
+    ("length_errors", "Packets with an invalid length."),
+    ("sync_losses", "Times sync was lost until the next verified packet."),
+    ("skipped_bytes", "Bytes skipped while out of sync."),
+    ("lost_packets", "Estimated packets lost while out of sync."),
+)
+
+
+def _label(device_id: Hashable) -> str:
+    """Format a device id as a label value."""
+    value = str(device_id).replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"')
+
+
+def render(metrics: Mapping[Hashable, DeviceMetrics]) -> str:
+    """
+    Format the metrics of devices in the Prometheus text format.
+
+    Args:
+        metrics (Mapping[Hashable, DeviceMetrics]): Metrics by device id, e.g. from
+                                                    `ThinkGearHub.metrics`.
+
+    Returns:
+        str: The exposition, with the device id in the "device" label.
+    """
+    devices = [(_label(device_id), device) for device_id, device in metrics.items()]
+    lines: List[str] = []
+    for name, description in _COUNTERS:
+        lines.append(f"# HELP thinkgear_{name}_total {description}")
+        lines.append(f"# TYPE thinkgear_{name}_total counter")
+        for label, device in devices:
+            value = getattr(device, name)
+            lines.append(f'thinkgear_{name}_total{{device="{label}"}} {value}')
+    lines.append("# HELP thinkgear_points_total Received data points by code.")
+    lines.append("# TYPE thinkgear_points_total counter")
+    for label, device in devices:
+        for code, count in sorted(device.points.items()):
+            lines.append(
+                f'thinkgear_points_total{{device="{label}",code="0x{code:02x}"}} {count}'
+            )
+    rates = [(label, device.rates()) for label, device in devices]
+    for index, name in enumerate(("packets", "bytes")):
+        lines.append(f"# HELP thinkgear_{name}_per_second Recent {name} per second.")
+        lines.append(f"# TYPE thinkgear_{name}_per_second gauge")
+        for label, rate in rates:
+            lines.append(
+                f'thinkgear_{name}_per_second{{device="{label}"}} {rate[index]}'
+            )
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Serve the metrics of devices over HTTP in the Prometheus text format.
+
+    Requests are served by a daemon thread, so the server does not keep the
+    application running. Can be used as a context manager, which closes the server on
+    exit.
+
+    Attributes:
+        address (Tuple[str, int]): Host and port the server listens on.
+    """
+
+    def __init__(
+        self,
+        metrics: Callable[[], Mapping[Hashable, DeviceMetrics]],
+        host: str = "127.0.0.1",
+        port: int = 9464,
+    ):
+        """
+        Initialize the MetricsServer instance and start serving.
+
+        Args:
+            metrics (Callable[[], Mapping[Hashable, DeviceMetrics]]): Called on every
+                                                                      request to get
+                                                                      metrics by
+                                                                      device id, e.g.
+                                                                      `hub.metrics`.
+            host (str): Host to listen on. Defaults to "127.0.0.1", local only.
+            port (int): Port to listen on, 0 picks a free port. Defaults to 9464.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = render(metrics()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.address: Tuple[str, int] = self._server.server_address[:2]  # type: ignore
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Stop serving and close the socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "MetricsServer":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
@@ -1,20 +1,94 @@
-from typing import List
-from thinkgear.data_points import DATA_POINTS, DataPointType, RawDataPoint
+from typing import (
+    Container,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
+import struct
+from thinkgear.data_points import (
+    DataPointType,
+    LazyDataPoint,
+    RawDataPoint,
+    _point_type,
+)
 
 
 EXCODE: int = 0x55
+RAW_CODE: int = 0x80
+
+_RAW_VALUE = struct.Struct(">h")
 
 
 def _create_data_point(level: int, code: int, data: bytes) -> DataPointType:
-    point_type = DATA_POINTS.get(code, RawDataPoint)
-    if len(data) < point_type.SIZE:
-        point_type = RawDataPoint
-    return point_type(level, code, data)
+    return _point_type(code, len(data))(level, code, data)
 
 
-def parse(payload: bytes) -> List[DataPointType]:
-    """Parse packet from ThinkGear Serial Stream.
-    http://wearcam.org/ece516/mindset_communications_protocol.pdf"""
+def _is_raw_packet(payload: bytes) -> bool:
+    """Check if the payload is a single raw value: [0x80] [0x02] [HIGH] [LOW]."""
+    return len(payload) == 4 and payload[0] == RAW_CODE and payload[1] == 2
+
+
+def parse_raw_value(payload: bytes) -> Optional[int]:
+    """
+    Decode a payload that contains only a raw value.
+
+    Args:
+        payload (bytes): The packet payload.
+
+    Returns:
+        Optional[int]: The signed raw value, or None if the payload has any other shape.
+    """
+    if _is_raw_packet(payload):
+        return _RAW_VALUE.unpack_from(payload, 2)[0]
+    return None
+
+
+def _iter_rows(payload: bytes) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Walk data rows of the payload, for the lazy and filtered parsers. The eager
+    `_parse_payload` inlines the same walk.
+
+    Yields:
+        Tuple[int, int, int, int]: EXCODE level, code, offset and length of the data of
+                                   each row.
+    """
+    pLength = len(payload)
+    bytesParsed = 0
+    code = 0
+    length = 0
+    extendedCodeLevel = 0
+
+    # Loop until all bytes are parsed from the payload[] array...
+    while bytesParsed < pLength:
+        # Parse the extendedCodeLevel, code, and length
+        extendedCodeLevel = 0
+        while payload[bytesParsed] == EXCODE:
+            extendedCodeLevel += 1
+            bytesParsed += 1
+        code = payload[bytesParsed]
+        bytesParsed += 1
+        # ~ if code & 0x80 and code not in [0xBA, 0xBC]:
+        if code & 0x80 and code & 0xB0 != 0xB0:
+            length = payload[bytesParsed]
+            bytesParsed += 1
+        else:
+            length = 1
+
+        yield extendedCodeLevel, code, bytesParsed, min(length, pLength - bytesParsed)
+
+        bytesParsed += length
+
+
+def _parse_payload(payload: bytes) -> List[DataPointType]:
+    """Generic parser of any payload, see `parse`.
+
+    The walk of `_iter_rows` is inlined here, as this is the path of every
+    non-raw packet and the generator costs about half again as much. A fix of the
+    walk must be applied to both."""
     pLength = len(payload)
     bytesParsed = 0
     code = 0
@@ -43,3 +117,70 @@ def parse(payload: bytes) -> List[DataPointType]:
 
         bytesParsed += length
     return data_points
+
+
+def _parse_lazy(payload: bytes) -> List[LazyDataPoint]:
+    """Parser of any payload into lazy data points, see `parse`."""
+    view = memoryview(payload)
+    if _is_raw_packet(payload):
+        return [LazyDataPoint(0, RAW_CODE, view, 2, 2)]
+    return [
+        LazyDataPoint(level, code, view, offset, length)
+        for level, code, offset, length in _iter_rows(payload)
+    ]
+
+
+def parse_codes(payload: bytes, codes: Container[int]) -> List[DataPointType]:
+    """
+    Parse only data points with the given codes, skipping construction of the rest.
+
+    Args:
+        payload (bytes): The packet payload.
+        codes (Container[int]): Operation codes to parse.
+
+    Returns:
+        List[DataPointType]: Parsed data points with one of the codes.
+    """
+    if _is_raw_packet(payload):
+        return parse(payload) if RAW_CODE in codes else []
+    return [
+        _create_data_point(level, code, payload[offset : offset + length])
+        for level, code, offset, length in _iter_rows(payload)
+        if code in codes
+    ]
+
+
+@overload
+def parse(payload: bytes, lazy: Literal[False] = ...) -> List[DataPointType]: ...
+
+
+@overload
+def parse(payload: bytes, lazy: Literal[True]) -> List[LazyDataPoint]: ...
+
+
+@overload
+def parse(
+    payload: bytes, lazy: bool
+) -> Union[List[DataPointType], List[LazyDataPoint]]: ...
+
+
+def parse(
+    payload: bytes, lazy: bool = False
+) -> Union[List[DataPointType], List[LazyDataPoint]]:
+    """Parse packet from ThinkGear Serial Stream.
+    http://wearcam.org/ece516/mindset_communications_protocol.pdf
+
+    Payloads with a single raw value, the vast majority of the stream, are decoded
+    directly without going through the generic parser.
+
+    If `lazy` is True, `LazyDataPoint` records are returned instead, which decode
+    their values only when accessed."""
+    if lazy:
+        return _parse_lazy(payload)
+    if _is_raw_packet(payload):
+        point: DataPointType = tuple.__new__(
+            RawDataPoint,
+            (0, RAW_CODE, payload[2:], _RAW_VALUE.unpack_from(payload, 2)[0]),
+        )
+        return [point]
+    return _parse_payload(payload)
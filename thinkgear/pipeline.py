@@ -0,0 +1,590 @@
+"""
+Composable pipelines of stages over blocks of a device stream.
+
+A `Pipeline` pulls blocks from a source through a chain of stages. A stage is a
+function from an iterator of input blocks to an iterator of output blocks, usually a
+generator, so stages are lazy and a block is only read from the source when the last
+stage asks for one. Blocks are lists or arrays of many items, e.g. all payloads framed
+from a received chunk, so the per-block overhead of a stage is shared by its items.
+
+Backpressure is implicit as long as stages run in the same thread. `buffered` moves
+the upstream stages into a thread with a bounded queue, which blocks the upstream
+stages while it is full, and `tee` fans blocks out to branches running in their own
+threads the same way.
+
+Every `Stage` counts blocks, items and the time spent in the stage itself, without the
+time spent waiting for upstream stages, see `Pipeline.stats`::
+
+    pipeline = Pipeline(
+        payloads(device),
+        gate_payloads(SignalGate()),
+        parse_payloads(),
+        raw_values(),
+        filter_raw(BiquadFilter(notch(50))),
+        band_powers(BandPowerEstimator()),
+    )
+    pipeline.run(print)
+"""
+
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+from collections import namedtuple
+import queue
+import threading
+import time
+
+from thinkgear.parser import RAW_CODE, parse
+from thinkgear.think_gear import ThinkGearProtocol
+
+if TYPE_CHECKING:
+    from thinkgear.filters import BiquadFilter
+    from thinkgear.gate import SignalGate
+    from thinkgear.spectral import BandPowerEstimator
+
+__all__ = (
+    "StageStats",
+    "Stage",
+    "Pipeline",
+    "payloads",
+    "frame",
+    "gate_payloads",
+    "parse_payloads",
+    "raw_values",
+    "filter_raw",
+    "windows",
+    "band_powers",
+    "rebatch",
+    "map_blocks",
+    "buffered",
+    "tee",
+)
+
+_END = object()
+
+
+class StageStats(namedtuple("StageStats", "name, blocks, items, seconds")):
+    """
+    Counters of a stage.
+
+    Attributes:
+        name (str): Name of the stage.
+        blocks (int): Number of blocks produced.
+        items (int): Number of items in the produced blocks.
+        seconds (float): Time spent in the stage, without upstream stages.
+    """
+
+    @property
+    def throughput(self) -> float:
+        """
+        Get the number of items produced per second spent in the stage.
+
+        Returns:
+            float: Items per second, 0.0 if no time was spent.
+        """
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+class _Timed:
+    """An iterator that counts the time spent waiting for the wrapped iterator."""
+
+    def __init__(self, blocks: Iterable[Any]):
+        self.blocks: Iterator[Any] = iter(blocks)
+        self.seconds: float = 0.0
+
+    def __iter__(self) -> "_Timed":
+        return self
+
+    def __next__(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return next(self.blocks)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+class Stage:
+    """
+    A stage of a pipeline with counters.
+
+    Attributes:
+        name (str): Name of the stage, shown in the stats.
+        blocks (int): Number of blocks produced.
+        items (int): Number of items in the produced blocks.
+        seconds (float): Time spent in the stage, without upstream stages.
+    """
+
+    def __init__(
+        self,
+        function: Callable[[Iterator[Any]], Iterable[Any]],
+        name: Optional[str] = None,
+    ):
+        """
+        Initialize the Stage instance.
+
+        Args:
+            function (Callable[[Iterator[Any]], Iterable[Any]]): Function from input
+                                                                 blocks to output
+                                                                 blocks.
+            name (Optional[str]): Name of the stage. Defaults to the name of the
+                                  function.
+        """
+        self.name: str = name or str(getattr(function, "__name__", "stage"))
+        self.blocks: int = 0
+        self.items: int = 0
+        self.seconds: float = 0.0
+        self._function = function
+
+    def __call__(self, blocks: Iterable[Any]) -> Iterator[Any]:
+        """
+        Apply the stage to input blocks, counting the produced blocks.
+
+        Args:
+            blocks (Iterable[Any]): Input blocks.
+
+        Returns:
+            Iterator[Any]: Output blocks.
+        """
+        upstream = _Timed(blocks)
+        output = iter(self._function(upstream))
+        while True:
+            start = time.perf_counter()
+            waited = upstream.seconds
+            try:
+                block = next(output)
+            except StopIteration:
+                self.seconds += time.perf_counter() - start - upstream.seconds + waited
+                return
+            self.seconds += time.perf_counter() - start - upstream.seconds + waited
+            self.blocks += 1
+            self.items += len(block) if hasattr(block, "__len__") else 1
+            yield block
+
+    def stats(self) -> StageStats:
+        """
+        Get the counters of the stage.
+
+        Returns:
+            StageStats: The counters.
+        """
+        return StageStats(self.name, self.blocks, self.items, self.seconds)
+
+
+class Pipeline:
+    """
+    A source of blocks and a chain of stages.
+
+    A pipeline is itself iterable over the blocks of its last stage, so it can be the
+    source of another pipeline or a branch of `tee`.
+    """
+
+    def __init__(self, source: Iterable[Any], *stages: Stage):
+        """
+        Initialize the Pipeline instance.
+
+        Args:
+            source (Iterable[Any]): Source of blocks, e.g. `payloads` of a device.
+            *stages (Stage): Stages in the order they are applied.
+        """
+        self._source: Iterable[Any] = source
+        self._stages: List[Stage] = list(stages)
+
+    def then(self, *stages: Stage) -> "Pipeline":
+        """
+        Append stages.
+
+        Args:
+            *stages (Stage): Stages in the order they are applied.
+
+        Returns:
+            Pipeline: This pipeline.
+        """
+        self._stages.extend(stages)
+        return self
+
+    def __iter__(self) -> Iterator[Any]:
+        blocks: Iterable[Any] = self._source
+        for stage in self._stages:
+            blocks = stage(blocks)
+        return iter(blocks)
+
+    def run(self, *sinks: Callable[[Any], Any]) -> None:
+        """
+        Pull all blocks through the pipeline and pass every block to the sinks.
+
+        Args:
+            *sinks (Callable[[Any], Any]): Functions called with every output block, in
+                                           order.
+        """
+        for block in self:
+            for sink in sinks:
+                sink(block)
+
+    def stats(self) -> List[StageStats]:
+        """
+        Get the counters of the stages.
+
+        Returns:
+            List[StageStats]: Counters of every stage, in order.
+        """
+        return [stage.stats() for stage in self._stages]
+
+
+def payloads(device: ThinkGearProtocol) -> Iterator[List[bytes]]:
+    """
+    Read blocks of payloads from a connected device until it stops sending data.
+
+    Args:
+        device (ThinkGearProtocol): The connected device.
+
+    Returns:
+        Iterator[List[bytes]]: Verified payloads framed from every received chunk.
+    """
+    while True:
+        try:
+            block = device.read_payloads()
+        except IOError:
+            return
+        if block:
+            yield block
+
+
+def frame() -> Stage:
+    """
+    Frame received chunks of the stream, e.g. records of a chunk capture.
+
+    Returns:
+        Stage: Stage from chunks of bytes to lists of verified payloads.
+    """
+
+    def frame(blocks: Iterator[bytes]) -> Iterator[List[bytes]]:
+        framer = ThinkGearProtocol()
+        for chunk in blocks:
+            block = framer.feed(chunk)
+            if block:
+                yield block
+
+    return Stage(frame)
+
+
+def gate_payloads(gate: "SignalGate") -> Stage:
+    """
+    Skip data while the headset has no contact, before it is parsed, see
+    `thinkgear.gate.SignalGate`.
+
+    Args:
+        gate (SignalGate): The gate of the device, used by this stage only.
+
+    Returns:
+        Stage: Stage from lists of payloads to lists of gated payloads, skipping
+               blocks that are dropped entirely.
+    """
+
+    def gate_payloads(blocks: Iterator[List[bytes]]) -> Iterator[List[bytes]]:
+        for block in blocks:
+            block = gate.filter(block)
+            if block:
+                yield block
+
+    return Stage(gate_payloads)
+
+
+def parse_payloads(lazy: bool = False) -> Stage:
+    """
+    Parse payloads into data points, see `thinkgear.parser.parse`.
+
+    Args:
+        lazy (bool): Produce `LazyDataPoint` instances. Defaults to False.
+
+    Returns:
+        Stage: Stage from lists of payloads to lists of data points.
+    """
+
+    def parse_payloads(blocks: Iterator[List[bytes]]) -> Iterator[List[Any]]:
+        for block in blocks:
+            yield [point for payload in block for point in parse(payload, lazy)]
+
+    return Stage(parse_payloads)
+
+
+def raw_values() -> Stage:
+    """
+    Collect the raw values (0x80) of data points into arrays. Requires NumPy.
+
+    Returns:
+        Stage: Stage from lists of data points to int16 arrays, skipping blocks
+               without raw values.
+    """
+    import numpy as np
+
+    def raw_values(blocks: Iterator[List[Any]]) -> Iterator[np.ndarray]:
+        for block in blocks:
+            values = [point.value for point in block if point.code == RAW_CODE]
+            if values:
+                yield np.array(values, dtype=np.int16)
+
+    return Stage(raw_values)
+
+
+def filter_raw(biquad: "BiquadFilter") -> Stage:
+    """
+    Filter arrays of raw values, see `thinkgear.filters.BiquadFilter`.
+
+    Args:
+        biquad (BiquadFilter): The filter, used by this stage only.
+
+    Returns:
+        Stage: Stage from arrays of raw values to arrays of filtered values.
+    """
+
+    def filter_raw(blocks: Iterator[Any]) -> Iterator[Any]:
+        for block in blocks:
+            yield biquad.filter(block)
+
+    return Stage(filter_raw)
+
+
+def windows(size: int, hop: int) -> Stage:
+    """
+    Cut arrays of values into overlapping windows. Requires NumPy.
+
+    Args:
+        size (int): Number of values of a window.
+        hop (int): Number of values between the starts of windows.
+
+    Returns:
+        Stage: Stage from arrays of values to arrays of windows with shape
+               (N, size), skipping blocks that complete no window.
+    """
+    import numpy as np
+
+    def windows(blocks: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+        tail: Optional[np.ndarray] = None
+        # Values between windows that are not received yet, if hop is above size.
+        skip = 0
+        for block in blocks:
+            if skip:
+                skipped = min(skip, len(block))
+                block = block[skipped:]
+                skip -= skipped
+            data = block if tail is None else np.concatenate((tail, block))
+            if len(data) < size:
+                tail = data
+                continue
+            view = np.lib.stride_tricks.sliding_window_view(data, size)[::hop]
+            consumed = len(view) * hop
+            tail = data[consumed:]
+            skip = max(consumed - len(data), 0)
+            yield view.copy()
+
+    return Stage(windows)
+
+
+def band_powers(estimator: "BandPowerEstimator") -> Stage:
+    """
+    Estimate band powers of arrays of raw values, see
+    `thinkgear.spectral.BandPowerEstimator`.
+
+    Args:
+        estimator (BandPowerEstimator): The estimator, used by this stage only.
+
+    Returns:
+        Stage: Stage from arrays of raw values to lists of `BandPowers`, skipping
+               blocks that complete no window.
+    """
+
+    def band_powers(blocks: Iterator[Any]) -> Iterator[List[Any]]:
+        for block in blocks:
+            powers = estimator.push(block)
+            if powers:
+                yield powers
+
+    return Stage(band_powers)
+
+
+def rebatch(size: int) -> Stage:
+    """
+    Regroup the items of blocks into lists of a fixed size, the last may be shorter.
+
+    Args:
+        size (int): Number of items of an output block.
+
+    Returns:
+        Stage: Stage from blocks of items to lists of items.
+    """
+
+    def rebatch(blocks: Iterator[Sequence[Any]]) -> Iterator[List[Any]]:
+        batch: List[Any] = []
+        for block in blocks:
+            batch.extend(block)
+            while len(batch) >= size:
+                yield batch[:size]
+                del batch[:size]
+        if batch:
+            yield batch
+
+    return Stage(rebatch)
+
+
+def map_blocks(function: Callable[[Any], Any], name: Optional[str] = None) -> Stage:
+    """
+    Apply a function to every block, skipping blocks it returns None for.
+
+    Args:
+        function (Callable[[Any], Any]): Function from an input block to an output
+                                         block.
+        name (Optional[str]): Name of the stage. Defaults to the name of the function.
+
+    Returns:
+        Stage: The stage.
+    """
+
+    def map_blocks(blocks: Iterator[Any]) -> Iterator[Any]:
+        for block in blocks:
+            output = function(block)
+            if output is not None:
+                yield output
+
+    return Stage(map_blocks, name or getattr(function, "__name__", None))
+
+
+def _feed(
+    blocks: Iterable[Any], blocks_queue: "queue.Queue[Any]", stop: threading.Event
+) -> None:
+    """Put blocks into the queue until stopped, and then the end marker or the raised
+    error."""
+    end: Any = _END
+    try:
+        for block in blocks:
+            if stop.is_set():
+                break
+            blocks_queue.put(block)
+    except BaseException as error:
+        end = error
+    finally:
+        # Close the upstream stages in the thread they run in.
+        close = getattr(blocks, "close", None)
+        if close is not None:
+            close()
+    blocks_queue.put(end)
+
+
+def _drain(blocks_queue: "queue.Queue[Any]") -> Iterator[Any]:
+    """Get blocks from the queue until the end marker, raising a queued error."""
+    while True:
+        block = blocks_queue.get()
+        if block is _END:
+            return
+        if isinstance(block, BaseException):
+            raise block
+        yield block
+
+
+def buffered(maxsize: int = 16) -> Stage:
+    """
+    Run the upstream stages in a thread, e.g. to receive from a device while the
+    downstream stages process earlier blocks.
+
+    If the downstream stages stop early, the thread is stopped after the upstream
+    stages produce their next block, and waited for.
+
+    Args:
+        maxsize (int): Maximum number of blocks waiting for the downstream stages, the
+                       upstream stages are blocked while the buffer is full. Defaults
+                       to 16.
+
+    Returns:
+        Stage: Stage passing blocks through.
+    """
+
+    def buffered(blocks: Iterator[Any]) -> Iterator[Any]:
+        blocks_queue: "queue.Queue[Any]" = queue.Queue(maxsize)
+        # Upstream stages run concurrently, their time is not part of this stage.
+        source = blocks.blocks if isinstance(blocks, _Timed) else blocks
+        stop = threading.Event()
+        thread = threading.Thread(target=_feed, args=(source, blocks_queue, stop))
+        thread.daemon = True
+        thread.start()
+        try:
+            yield from _drain(blocks_queue)
+        finally:
+            stop.set()
+            # Unblock the thread if it waits for space in the queue.
+            while thread.is_alive():
+                try:
+                    blocks_queue.get(timeout=0.01)
+                except queue.Empty:
+                    pass
+            thread.join()
+
+    return Stage(buffered)
+
+
+def tee(*branches: Callable[[Iterator[Any]], Any], maxsize: int = 16) -> Stage:
+    """
+    Fan blocks out to branches running in their own threads, and pass them through.
+
+    A branch is a function consuming an iterator of blocks, e.g.
+    ``lambda blocks: Pipeline(blocks, band_powers(estimator)).run(sink)``.
+
+    Args:
+        *branches (Callable[[Iterator[Any]], Any]): The branches.
+        maxsize (int): Maximum number of blocks waiting for a branch, upstream stages
+                       are blocked while a branch lags behind this much. Defaults to 16.
+
+    Returns:
+        Stage: Stage passing blocks through. When the input ends, the stage waits for
+               the branches to finish and raises the first error of a branch.
+    """
+
+    def tee(blocks: Iterator[Any]) -> Iterator[Any]:
+        queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize) for _ in branches]
+        errors: List[BaseException] = []
+
+        def run(branch: Callable[[Iterator[Any]], Any], blocks_queue: Any) -> None:
+            ended = False
+
+            def drain() -> Iterator[Any]:
+                nonlocal ended
+                while True:
+                    block = blocks_queue.get()
+                    if block is _END:
+                        ended = True
+                        return
+                    yield block
+
+            try:
+                branch(drain())
+            except BaseException as error:
+                errors.append(error)
+            # Unblock the upstream stages if the branch stopped early.
+            while not ended:
+                ended = blocks_queue.get() is _END
+
+        threads = [
+            threading.Thread(target=run, args=(branch, blocks_queue), daemon=True)
+            for branch, blocks_queue in zip(branches, queues)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for block in blocks:
+                for blocks_queue in queues:
+                    blocks_queue.put(block)
+                yield block
+        finally:
+            for blocks_queue in queues:
+                blocks_queue.put(_END)
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
+
+    return Stage(tee)
@@ -0,0 +1,103 @@
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+import heapq
+import threading
+
+__all__ = ("PointQueue",)
+
+
+class PointQueue:
+    """
+    A bounded, thread-safe queue of data points with an overflow policy.
+
+    When the queue is full, the oldest data point with a droppable code is dropped to
+    make room. Data points with other codes are never dropped, so the queue may exceed
+    its size if it holds only those.
+
+    Attributes:
+        maxsize (int): Maximum number of queued data points.
+        dropped (Dict[int, int]): Number of dropped data points by code.
+    """
+
+    def __init__(self, maxsize: int, droppable: Iterable[int]) -> None:
+        """
+        Initialize the PointQueue instance.
+
+        Args:
+            maxsize (int): Maximum number of queued data points.
+            droppable (Iterable[int]): Codes of data points that may be dropped.
+        """
+        self.maxsize: int = maxsize
+        self.dropped: Dict[int, int] = {}
+        self._droppable: frozenset = frozenset(droppable)
+        # Droppable and kept points are queued separately, with a sequence number to
+        # restore the order, so the oldest droppable point is removed in O(1).
+        self._drop_queue: Deque[Tuple[int, Any]] = deque()
+        self._keep_queue: Deque[Tuple[int, Any]] = deque()
+        self._sequence: int = 0
+        self._condition: threading.Condition = threading.Condition()
+        self._error: Optional[Exception] = None
+
+    def __len__(self) -> int:
+        return len(self._drop_queue) + len(self._keep_queue)
+
+    def put(self, points: Iterable[Any]) -> None:
+        """
+        Queue data points, dropping the oldest droppable ones on overflow.
+
+        Args:
+            points (Iterable[Any]): Data points with a `code` attribute.
+        """
+        with self._condition:
+            for point in points:
+                if point.code in self._droppable:
+                    self._drop_queue.append((self._sequence, point))
+                else:
+                    self._keep_queue.append((self._sequence, point))
+                self._sequence += 1
+                if len(self) > self.maxsize and self._drop_queue:
+                    code = self._drop_queue.popleft()[1].code
+                    self.dropped[code] = self.dropped.get(code, 0) + 1
+            self._condition.notify_all()
+
+    def close(self, error: Exception) -> None:
+        """
+        Stop the queue, `get` raises the error once the queue is empty.
+
+        Args:
+            error (Exception): The reason, raised to consumers.
+        """
+        with self._condition:
+            self._error = error
+            self._condition.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> List[Any]:
+        """
+        Take all queued data points, waiting for at least one.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds, None waits until
+                                       a data point is queued. Defaults to None.
+
+        Returns:
+            List[Any]: Data points in the order they were queued, or an empty list if
+                       none arrived within the timeout.
+
+        Raises:
+            Exception: The error the queue was closed with, if it is empty.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: len(self) or self._error is not None, timeout
+            )
+            if not len(self) and self._error is not None:
+                raise self._error
+            points = [
+                point
+                for _, point in heapq.merge(
+                    self._drop_queue, self._keep_queue, key=lambda item: item[0]
+                )
+            ]
+            self._drop_queue.clear()
+            self._keep_queue.clear()
+        return points
@@ -0,0 +1,144 @@
+from typing import Iterator, Optional, Union
+import os
+import time
+
+from thinkgear.capture import PAYLOADS, CaptureReader, CaptureRecord
+from thinkgear.encoder import frame
+from thinkgear.think_gear import ThinkGearProtocol
+
+__all__ = ("ThinkGearReplay",)
+
+
+class ThinkGearReplay(ThinkGearProtocol):
+    """
+    A class for replaying capture files as if they were received from a device.
+
+    The capture file is read through a memory map, see `thinkgear.capture`. Records
+    are replayed at their recorded pace multiplied by `speed`, or as fast as possible.
+
+    Attributes:
+        speed (Optional[float]): Replay speed relative to the recording, None replays as
+                                 fast as possible.
+    """
+
+    def __init__(self, debug: bool = False, speed: Optional[float] = 1.0):
+        """
+        Initialize the ThinkGearReplay instance.
+
+        Args:
+            debug (bool): Enables debugging mode if True. Defaults to False.
+            speed (Optional[float]): Replay speed relative to the recording, e.g. 10 for
+                                     ten times real-time, or None for as fast as
+                                     possible. Defaults to 1.0, the recorded pace.
+        """
+        super().__init__(debug)
+        self.speed: Optional[float] = speed
+        self.device: Optional[CaptureReader] = None
+        self._records: Iterator[CaptureRecord] = iter(())
+        self._start: Optional[float] = None
+
+    def connect(self, address: Union[str, os.PathLike]) -> None:
+        """
+        Open a capture file for replay.
+
+        Args:
+            address (Union[str, os.PathLike]): Path of the capture file.
+
+        Raises:
+            ValueError: If the file is not a capture file.
+        """
+        self.device = CaptureReader(address)
+        self._records = self.device.records()
+        self._start = None
+        if self._debug:
+            print(f"Replaying capture {address}.")
+
+    def disconnect(self) -> None:
+        """
+        Close the capture file.
+        """
+        if self.device is not None:
+            self._records = iter(())
+            self.device.close()
+            self.device = None
+            if self._debug:
+                print("Closed capture.")
+
+    def is_connected(self) -> bool:
+        """
+        Check if a capture file is open.
+
+        Returns:
+            bool: True if a capture file is open, False otherwise.
+        """
+        return self.device is not None
+
+    def _next_record(self) -> Optional[CaptureRecord]:
+        """
+        Get the next record, waiting until it is due at the replay speed.
+
+        Returns:
+            Optional[CaptureRecord]: The record, or None at the end of the capture.
+        """
+        record = next(self._records, None)
+        if record is None or self.speed is None:
+            return record
+        offset = record.timestamp / 1e9 / self.speed
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now - offset
+        delay = self._start + offset - now
+        if delay > 0:
+            time.sleep(delay)
+        return record
+
+    def _recv(self, size: int = 1) -> bytes:
+        """
+        Receive the next record of the capture as stream bytes.
+
+        This method overrides the `_recv` method from `ThinkGearProtocol`. Captured
+        payloads are wrapped into packets again.
+
+        Args:
+            size (int): Unused, a whole record is returned. Defaults to 1.
+
+        Returns:
+            bytes: The received data. Returns an empty byte string at the end of the
+                   capture or if no capture is open.
+        """
+        if self.device is None:
+            return b""
+        record = self._next_record()
+        if record is None:
+            return b""
+        if self.device.kind == PAYLOADS:
+            return frame(record.data)
+        return record.data
+
+    def read_payload(self) -> bytes:
+        """
+        Get the next verified payload.
+
+        Captured payloads are returned directly, without framing them again, but are
+        passed through the `gate`, if set.
+
+        Returns:
+            bytes: The payload.
+
+        Raises:
+            IOError: At the end of the capture.
+        """
+        if self.device is None or self.device.kind != PAYLOADS or self._buffer:
+            return super().read_payload()
+        while True:
+            record = self._next_record()
+            if record is None:
+                raise IOError("Did not receive the full payload.")
+            payload = record.data
+            self.metrics.bytes_received += len(payload) + 4
+            self.metrics.packets += 1
+            self._count_points(payload)
+            if self.gate is not None:
+                payload = self.gate.apply(payload)
+            if payload:
+                return payload
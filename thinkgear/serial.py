@@ -18,24 +18,38 @@ class ThinkGearSerial(ThinkGearProtocol):
         device (Optional[serial.Serial]): The serial connection object to the ThinkGear device.
     """
 
-    def __init__(self, debug: bool = False):
+    def __init__(
+        self,
+        debug: bool = False,
+        chunk_size: int = 4096,
+        timeout: Optional[float] = None,
+    ):
         """
         Initialize the ThinkGearSerial instance.
 
         Args:
             debug (bool): Enables debugging mode if True. Defaults to False.
+            chunk_size (int): The maximum number of bytes returned by a single read.
+                              Defaults to 4096.
+            timeout (Optional[float]): Read timeout in seconds, None blocks until data
+                                       arrives. Defaults to None.
         """
         super().__init__(debug)
         self.device: Optional[serial.Serial] = None
+        self._timeout: Optional[float] = timeout
+        self._chunk_size: int = chunk_size
 
     @staticmethod
-    def connect_device(address: Tuple[str, int]) -> Optional[serial.Serial]:
+    def connect_device(
+        address: Tuple[str, int], timeout: Optional[float] = None
+    ) -> Optional[serial.Serial]:
         """
         Establish a serial connection to a ThinkGear device.
 
         Args:
             address (Tuple[str, int]): A tuple containing the serial port (e.g., '/dev/ttyUSB0')
                                        and the baud rate.
+            timeout (Optional[float]): Read timeout in seconds. Defaults to None.
 
         Returns:
             Optional[serial.Serial]: The connected serial device object, or None if the connection fails.
@@ -46,6 +60,7 @@ class ThinkGearSerial(ThinkGearProtocol):
             bytesize=serial.EIGHTBITS,
             parity=serial.PARITY_NONE,
             stopbits=serial.STOPBITS_ONE,
+            timeout=timeout,
             rtscts=False,
             dsrdtr=False,
         )
@@ -66,7 +81,7 @@ class ThinkGearSerial(ThinkGearProtocol):
         if isinstance(device, serial.Serial):
             self.device = device
         else:
-            self.device = self.connect_device(device)
+            self.device = self.connect_device(device, self._timeout)
         if self._debug:
             print(f"Connected to device at {device}.")
 
@@ -100,23 +115,42 @@ class ThinkGearSerial(ThinkGearProtocol):
         """
         return self.device
 
-    def _recv(self, size: int = 1) -> bytes:
+    def fileno(self) -> int:
+        """
+        Get the file descriptor of the connection.
+
+        Returns:
+            int: The file descriptor.
+
+        Raises:
+            IOError: If not connected.
+        """
+        if self.device is None:
+            raise IOError("Not connected to a device.")
+        return self.device.fileno()
+
+    def _recv(self, size: int = 1) -> Union[bytes, memoryview]:
         """
         Receive data from the ThinkGear device via the serial interface.
 
-        This method overrides the `_recv` method from `ThinkGearProtocol`.
+        This method overrides the `_recv` method from `ThinkGearProtocol`. Everything
+        that is already waiting in the input buffer is read at once. The bytes returned
+        by pyserial are passed on as they are, as its `readinto` only copies them.
 
         Args:
-            size (int): The number of bytes to read from the serial device. Defaults to 1.
+            size (int): The minimal number of bytes to read from the serial device. Defaults to 1.
 
         Returns:
-            bytes: The received data. Returns an empty byte string if not connected.
+            Union[bytes, memoryview]: The received data, empty if the read timed out.
+                                      Returns an empty byte string if not connected.
         """
         if self.device is None:
             if self._debug:
                 print("Attempt to receive data without an active connection.")
             return b""
-        data = self.device.read(size)
+        data = self.device.read(
+            min(max(size, self.device.in_waiting), self._chunk_size)
+        )
         if self._debug:
-            print(f"Received data: {data}")
+            print(f"Received data: {bytes(data)!r}")
         return data
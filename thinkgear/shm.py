@@ -0,0 +1,360 @@
+"""
+Shared memory ring buffers for handing decoded data to other processes.
+
+A capture process writes raw values and EEG powers with `RingBufferWriter`, consumer
+processes attach to the same shared memory by name with `RingBufferReader`.
+
+Each ring stores every value twice, at position ``i`` and ``i + capacity``, so the
+latest window of up to ``capacity`` values is always contiguous and readers get it as
+a NumPy view without copying. Each ring has two counters of the total number of
+written values, as in a seqlock: the writing counter is advanced before the values are
+overwritten and the sequence counter after, so readers only get written values, and
+a reader can check with `RingBufferReader.valid` that a window was not overwritten,
+or is not being overwritten, while it was used.
+"""
+
+from typing import Iterable, Optional, Tuple, cast
+from multiprocessing import resource_tracker, shared_memory
+import os
+import numpy as np
+
+from thinkgear.data_points import DataPointType, EegDataPoints, RawDataPoint
+
+__all__ = ("RingBufferWriter", "RingBufferReader")
+
+_MAGIC = 0x54475242  # "TGRB"
+_EEG_BANDS = 8
+# Header fields, as int64.
+_HEADER_SIZE = 8
+_FIELD_MAGIC = 0
+_FIELD_CAPACITY = 1
+_FIELD_EEG_CAPACITY = 2
+_FIELD_RAW_SEQUENCE = 3
+_FIELD_EEG_SEQUENCE = 4
+_FIELD_RAW_WRITING = 5
+_FIELD_EEG_WRITING = 6
+
+
+def _open(
+    name: Optional[str], create: bool, size: int = 0
+) -> shared_memory.SharedMemory:
+    """
+    Open shared memory that is not removed by the resource tracker when the process
+    exits, as it is shared with processes that do not know about each other.
+    """
+    try:
+        return shared_memory.SharedMemory(
+            name, create=create, size=size, track=False  # type: ignore
+        )
+    except TypeError:
+        # Python < 3.13 always tracks shared memory.
+        memory = shared_memory.SharedMemory(name, create=create, size=size)
+        if os.name == "posix":
+            resource_tracker.unregister(memory._name, "shared_memory")  # type: ignore
+        return memory
+
+
+def _unlink(memory: shared_memory.SharedMemory) -> None:
+    """Remove shared memory opened with `_open`."""
+    if not hasattr(memory, "_track") and os.name == "posix":
+        # Python < 3.13 unregisters the memory from the tracker on unlink.
+        resource_tracker.register(memory._name, "shared_memory")  # type: ignore
+    memory.unlink()
+
+
+def _layout(
+    buffer: memoryview, capacity: int, eeg_capacity: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Map the header, raw and EEG rings onto the shared memory buffer.
+
+    The arrays, and any views of them, keep the mapping alive while they exist."""
+    header = np.frombuffer(buffer, dtype=np.int64, count=_HEADER_SIZE)
+    offset = header.nbytes
+    raw = np.frombuffer(buffer, dtype=np.int16, count=2 * capacity, offset=offset)
+    offset += raw.nbytes
+    offset += -offset % 8
+    eeg = np.frombuffer(
+        buffer, dtype=np.uint32, count=2 * eeg_capacity * _EEG_BANDS, offset=offset
+    ).reshape(2 * eeg_capacity, _EEG_BANDS)
+    return header, raw, eeg
+
+
+def _size(capacity: int, eeg_capacity: int) -> int:
+    """Get the size of the shared memory for the capacities."""
+    size = _HEADER_SIZE * 8 + 2 * capacity * 2
+    size += -size % 8
+    return size + 2 * eeg_capacity * _EEG_BANDS * 4
+
+
+def _write(
+    header: np.ndarray, field: int, writing: int, ring: np.ndarray, values: np.ndarray
+) -> None:
+    """Write values into both halves of the ring and advance its counters."""
+    capacity = len(ring) // 2
+    sequence = int(header[field])
+    total = sequence + len(values)
+    header[writing] = total
+    values = values[-capacity:]
+    position = (total - len(values)) % capacity
+    first = min(len(values), capacity - position)
+    ring[position : position + first] = values[:first]
+    ring[position + capacity : position + capacity + first] = values[:first]
+    rest = len(values) - first
+    if rest:
+        ring[:rest] = values[first:]
+        ring[capacity : capacity + rest] = values[first:]
+    header[field] = total
+
+
+def _valid(
+    header: np.ndarray,
+    field: int,
+    writing: int,
+    capacity: int,
+    sequence: int,
+    count: int,
+) -> bool:
+    """Check that a window of a ring is not overwritten, or being overwritten."""
+    # Both counters are equal unless a write is in progress, which overwrites the
+    # values up to the writing counter.
+    written = max(int(header[writing]), int(header[field])) - sequence
+    return written <= capacity - count
+
+
+def _latest(ring: np.ndarray, sequence: int, count: int) -> np.ndarray:
+    """Get a view of the latest values of the ring."""
+    capacity = len(ring) // 2
+    count = min(count, sequence, capacity)
+    start = (sequence - count) % capacity
+    return ring[start : start + count]
+
+
+class RingBufferWriter:
+    """
+    Write raw values and EEG powers into shared memory ring buffers.
+
+    The shared memory is removed by `close`, not when the process exits, so readers
+    in other processes keep working if they outlive it.
+
+    Can be used as a context manager, which closes and removes the shared memory on
+    exit.
+
+    Attributes:
+        name (str): Name of the shared memory, to attach readers with.
+    """
+
+    def __init__(
+        self, name: Optional[str] = None, capacity: int = 30720, eeg_capacity: int = 60
+    ):
+        """
+        Initialize the RingBufferWriter instance and create the shared memory.
+
+        Args:
+            name (Optional[str]): Name of the shared memory, None for a random name.
+            capacity (int): Number of raw values kept. Defaults to 30720, one minute
+                            at 512 Hz.
+            eeg_capacity (int): Number of EEG power rows kept. Defaults to 60.
+        """
+        self._memory = _open(name, True, _size(capacity, eeg_capacity))
+        self.name: str = self._memory.name
+        self._header, self._raw, self._eeg = _layout(
+            cast(memoryview, self._memory.buf), capacity, eeg_capacity
+        )
+        self._header[:] = 0
+        self._header[_FIELD_CAPACITY] = capacity
+        self._header[_FIELD_EEG_CAPACITY] = eeg_capacity
+        self._header[_FIELD_MAGIC] = _MAGIC
+
+    def write_raw(self, values: np.ndarray) -> None:
+        """
+        Append raw values.
+
+        Args:
+            values (np.ndarray): Raw values, converted to int16.
+        """
+        values = np.asarray(values, dtype=np.int16)
+        _write(self._header, _FIELD_RAW_SEQUENCE, _FIELD_RAW_WRITING, self._raw, values)
+
+    def write_eeg(self, powers: np.ndarray) -> None:
+        """
+        Append EEG powers.
+
+        Args:
+            powers (np.ndarray): EEG powers with shape (N, 8), converted to uint32.
+        """
+        powers = np.asarray(powers, dtype=np.uint32).reshape(-1, _EEG_BANDS)
+        _write(self._header, _FIELD_EEG_SEQUENCE, _FIELD_EEG_WRITING, self._eeg, powers)
+
+    def write_points(self, points: Iterable[DataPointType]) -> None:
+        """
+        Append the raw values and EEG powers of parsed data points, ignoring others.
+
+        Args:
+            points (Iterable[DataPointType]): Parsed data points, e.g. from `read`.
+        """
+        raw = []
+        eeg = []
+        for point in points:
+            if isinstance(point, RawDataPoint) and point.code == 0x80:
+                raw.append(point.value)
+            elif isinstance(point, EegDataPoints):
+                eeg.append(point[3:])
+        if raw:
+            self.write_raw(np.array(raw, dtype=np.int16))
+        if eeg:
+            self.write_eeg(np.array(eeg, dtype=np.uint32))
+
+    def close(self) -> None:
+        """
+        Close and remove the shared memory.
+        """
+        del self._header, self._raw, self._eeg
+        self._memory.close()
+        _unlink(self._memory)
+
+    def __enter__(self) -> "RingBufferWriter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class RingBufferReader:
+    """
+    Read the latest values from shared memory ring buffers of a `RingBufferWriter`.
+
+    Returned arrays are read-only views of the shared memory. They are overwritten
+    once the writer appends more than the capacity minus their length, use `valid` or
+    `valid_eeg` to check that a window is still intact after processing it.
+
+    Can be used as a context manager, which closes the shared memory on exit.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the RingBufferReader instance and attach to the shared memory.
+
+        Args:
+            name (str): Name of the shared memory, see `RingBufferWriter.name`.
+
+        Raises:
+            FileNotFoundError: If there is no shared memory with the name.
+            ValueError: If the shared memory is not a ring buffer.
+        """
+        self._memory = _open(name, False)
+        header = np.ndarray((_HEADER_SIZE,), dtype=np.int64, buffer=self._memory.buf)
+        if header[_FIELD_MAGIC] != _MAGIC:
+            del header
+            self._memory.close()
+            raise ValueError(f"Shared memory {name} is not a ring buffer.")
+        self._header, self._raw, self._eeg = _layout(
+            cast(memoryview, self._memory.buf),
+            int(header[_FIELD_CAPACITY]),
+            int(header[_FIELD_EEG_CAPACITY]),
+        )
+        del header
+        self._raw.flags.writeable = False
+        self._eeg.flags.writeable = False
+
+    @property
+    def capacity(self) -> int:
+        """
+        Get the number of raw values kept by the ring.
+
+        Returns:
+            int: The capacity.
+        """
+        return len(self._raw) // 2
+
+    def latest_raw(self, count: int) -> Tuple[int, np.ndarray]:
+        """
+        Get a view of the latest raw values.
+
+        Args:
+            count (int): Number of values, at most the capacity.
+
+        Returns:
+            Tuple[int, np.ndarray]: The sequence number after the last value, and up to
+                                    `count` int16 values, fewer if fewer were written.
+        """
+        sequence = int(self._header[_FIELD_RAW_SEQUENCE])
+        return sequence, _latest(self._raw, sequence, count)
+
+    def latest_eeg(self, count: int) -> Tuple[int, np.ndarray]:
+        """
+        Get a view of the latest EEG powers.
+
+        Args:
+            count (int): Number of rows, at most the EEG capacity.
+
+        Returns:
+            Tuple[int, np.ndarray]: The sequence number after the last row, and up to
+                                    `count` rows of uint32 powers with shape (N, 8).
+        """
+        sequence = int(self._header[_FIELD_EEG_SEQUENCE])
+        return sequence, _latest(self._eeg, sequence, count)
+
+    def valid(self, sequence: int, count: int) -> bool:
+        """
+        Check that a window of raw values from `latest_raw` is not overwritten yet.
+
+        Writes that are in progress count as written, so call it after processing
+        the window.
+
+        Args:
+            sequence (int): The sequence number returned with the window.
+            count (int): Length of the window.
+
+        Returns:
+            bool: True if the window still holds the values it was returned with.
+        """
+        return _valid(
+            self._header,
+            _FIELD_RAW_SEQUENCE,
+            _FIELD_RAW_WRITING,
+            self.capacity,
+            sequence,
+            count,
+        )
+
+    def valid_eeg(self, sequence: int, count: int) -> bool:
+        """
+        Check that a window of EEG powers from `latest_eeg` is not overwritten yet, see
+        `valid`.
+
+        Args:
+            sequence (int): The sequence number returned with the window.
+            count (int): Number of rows of the window.
+
+        Returns:
+            bool: True if the window still holds the rows it was returned with.
+        """
+        return _valid(
+            self._header,
+            _FIELD_EEG_SEQUENCE,
+            _FIELD_EEG_WRITING,
+            len(self._eeg) // 2,
+            sequence,
+            count,
+        )
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory.
+
+        Views returned before stay valid, the memory is unmapped when the last of
+        them is released.
+        """
+        del self._header, self._raw, self._eeg
+        try:
+            self._memory.close()
+        except BufferError:
+            # Views in use keep the mapping alive, leave unmapping it to them.
+            self._memory._mmap = None  # type: ignore
+            self._memory.close()
+
+    def __enter__(self) -> "RingBufferReader":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
@@ -0,0 +1,235 @@
+"""
+A simulated headset on a pseudo-terminal, for tests and benchmarks without hardware.
+
+`HeadsetSimulator` opens a pty and writes a ThinkGear stream to it from a thread:
+raw values (0x80) at 512 Hz, and once per second a packet with the poor signal value
+(0x02), EEG powers (0x83), attention (0x04) and meditation (0x05), plus optional
+blinks (0x16). Any reader of the pty path, e.g. `ThinkGearSerial`, sees it as a
+serial headset::
+
+    with HeadsetSimulator(speed=10) as simulator:
+        device = ThinkGearSerial()
+        device.connect((simulator.path, 57600))
+
+Only available on platforms with pseudo-terminals, i.e. not on Windows.
+"""
+
+from typing import Iterator, List, Optional
+import math
+import os
+import random
+import select
+import threading
+import time
+import tty
+
+from thinkgear.encoder import encode_eeg, encode_raw, frame
+
+__all__ = ("HeadsetSimulator",)
+
+
+def _positions(rng: random.Random, size: int, probability: float) -> Iterator[int]:
+    """Pick positions in a range, each with the probability, by geometric skips."""
+    if probability <= 0:
+        return
+    if probability >= 1:
+        yield from range(size)
+        return
+    log = math.log1p(-probability)
+    position = -1
+    while True:
+        position += 1 + int(math.log(1.0 - rng.random()) / log)
+        if position >= size:
+            return
+        yield position
+
+
+class HeadsetSimulator:
+    """
+    Write a simulated ThinkGear stream to a pseudo-terminal.
+
+    The stream is written in ticks of `interval` seconds of stream time. Writes are
+    non-blocking, so the simulator waits while the pty buffer is full, i.e. a slow
+    reader slows down the stream instead of losing data, as a real serial port does
+    not.
+
+    Can be used as a context manager, which starts the simulator on entry and closes
+    it on exit.
+
+    Attributes:
+        path (str): Path of the pty to connect to, e.g. "/dev/pts/3".
+        packets (int): Number of packets written.
+        bytes_written (int): Number of bytes written, after corruption and drops.
+    """
+
+    def __init__(
+        self,
+        speed: Optional[float] = 1.0,
+        sampling_rate: int = 512,
+        poor_signal: int = 0,
+        blink_rate: float = 0.0,
+        corruption: float = 0.0,
+        drop: float = 0.0,
+        burst: int = 1,
+        interval: float = 1 / 64,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the HeadsetSimulator instance and open the pty.
+
+        Args:
+            speed (Optional[float]): Stream speed relative to real time, None writes as
+                                     fast as the reader reads. Defaults to 1.0.
+            sampling_rate (int): Raw values per second. Defaults to 512.
+            poor_signal (int): Poor signal value sent every second, 200 for a headset
+                               without contact. Defaults to 0.
+            blink_rate (float): Mean number of blinks per second. Defaults to 0.0.
+            corruption (float): Probability of every written byte to be corrupted.
+                                Defaults to 0.0.
+            drop (float): Probability of every byte to be dropped. Defaults to 0.0.
+            burst (int): Maximum number of ticks written at once, each write holds a
+                         random number of ticks from 1 to `burst`. Defaults to 1.
+            interval (float): Seconds of stream time per tick. Defaults to 1/64.
+            seed (Optional[int]): Seed of the random generator, for reproducible
+                                  streams. Defaults to None.
+        """
+        self.speed: Optional[float] = speed
+        self.sampling_rate: int = sampling_rate
+        self.poor_signal: int = poor_signal
+        self.blink_rate: float = blink_rate
+        self.corruption: float = corruption
+        self.drop: float = drop
+        self.burst: int = burst
+        self.interval: float = interval
+        self.packets: int = 0
+        self.bytes_written: int = 0
+        self._random: random.Random = random.Random(seed)
+        self._master, self._slave = os.openpty()
+        # Keep the bytes as they are until a reader configures the terminal.
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.path: str = os.ttyname(self._slave)
+        self._samples: int = 0
+        self._tick_index: int = 0
+        self._attention: int = 50
+        self._meditation: int = 50
+        self._stop: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _raw_value(self) -> int:
+        """Get the next raw value, alpha and beta waves with noise."""
+        seconds = self._samples / self.sampling_rate
+        value = (
+            120 * math.sin(2 * math.pi * 10 * seconds)
+            + 40 * math.sin(2 * math.pi * 21 * seconds)
+            + self._random.gauss(0, 30)
+        )
+        return max(-32768, min(32767, int(value)))
+
+    def _eeg_packet(self) -> bytes:
+        """Get the packet sent once per second."""
+        rng = self._random
+        self._attention = max(1, min(100, self._attention + rng.randint(-5, 5)))
+        self._meditation = max(1, min(100, self._meditation + rng.randint(-5, 5)))
+        powers = [
+            min(int(rng.lognormvariate(10 - band, 1)), 0xFFFFFF) for band in range(8)
+        ]
+        return encode_eeg(powers, self.poor_signal, self._attention, self._meditation)
+
+    def _tick(self) -> bytearray:
+        """Get the packets of the next tick."""
+        chunk = bytearray()
+        count = round((self._tick_index + 1) * self.interval * self.sampling_rate)
+        count -= round(self._tick_index * self.interval * self.sampling_rate)
+        self._tick_index += 1
+        for _ in range(count):
+            if self._samples % self.sampling_rate == 0:
+                chunk += self._eeg_packet()
+                self.packets += 1
+            chunk += encode_raw((self._raw_value(),))
+            self._samples += 1
+            self.packets += 1
+        blinks = self.blink_rate * self.interval
+        if blinks and self._random.random() < blinks:
+            chunk += frame(bytes((0x16, self._random.randint(30, 255))))
+            self.packets += 1
+        return chunk
+
+    def _damage(self, chunk: bytearray) -> bytearray:
+        """Corrupt and drop random bytes of the chunk."""
+        rng = self._random
+        for position in _positions(rng, len(chunk), self.corruption):
+            chunk[position] ^= rng.randint(1, 255)
+        dropped: List[int] = list(_positions(rng, len(chunk), self.drop))
+        for position in reversed(dropped):
+            del chunk[position]
+        return chunk
+
+    def _write(self, data: bytearray) -> bool:
+        """Write all data, waiting while the pty is full. Returns False when stopped."""
+        view = memoryview(data)
+        while view:
+            if self._stop.is_set():
+                return False
+            try:
+                written = os.write(self._master, view)
+            except BlockingIOError:
+                select.select([], [self._master], [], 0.1)
+                continue
+            view = view[written:]
+            self.bytes_written += written
+        return True
+
+    def _run(self) -> None:
+        """Write ticks until the simulator is stopped."""
+        start = time.monotonic()
+        while not self._stop.is_set():
+            ticks = self._random.randint(1, max(self.burst, 1))
+            chunk = bytearray()
+            for _ in range(ticks):
+                chunk += self._tick()
+            if self.speed is not None:
+                due = start + self._tick_index * self.interval / self.speed
+                delay = due - time.monotonic()
+                if delay > 0 and self._stop.wait(delay):
+                    return
+            if not self._write(self._damage(chunk)):
+                return
+
+    def start(self) -> None:
+        """
+        Start writing the stream in a daemon thread.
+
+        Raises:
+            RuntimeError: If the simulator is already running.
+        """
+        if self._thread is not None:
+            raise RuntimeError("The simulator is already running.")
+        self._stop.clear()
+        self._tick_index = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop writing the stream. The pty stays open.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """
+        Stop writing the stream and close the pty.
+        """
+        self.stop()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def __enter__(self) -> "HeadsetSimulator":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
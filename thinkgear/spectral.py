@@ -0,0 +1,195 @@
+"""
+Streaming band powers of the raw signal.
+
+`BandPowerEstimator` keeps a sliding window over the raw values (0x80) of a device and
+estimates the power of the frequency bands of `EegDataPoints` with Welch's method:
+the window is split into overlapping Hann-tapered segments, one every `hop` values,
+and the power spectra of the segments are averaged.
+
+As the window slides by `hop` values, only the newest segment is transformed, the
+band powers of the older segments are kept, so every update costs a single FFT of a
+segment. Blocks of many values are transformed with one batched FFT.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import namedtuple
+import numpy as np
+
+from thinkgear.data_points import DataPointType, EegDataPoints, RawDataPoint
+from thinkgear.parser import RAW_CODE
+
+__all__ = ("BAND_NAMES", "DEFAULT_BANDS", "BandPowers", "BandPowerEstimator")
+
+# Names of the bands, the same as the fields of `EegDataPoints`.
+BAND_NAMES: Tuple[str, ...] = EegDataPoints._fields[3:]
+
+# Edges of the bands in Hz, as used by the device for `EegDataPoints`.
+DEFAULT_BANDS: Dict[str, Tuple[float, float]] = {
+    "delta": (0.5, 2.75),
+    "theta": (3.5, 6.75),
+    "lowAlpha": (7.5, 9.25),
+    "highAlpha": (10.0, 11.75),
+    "lowBeta": (13.0, 16.75),
+    "highBeta": (18.0, 29.75),
+    "lowGamma": (31.0, 39.75),
+    "midGamma": (41.0, 49.75),
+}
+
+
+class BandPowers(
+    namedtuple(
+        "BandPowers",
+        "sample, delta, theta, lowAlpha, highAlpha, lowBeta, highBeta, lowGamma, midGamma",
+    )
+):
+    """
+    Band powers of a window of raw values, in squared raw units.
+
+    Attributes:
+        sample (int): Number of raw values received when the window ended.
+        delta (float): Power of delta waves.
+        theta (float): Power of theta waves.
+        lowAlpha (float): Power of low-alpha waves.
+        highAlpha (float): Power of high-alpha waves.
+        lowBeta (float): Power of low-beta waves.
+        highBeta (float): Power of high-beta waves.
+        lowGamma (float): Power of low-gamma waves.
+        midGamma (float): Power of mid-gamma waves.
+    """
+
+
+class BandPowerEstimator:
+    """
+    Estimate band powers over a sliding window of the raw values of a single device.
+
+    Use one estimator per device.
+
+    Attributes:
+        sampling_rate (float): Sampling rate of the raw values in Hz.
+        window (int): Number of values of the window.
+        segment (int): Number of values of a segment.
+        hop (int): Number of values the window slides between estimates.
+        samples (int): Number of raw values received.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: float = 512.0,
+        window: int = 1024,
+        segment: int = 512,
+        hop: int = 64,
+        bands: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        """
+        Initialize the BandPowerEstimator instance.
+
+        Args:
+            sampling_rate (float): Sampling rate of the raw values in Hz. Defaults to
+                                   512.0.
+            window (int): Number of values of the window. Defaults to 1024, two
+                          seconds.
+            segment (int): Number of values of a Welch segment, which sets the
+                           frequency resolution. Defaults to 512, 1 Hz.
+            hop (int): Number of values between estimates. Defaults to 64.
+            bands (Optional[Dict[str, Tuple[float, float]]]): Edges of the bands in Hz,
+                                                              inclusive, by name from
+                                                              `BAND_NAMES`. Missing
+                                                              bands use
+                                                              `DEFAULT_BANDS`.
+
+        Raises:
+            ValueError: If the hop is longer than the segment, the segment is longer
+                        than the window, the window minus the segment is not a
+                        multiple of the hop, or a band name is unknown.
+        """
+        if not 0 < hop <= segment <= window or (window - segment) % hop:
+            raise ValueError(
+                "Window minus segment must be a non-negative multiple of the hop."
+            )
+        edges = dict(DEFAULT_BANDS)
+        for name, edge in (bands or {}).items():
+            if name not in edges:
+                raise ValueError(f"Unknown band: {name}.")
+            edges[name] = edge
+        self.sampling_rate: float = sampling_rate
+        self.window: int = window
+        self.segment: int = segment
+        self.hop: int = hop
+        self.samples: int = 0
+        self._taper: np.ndarray = np.hanning(segment)
+        # Maps squared FFT magnitudes to band powers: one-sided power spectral density
+        # integrated over the bins of every band.
+        frequencies = np.fft.rfftfreq(segment, 1 / sampling_rate)
+        density = np.full(len(frequencies), 2.0)
+        density[0] = 1.0
+        if segment % 2 == 0:
+            density[-1] = 1.0
+        density /= np.sum(self._taper**2) * segment
+        self._weights: np.ndarray = np.stack(
+            [
+                density * ((frequencies >= low) & (frequencies <= high))
+                for low, high in (edges[name] for name in BAND_NAMES)
+            ],
+            axis=1,
+        )
+        self._segments: int = (window - segment) // hop + 1
+        # Band powers of the latest segments, one row per segment.
+        self._history: np.ndarray = np.zeros((0, len(BAND_NAMES)))
+        # Values from the start of the next segment.
+        self._tail: np.ndarray = np.zeros(0)
+        self._next_end: int = segment
+
+    def push(self, values: np.ndarray) -> List[BandPowers]:
+        """
+        Append raw values and estimate the band powers of every window completed.
+
+        Args:
+            values (np.ndarray): Raw values in the order they were received.
+
+        Returns:
+            List[BandPowers]: Band powers, one every `hop` values once `window` values
+                              were received.
+        """
+        data = np.concatenate((self._tail, np.asarray(values, dtype=np.float64)))
+        start = self.samples - len(self._tail)
+        self.samples += len(data) - len(self._tail)
+        ends = np.arange(self._next_end, self.samples + 1, self.hop)
+        if len(ends):
+            first = ends[0] - self.segment - start
+            segments = np.lib.stride_tricks.sliding_window_view(data, self.segment)
+            segments = segments[first :: self.hop][: len(ends)]
+            segments = segments - segments.mean(axis=1, keepdims=True)
+            spectra = np.fft.rfft(segments * self._taper, axis=1)
+            powers = (spectra.real**2 + spectra.imag**2) @ self._weights
+            history = np.concatenate((self._history, powers))
+            self._history = history[max(0, len(history) - self._segments + 1) :]
+            self._next_end = int(ends[-1]) + self.hop
+        self._tail = data[self._next_end - self.segment - start :]
+        if not len(ends) or len(history) < self._segments:
+            return []
+        means = np.lib.stride_tricks.sliding_window_view(
+            history, self._segments, axis=0
+        ).mean(axis=-1)
+        ends = ends[len(ends) - len(means) :]
+        return [BandPowers(int(end), *row) for end, row in zip(ends, means.tolist())]
+
+    def push_points(self, points: Iterable[DataPointType]) -> List[BandPowers]:
+        """
+        Append the raw values of parsed data points, ignoring others.
+
+        Args:
+            points (Iterable[DataPointType]): Parsed data points, e.g. from `read`.
+
+        Returns:
+            List[BandPowers]: Band powers of every window completed, see `push`.
+        """
+        return self.push(
+            np.array(
+                [
+                    point.value
+                    for point in points
+                    if isinstance(point, RawDataPoint) and point.code == RAW_CODE
+                ],
+                dtype=np.float64,
+            )
+        )
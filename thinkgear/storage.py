@@ -0,0 +1,386 @@
+"""
+Compressed columnar storage of ThinkGear sessions.
+
+Payloads are collected into chunks, parsed with `thinkgear.batch.parse_batch` and
+written as one block per code. A file starts with a header::
+
+    [MAGIC "TGCL"] [VERSION u8] [COMPRESSION u8] [2 reserved bytes]
+
+followed by blocks::
+
+    [CODE u8] [KIND u8] [2 reserved bytes] [COUNT u32] [FIRST PACKET u64]
+    [START TIMESTAMP u64] [END TIMESTAMP u64] [INDEX SIZE u32] [VALUES SIZE u32]
+    [INDEX...] [VALUES...]
+
+All integers are little-endian. INDEX holds the packet numbers of the values relative
+to FIRST PACKET as delta-encoded uint32, VALUES holds the values in the dtype of
+`thinkgear.batch.BATCH_DTYPES`, raw values (0x80) delta-encoded. Both are compressed
+with the compression of the file. The delta encoding of int16 raw values wraps around
+and is lossless.
+
+Data rows that `parse_batch` does not collect, i.e. other codes, rows of an EXCODE
+level above zero and raw values or EEG powers of an unexpected length, are kept in a
+block of KIND 1 per chunk, with CODE 0 and one VALUES record per row::
+
+    [LEVEL u8] [CODE u8] [LENGTH u8] [DATA...]
+
+so no data of the session is lost, see `ColumnReader.rows`. Version 1 files, which
+dropped these rows, have no such blocks and are still readable.
+"""
+
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+from collections import namedtuple
+import lzma
+import os
+import struct
+import time
+import zlib
+import numpy as np
+
+from thinkgear.batch import BATCH_DTYPES, Column, parse_batch
+from thinkgear.parser import _is_raw_packet, _iter_rows
+
+__all__ = (
+    "COMPRESSIONS",
+    "ColumnBlock",
+    "StoredRow",
+    "ColumnWriter",
+    "ColumnReader",
+)
+
+MAGIC = b"TGCL"
+VERSION = 2
+_VERSIONS = frozenset((1, VERSION))
+
+_HEADER = struct.Struct("<4sBBxx")
+_BLOCK = struct.Struct("<BB2xIQQQII")
+_ROW = struct.Struct("<BBB")
+
+# Kinds of blocks.
+_COLUMN = 0
+_ROWS = 1
+
+# Compression ids stored in the file, by name.
+COMPRESSIONS: Dict[str, int] = {"zlib": 0, "lzma": 1}
+
+_DELTA_CODES = frozenset((0x80,))
+# Length of the rows collected by `parse_batch`, by code.
+_LENGTHS: Dict[int, int] = {code: 1 for code in BATCH_DTYPES}
+_LENGTHS.update({0x80: 2, 0x83: 24})
+
+
+def _compress(compression: int, data: bytes, level: Optional[int]) -> bytes:
+    if compression == COMPRESSIONS["lzma"]:
+        return lzma.compress(data, preset=6 if level is None else level)
+    return zlib.compress(data, -1 if level is None else level)
+
+
+def _decompress(compression: int, data: bytes) -> bytes:
+    if compression == COMPRESSIONS["lzma"]:
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+class ColumnBlock(
+    namedtuple("ColumnBlock", "code, first_packet, start, end, index, values")
+):
+    """
+    A decoded block of a single code.
+
+    Attributes:
+        code (int): Operation code of the values.
+        first_packet (int): Number of the first packet of the chunk in the session.
+        start (int): Timestamp of the first payload of the chunk in nanoseconds.
+        end (int): Timestamp of the last payload of the chunk in nanoseconds.
+        index (np.ndarray): Packet numbers of the values in the session (int64).
+        values (np.ndarray): The values.
+    """
+
+
+class StoredRow(namedtuple("StoredRow", "packet, level, code, data")):
+    """
+    A data row that is not stored in a column.
+
+    Attributes:
+        packet (int): Number of the packet of the row in the session.
+        level (int): The EXCODE level.
+        code (int): Operation code.
+        data (bytes): Data bytes of the row.
+    """
+
+
+def _other_rows(payloads: List[bytes]) -> Tuple[List[int], bytes]:
+    """Collect the rows that `parse_batch` skips, as packet numbers and records."""
+    index: List[int] = []
+    records = bytearray()
+    for packet, payload in enumerate(payloads):
+        if _is_raw_packet(payload):
+            continue
+        for level, code, offset, length in _iter_rows(payload):
+            if level == 0 and _LENGTHS.get(code) == length:
+                continue
+            index.append(packet)
+            records += _ROW.pack(level, code, length)
+            records += payload[offset : offset + length]
+    return index, bytes(records)
+
+
+class ColumnWriter:
+    """
+    Write a compressed columnar file.
+
+    Can be used as a context manager, which closes the file on exit.
+
+    Attributes:
+        chunk_size (int): Number of payloads collected before a chunk is written.
+    """
+
+    def __init__(
+        self,
+        file: Union[str, os.PathLike, BinaryIO],
+        compression: str = "zlib",
+        level: Optional[int] = None,
+        chunk_size: int = 5120,
+    ):
+        """
+        Initialize the ColumnWriter instance and write the header.
+
+        Args:
+            file (Union[str, os.PathLike, BinaryIO]): Path of the file to create, or a
+                                                      binary file open for writing.
+            compression (str): "zlib" or "lzma". Defaults to "zlib".
+            level (Optional[int]): Compression level, None for the default of the
+                                   compression.
+            chunk_size (int): Number of payloads collected before a chunk is written.
+                              Defaults to 5120, about ten seconds of a headset.
+
+        Raises:
+            ValueError: If the compression is unknown.
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}.")
+        self.chunk_size: int = chunk_size
+        self._compression: int = COMPRESSIONS[compression]
+        self._level: Optional[int] = level
+        if isinstance(file, (str, os.PathLike)):
+            self._file: BinaryIO = open(file, "wb")
+        else:
+            self._file = file
+        self._file.write(_HEADER.pack(MAGIC, VERSION, self._compression))
+        self._start: int = time.monotonic_ns()
+        self._payloads: List[bytes] = []
+        self._timestamps: List[int] = []
+        self._packets: int = 0
+
+    def write(self, payload: bytes, timestamp: Optional[int] = None) -> None:
+        """
+        Collect a verified payload, writing a chunk when enough are collected.
+
+        Args:
+            payload (bytes): A verified payload.
+            timestamp (Optional[int]): Nanoseconds since the start of the session.
+                                       Defaults to the time elapsed since the writer was
+                                       created.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic_ns() - self._start
+        self._payloads.append(payload)
+        self._timestamps.append(timestamp)
+        if len(self._payloads) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the collected payloads as a chunk of blocks, one per code, and a block
+        of the rows that are not stored in columns, if there are any.
+        """
+        if not self._payloads:
+            return
+        columns = parse_batch(self._payloads)
+        for code, column in columns.items():
+            if not len(column.index):
+                continue
+            values = column.values
+            if code in _DELTA_CODES:
+                values = np.diff(values, prepend=values.dtype.type(0))
+            self._write_block(code, _COLUMN, column.index, values.tobytes())
+        index, records = _other_rows(self._payloads)
+        if index:
+            self._write_block(0, _ROWS, np.array(index, dtype=np.int64), records)
+        self._packets += len(self._payloads)
+        self._payloads.clear()
+        self._timestamps.clear()
+        self._file.flush()
+
+    def _write_block(
+        self, code: int, kind: int, index: np.ndarray, values: bytes
+    ) -> None:
+        """Compress and write a block of the collected chunk."""
+        deltas = np.diff(index, prepend=0).astype(np.uint32)
+        index_bytes = _compress(self._compression, deltas.tobytes(), self._level)
+        values_bytes = _compress(self._compression, values, self._level)
+        self._file.write(
+            _BLOCK.pack(
+                code,
+                kind,
+                len(index),
+                self._packets,
+                self._timestamps[0],
+                self._timestamps[-1],
+                len(index_bytes),
+                len(values_bytes),
+            )
+        )
+        self._file.write(index_bytes)
+        self._file.write(values_bytes)
+
+    def close(self) -> None:
+        """
+        Write the remaining payloads and close the file.
+        """
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "ColumnWriter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class ColumnReader:
+    """
+    Read a compressed columnar file.
+
+    Can be used as a context manager, which closes the file on exit.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        """
+        Initialize the ColumnReader instance and read the header.
+
+        Args:
+            path (Union[str, os.PathLike]): Path of the file.
+
+        Raises:
+            ValueError: If the file is not a columnar file.
+        """
+        self._file: BinaryIO = open(path, "rb")
+        header = self._file.read(_HEADER.size).ljust(_HEADER.size, b"\0")
+        magic, version, compression = _HEADER.unpack(header)
+        if magic != MAGIC or version not in _VERSIONS:
+            self._file.close()
+            raise ValueError("Not a ThinkGear columnar file.")
+        self._compression: int = compression
+
+    def _headers(self) -> Iterator[Tuple[Tuple[int, ...], int]]:
+        """Iterate over block headers and offsets of their data."""
+        self._file.seek(_HEADER.size)
+        while True:
+            header = self._file.read(_BLOCK.size)
+            if len(header) < _BLOCK.size:
+                return
+            fields = _BLOCK.unpack(header)
+            offset = self._file.tell()
+            yield fields, offset
+            self._file.seek(offset + fields[6] + fields[7])
+
+    def _read_block(
+        self, offset: int, index_size: int, values_size: int, first_packet: int
+    ) -> Tuple[np.ndarray, bytes]:
+        """Read and decompress the packet numbers and values of a block."""
+        self._file.seek(offset)
+        index_bytes = _decompress(self._compression, self._file.read(index_size))
+        values_bytes = _decompress(self._compression, self._file.read(values_size))
+        index = np.cumsum(np.frombuffer(index_bytes, dtype=np.uint32), dtype=np.int64)
+        return index + first_packet, values_bytes
+
+    def blocks(self, code: Optional[int] = None) -> Iterator[ColumnBlock]:
+        """
+        Iterate over decoded blocks, skipping the data of other codes without
+        decompressing it.
+
+        Args:
+            code (Optional[int]): Operation code of the blocks, None for all codes.
+
+        Returns:
+            Iterator[ColumnBlock]: Blocks in the order they were written.
+        """
+        for fields, offset in self._headers():
+            (
+                block_code,
+                kind,
+                count,
+                first_packet,
+                start,
+                end,
+                index_size,
+                values_size,
+            ) = fields
+            if kind != _COLUMN or code is not None and block_code != code:
+                continue
+            index, values_bytes = self._read_block(
+                offset, index_size, values_size, first_packet
+            )
+            values = np.frombuffer(values_bytes, dtype=BATCH_DTYPES[block_code])
+            if block_code in _DELTA_CODES:
+                values = np.cumsum(values, dtype=values.dtype)
+            if block_code == 0x83:
+                values = values.reshape(count, -1)
+            yield ColumnBlock(block_code, first_packet, start, end, index, values)
+
+    def rows(self) -> Iterator[StoredRow]:
+        """
+        Iterate over the data rows that are not stored in columns, e.g. rows of other
+        codes or of an EXCODE level above zero.
+
+        Returns:
+            Iterator[StoredRow]: Rows in the order they were written.
+        """
+        for fields, offset in self._headers():
+            _, kind, _, first_packet, _, _, index_size, values_size = fields
+            if kind != _ROWS:
+                continue
+            index, records = self._read_block(
+                offset, index_size, values_size, first_packet
+            )
+            position = 0
+            for packet in index.tolist():
+                level, code, length = _ROW.unpack_from(records, position)
+                position += _ROW.size
+                data = records[position : position + length]
+                position += length
+                yield StoredRow(packet, level, code, data)
+
+    def read(self, code: int) -> Column:
+        """
+        Read all values of a code.
+
+        Args:
+            code (int): Operation code, one of `thinkgear.batch.BATCH_DTYPES`.
+
+        Returns:
+            Column: Packet numbers in the session and values.
+        """
+        blocks = list(self.blocks(code))
+        if not blocks:
+            shape = (0, 8) if code == 0x83 else (0,)
+            return Column(
+                np.zeros(0, dtype=np.int64), np.zeros(shape, dtype=BATCH_DTYPES[code])
+            )
+        return Column(
+            np.concatenate([block.index for block in blocks]),
+            np.concatenate([block.values for block in blocks]),
+        )
+
+    def close(self) -> None:
+        """
+        Close the file.
+        """
+        self._file.close()
+
+    def __enter__(self) -> "ColumnReader":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
@@ -1,4 +1,21 @@
+import asyncio
+import copy
+import os
+import pickle
+import socket
+import tempfile
+import threading
+import time
 import unittest
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+try:
+    import serial  # type: ignore
+except ImportError:
+    serial = None  # type: ignore
 from thinkgear.data_points import (
     PoorSignalDataPoint,
     EegDataPoints,
@@ -6,8 +23,13 @@ from thinkgear.data_points import (
     MeditationDataPoint,
     RawDataPoint,
 )
-from thinkgear.parser import parse
+from thinkgear.parser import parse, parse_codes, parse_raw_value, _parse_payload
 from thinkgear.think_gear import ThinkGearProtocol
+from thinkgear.aio import AsyncThinkGearProtocol
+from thinkgear.hub import ThinkGearHub
+from thinkgear.reader import PointQueue
+from thinkgear.capture import CHUNKS, CaptureReader, CaptureWriter
+from thinkgear.replay import ThinkGearReplay
 
 DATASHEET_EXAMPLE = b"\xaa\xaa\x20\x02\x00\x83\x18\x00\x00\x94\x00\x00\x42\x00\x00\x0b\x00\x00\x64\x00\x00\x4d\x00\x00\x3d\x00\x00\x07\x00\x00\x05\x04\x0D\x05\x3d\x34"
 
@@ -21,6 +43,26 @@ class ThinkGearTest(ThinkGearProtocol):
         return self.recv_data
 
 
+class ThinkGearSocket(ThinkGearProtocol):
+    def __init__(self, timeout=None):
+        super().__init__()
+        self.device, self.remote = socket.socketpair()
+        self.device.settimeout(timeout)
+        self._timeout = timeout
+
+    def connect(self, address):
+        pass
+
+    def disconnect(self):
+        self.device.close()
+
+    def fileno(self):
+        return self.device.fileno()
+
+    def _recv(self, size=1):
+        return self.device.recv(4096)
+
+
 class TestParserMethods(unittest.TestCase):
     def test_parse(self):
         data = parse(DATASHEET_EXAMPLE[3:-1])
@@ -40,6 +82,109 @@ class TestParserMethods(unittest.TestCase):
         data = parse(b"\x02")
         self.assertEqual(list(map(type, data)), [RawDataPoint])
 
+    def test_parse_raw(self):
+        for payload in (b"\x80\x02\x00\x00", b"\x80\x02\xff\x38", b"\x80\x02\x7f\xff"):
+            self.assertEqual(parse(payload), _parse_payload(payload))
+            self.assertEqual(parse_raw_value(payload), parse(payload)[0].value)
+        self.assertEqual(parse_raw_value(b"\x80\x02\xff\x38"), -200)
+        self.assertIsNone(parse_raw_value(b"\x80\x02\xff"))
+        self.assertIsNone(parse_raw_value(DATASHEET_EXAMPLE[3:-1]))
+
+    def test_parse_walks(self):
+        # The eager parser inlines the walk of `_iter_rows`, both must agree.
+        for payload in (
+            DATASHEET_EXAMPLE[3:-1],
+            b"\x55\x55\x04\x10\xba\x01",
+            b"\x83\x33\x34",
+        ):
+            self.assertEqual(parse_codes(payload, range(256)), _parse_payload(payload))
+
+    def test_parse_lazy(self):
+        payload = DATASHEET_EXAMPLE[3:-1]
+        lazy = parse(payload, lazy=True)
+        self.assertEqual([point.code for point in lazy], [0x02, 0x83, 0x04, 0x05])
+        self.assertEqual(
+            [point.point_type for point in lazy], list(map(type, parse(payload)))
+        )
+        self.assertEqual([point.decode() for point in lazy], parse(payload))
+        self.assertIs(lazy[1].decode(), lazy[1].decode())
+        self.assertEqual(lazy[1].theta, 66)
+        self.assertTrue(lazy[0].has_contact)
+        raw = parse(b"\x80\x02\xff\x38", lazy=True)[0]
+        self.assertEqual(raw.data, b"\xff\x38")
+        self.assertEqual(raw.value, -200)
+        for copied in (copy.copy(lazy[1]), copy.deepcopy(lazy[1])):
+            self.assertEqual(copied.decode(), lazy[1].decode())
+        restored = pickle.loads(pickle.dumps(lazy[1]))
+        self.assertEqual((restored.level, restored.code), (0, 0x83))
+        self.assertEqual(restored.theta, 66)
+        with self.assertRaises(AttributeError):
+            lazy[2]._missing
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_parse_batch(self):
+        from thinkgear.batch import parse_batch
+
+        payloads = [b"\x80\x02\xff\xfe", DATASHEET_EXAMPLE[3:-1], b"\x55\x04\x10"]
+        payloads += [b"\x80\x02\x01\x02\x16\x30"]
+        columns = parse_batch(payloads)
+        self.assertEqual(columns[0x80].index.tolist(), [0, 3])
+        self.assertEqual(columns[0x80].values.tolist(), [-2, 258])
+        self.assertEqual(columns[0x83].index.tolist(), [1])
+        self.assertEqual(
+            columns[0x83].values.tolist(),
+            [list(parse(DATASHEET_EXAMPLE[3:-1])[1][3:])],
+        )
+        self.assertEqual(columns[0x04].values.tolist(), [13])
+        self.assertEqual(columns[0x16].values.tolist(), [0x30])
+        self.assertEqual(columns[0x01].values.shape, (0,))
+        buffer = b"".join(payloads)
+        offsets = [0, 4, 4 + len(payloads[1]), 7 + len(payloads[1])]
+        self.assertEqual(parse_batch(buffer, offsets)[0x80].values.tolist(), [-2, 258])
+
+
+class TestEncoderMethods(unittest.TestCase):
+    def test_encode(self):
+        from thinkgear.encoder import encode, encode_eeg, encode_raw
+
+        points = parse(DATASHEET_EXAMPLE[3:-1])
+        self.assertEqual(encode(points), DATASHEET_EXAMPLE)
+        self.assertEqual(
+            encode(parse(DATASHEET_EXAMPLE[3:-1], lazy=True)), DATASHEET_EXAMPLE
+        )
+        extended = b"\x55\x55\x04\x10\x90\x03\x01\x02\x03"
+        self.assertEqual(encode(parse(extended))[3:-1], extended)
+        values = [0, -1, -200, 258, 32767, -32768]
+        tg = ThinkGearProtocol()
+        payloads = tg.feed(encode_raw(values))
+        self.assertEqual([parse(payload)[0].value for payload in payloads], values)
+        eeg = parse(DATASHEET_EXAMPLE[3:-1])[1]
+        packet = encode_eeg(list(eeg[3:]), poor_signal=0, attention=13, meditation=61)
+        self.assertEqual(packet, DATASHEET_EXAMPLE)
+        with self.assertRaises(ValueError):
+            encode(parse(DATASHEET_EXAMPLE[3:-1]) * 6)
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_encode_batch(self):
+        from thinkgear.batch import encode_eeg_batch, encode_raw_batch, parse_batch
+        from thinkgear.encoder import encode_eeg, encode_raw
+
+        values = numpy.random.default_rng(0).integers(-32768, 32768, 1000)
+        self.assertEqual(encode_raw_batch(values), encode_raw(values.tolist()))
+        powers = numpy.random.default_rng(1).integers(0, 1 << 24, (10, 8))
+        packets = encode_eeg_batch(powers, 0, numpy.arange(10), 50)
+        self.assertEqual(
+            packets,
+            b"".join(
+                encode_eeg(row, 0, index, 50)
+                for index, row in enumerate(powers.tolist())
+            ),
+        )
+        columns = parse_batch(ThinkGearProtocol().feed(packets))
+        self.assertEqual(columns[0x83].values.tolist(), powers.tolist())
+        with self.assertRaises(ValueError):
+            encode_raw_batch([40000])
+
 
 class TestThinkGearMethods(unittest.TestCase):
     def test_skip_to_beginning(self):
@@ -84,6 +229,741 @@ class TestThinkGearMethods(unittest.TestCase):
         tg.recv_data = DATASHEET_EXAMPLE[:]
         self.assertEqual(tg.pop_packet(), DATASHEET_EXAMPLE[3:-1])
 
+    def test_feed(self):
+        tg = ThinkGearTest()
+        stream = b"\x01\xaa" + DATASHEET_EXAMPLE + b"\xaa\xaa\x01\x34\xcb" * 2
+        payloads = []
+        for i in range(0, len(stream), 5):
+            payloads.extend(tg.feed(stream[i : i + 5]))
+        self.assertEqual(payloads, [DATASHEET_EXAMPLE[3:-1], b"\x34", b"\x34"])
+        self.assertEqual(tg._buffer, b"")
+        self.assertEqual(tg.feed(b"\xaa\xaa\x02\x00"), [])
+        self.assertEqual(tg.feed(b"\x00\xff\xaa"), [b"\x00\x00"])
+        self.assertEqual(tg._buffer, b"\xaa")
+
+    def test_dispatch(self):
+        tg = ThinkGearTest()
+        received = []
+        tg.subscribe(0x04, received.append)
+        tg.subscribe(0x80, received.append)
+        tg.dispatch(DATASHEET_EXAMPLE[3:-1])
+        tg.dispatch(b"\x80\x02\x01\x02")
+        self.assertEqual(list(map(type, received)), [AttentionDataPoint, RawDataPoint])
+        tg.unsubscribe(0x80, received.append)
+        tg.dispatch(b"\x80\x02\x01\x02")
+        self.assertEqual(len(received), 2)
+        with self.assertRaises(ValueError):
+            tg.unsubscribe(0x80, received.append)
+
+        def once(data_point):
+            received.append(data_point)
+            tg.unsubscribe(data_point.code, once)
+
+        tg.subscribe(0x02, once)
+        tg.subscribe(0x02, received.append)
+        tg.dispatch(b"\x02\x00\x02\x00")
+        self.assertEqual(len(received), 5)
+        tg.unsubscribe(0x02, received.append)
+        tg.subscribe(0x02, once)
+        tg.dispatch(b"\x02\x00\x02\x00")
+        self.assertEqual(len(received), 6)
+
+
+class TestTransportMethods(unittest.TestCase):
+    def test_bluetooth(self):
+        from thinkgear.bluetooth import ThinkGearBluetooth
+
+        tg = ThinkGearBluetooth(chunk_size=8, timeout=0.01)
+        self.assertEqual(tg._recv(), b"")
+        with self.assertRaises(IOError):
+            tg.fileno()
+        tg.device, remote = socket.socketpair()
+        self.addCleanup(remote.close)
+        tg.device.settimeout(tg._timeout)
+        self.assertEqual(tg.fileno(), tg.device.fileno())
+        remote.sendall(DATASHEET_EXAMPLE)
+        data = tg._recv()
+        self.assertEqual(len(data), 8)
+        self.assertEqual(tg.feed(data), [])
+        self.assertEqual(tg.read(), parse(DATASHEET_EXAMPLE[3:-1]))
+        with self.assertRaises(socket.timeout):
+            tg._recv()
+        remote.close()
+        with self.assertRaises(IOError):
+            tg._recv()
+        tg.disconnect()
+        self.assertFalse(tg.is_connected())
+
+    @unittest.skipIf(serial is None, "pyserial is not installed")
+    @unittest.skipIf(not hasattr(os, "openpty"), "pseudo-terminals are not available")
+    def test_serial(self):
+        import tty
+        from thinkgear.serial import ThinkGearSerial
+
+        master, slave = os.openpty()
+        self.addCleanup(os.close, master)
+        self.addCleanup(os.close, slave)
+        tty.setraw(slave)
+        tg = ThinkGearSerial(chunk_size=8, timeout=0.01)
+        tg.connect((os.ttyname(slave), 57600))
+        self.addCleanup(tg.disconnect)
+        os.write(master, DATASHEET_EXAMPLE)
+        self.assertEqual(tg.read(), parse(DATASHEET_EXAMPLE[3:-1]))
+        self.assertEqual(tg.metrics.bytes_received, len(DATASHEET_EXAMPLE))
+        os.write(master, DATASHEET_EXAMPLE)
+        time.sleep(0.01)
+        self.assertEqual(len(tg._recv()), 8)
+        tg._buffer.clear()
+        tg.device.reset_input_buffer()
+        self.assertEqual(tg._recv(), b"")
+
+
+class TestReaderMethods(unittest.TestCase):
+    def test_point_queue(self):
+        queue = PointQueue(3, [0x80])
+        raw = parse(b"\x80\x02\x01\x02") + parse(b"\x80\x02\x01\x03")
+        other = parse(DATASHEET_EXAMPLE[3:-1])
+        queue.put(raw[:1] + other[:1] + raw[1:])
+        queue.put(other[1:])
+        self.assertEqual(queue.dropped, {0x80: 2})
+        self.assertEqual(queue.get(0), other)
+        queue.put(raw)
+        self.assertEqual(queue.get(0), raw)
+        self.assertEqual(queue.get(0), [])
+        queue.close(IOError())
+        with self.assertRaises(IOError):
+            queue.get()
+
+    def test_background_reader(self):
+        tg = ThinkGearSocket()
+        tg.start_reader(maxsize=2)
+        with self.assertRaises(RuntimeError):
+            tg.start_reader()
+        tg.remote.send(b"\xaa\xaa\x04\x80\x02\x01\x02\x7a" * 3 + DATASHEET_EXAMPLE)
+        points = []
+        while len(points) < 4:
+            points.extend(tg.read(timeout=1))
+        self.assertEqual(points[-4:], parse(DATASHEET_EXAMPLE[3:-1]))
+        self.assertEqual(sum(tg.dropped().values()) + len(points), 7)
+        self.assertEqual(tg.poll(), [])
+        tg.remote.close()
+        self.assertEqual(tg.stop_reader(), [])
+        with self.assertRaises(RuntimeError):
+            tg.poll()
+
+    def test_idle_reader(self):
+        tg = ThinkGearSocket(timeout=0.01)
+        self.addCleanup(tg.disconnect)
+        self.addCleanup(tg.remote.close)
+        tg.start_reader()
+        time.sleep(0.05)
+        tg.remote.send(DATASHEET_EXAMPLE)
+        self.assertEqual(tg.read(timeout=1), parse(DATASHEET_EXAMPLE[3:-1]))
+        self.assertEqual(tg.stop_reader(), [])
+        # Serial ports return no data when the receive times out.
+        tg._recv = lambda size=1: time.sleep(0.001) or b""
+        tg.start_reader()
+        time.sleep(0.02)
+        self.assertEqual(tg.poll(), [])
+        tg.stop_reader()
+        idle = ThinkGearSocket()
+        self.addCleanup(idle.disconnect)
+        self.addCleanup(idle.remote.close)
+        idle.start_reader()
+        start = time.monotonic()
+        self.assertEqual(idle.stop_reader(timeout=0.05), [])
+        self.assertLess(time.monotonic() - start, 1)
+
+
+class TestCaptureMethods(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "session.tgcap")
+
+    def test_replay_payloads(self):
+        payloads = [DATASHEET_EXAMPLE[3:-1], b"\x80\x02\x01\x02"]
+        with CaptureWriter(self.path) as writer:
+            writer.write(payloads[0], 0)
+            writer.write(payloads[1], 20000000)
+        with CaptureReader(self.path) as reader:
+            self.assertEqual([record.data for record in reader], payloads)
+        tg = ThinkGearReplay(speed=2)
+        tg.connect(self.path)
+        start = time.monotonic()
+        self.assertEqual(tg.read(), parse(payloads[0]))
+        self.assertEqual(tg.read(), parse(payloads[1]))
+        self.assertGreaterEqual(time.monotonic() - start, 0.01)
+        with self.assertRaises(IOError):
+            tg.read()
+        tg.disconnect()
+        tg = ThinkGearReplay(speed=None)
+        tg.connect(self.path)
+        self.assertEqual(tg.feed(tg._recv()), payloads[:1])
+        tg.disconnect()
+
+    def test_replay_chunks(self):
+        with CaptureWriter(self.path, CHUNKS) as writer:
+            writer.write(DATASHEET_EXAMPLE[:5])
+            writer.write(DATASHEET_EXAMPLE[5:])
+        with open(self.path, "ab") as file:
+            file.write(b"\x00\x00")
+        tg = ThinkGearReplay(speed=None)
+        tg.connect(self.path)
+        self.assertEqual(tg.read(), parse(DATASHEET_EXAMPLE[3:-1]))
+        with self.assertRaises(IOError):
+            tg.read()
+        tg.disconnect()
+        with open(self.path, "wb") as file:
+            file.write(b"\x00" * 16)
+        with self.assertRaises(ValueError):
+            CaptureReader(self.path)
+
+    def test_window(self):
+        with CaptureWriter(self.path, chunk_duration=100) as writer:
+            for i in range(1000):
+                writer.write(bytes((0x80, 0x02, i >> 8, i & 0xFF)), i * 10)
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(len(reader._index_timestamps), 100)
+            self.assertEqual(reader.seek(0), 16)
+            self.assertEqual(reader.seek(3001), reader.seek(3010))
+            points = reader.read_points(3001, 3050)
+            self.assertEqual(
+                [timestamp for timestamp, _ in points], [3010, 3020, 3030, 3040]
+            )
+            self.assertEqual(points[0][1][0].value, 301)
+            self.assertEqual(list(reader.window(20000, 30000)), [])
+            if numpy is not None:
+                timestamps, columns = reader.read_columns(0, 50)
+                self.assertEqual(timestamps.tolist(), [0, 10, 20, 30, 40])
+                self.assertEqual(columns[0x80].values.tolist(), [0, 1, 2, 3, 4])
+        os.remove(self.path + ".idx")
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(len(reader.read_points(3001, 3050)), 4)
+        with CaptureWriter(self.path, CHUNKS) as writer:
+            writer.write(DATASHEET_EXAMPLE[:5], 0)
+            writer.write(DATASHEET_EXAMPLE[5:], 5)
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(
+                list(reader.window_payloads(0, 10)), [(5, DATASHEET_EXAMPLE[3:-1])]
+            )
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestStorageMethods(unittest.TestCase):
+    def test_round_trip(self):
+        from thinkgear.batch import parse_batch
+        from thinkgear.storage import ColumnReader, ColumnWriter
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        payloads = [DATASHEET_EXAMPLE[3:-1]]
+        for value in (0, 32767, -32768, -1, 5, 32767):
+            payloads.append(b"\x80\x02" + value.to_bytes(2, "big", signed=True))
+        payloads *= 3
+        expected = parse_batch(payloads)
+        for compression in ("zlib", "lzma"):
+            path = os.path.join(directory.name, compression)
+            with ColumnWriter(path, compression, chunk_size=5) as writer:
+                for payload in payloads:
+                    writer.write(payload)
+            with ColumnReader(path) as reader:
+                for code in (0x80, 0x83, 0x04, 0x01):
+                    column = reader.read(code)
+                    self.assertEqual(
+                        column.index.tolist(), expected[code].index.tolist()
+                    )
+                    self.assertEqual(
+                        column.values.tolist(), expected[code].values.tolist()
+                    )
+                self.assertEqual(len(list(reader.blocks(0x83))), 3)
+                self.assertEqual(list(reader.rows()), [])
+        path = os.path.join(directory.name, "rows")
+        other = [b"\x55\x04\x10\x90\x02\x01\x02", b"\x80\x03\x01\x02\x03"]
+        with ColumnWriter(path, chunk_size=2) as writer:
+            for payload in [payloads[0], other[0], payloads[1], other[1]]:
+                writer.write(payload)
+        with ColumnReader(path) as reader:
+            self.assertEqual(
+                [tuple(row) for row in reader.rows()],
+                [
+                    (1, 1, 0x04, b"\x10"),
+                    (1, 0, 0x90, b"\x01\x02"),
+                    (3, 0, 0x80, b"\x01\x02\x03"),
+                ],
+            )
+            self.assertEqual(reader.read(0x80).index.tolist(), [2])
+        with self.assertRaises(ValueError):
+            ColumnReader(__file__)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestShmMethods(unittest.TestCase):
+    def test_ring_buffer(self):
+        from thinkgear.shm import RingBufferReader, RingBufferWriter
+
+        with RingBufferWriter(capacity=8, eeg_capacity=2) as writer:
+            with RingBufferReader(writer.name) as reader:
+                self.assertEqual(reader.latest_raw(4)[1].tolist(), [])
+                writer.write_raw(numpy.arange(5))
+                sequence, window = reader.latest_raw(4)
+                self.assertEqual((sequence, window.tolist()), (5, [1, 2, 3, 4]))
+                writer.write_raw(numpy.arange(5, 11))
+                self.assertEqual(reader.latest_raw(8)[1].tolist(), list(range(3, 11)))
+                self.assertFalse(reader.valid(sequence, 4))
+                writer.write_points(parse(DATASHEET_EXAMPLE[3:-1]))
+                writer.write_points(parse(b"\x80\x02\xff\xff"))
+                self.assertEqual(reader.latest_raw(1)[1].tolist(), [-1])
+                self.assertEqual(reader.latest_eeg(2)[1].shape, (1, 8))
+                with self.assertRaises(ValueError):
+                    reader.latest_raw(1)[1][0] = 0
+
+    def test_views_after_close(self):
+        from thinkgear.shm import RingBufferReader, RingBufferWriter
+
+        with RingBufferWriter(capacity=8, eeg_capacity=2) as writer:
+            writer.write_raw(numpy.arange(8))
+            writer.write_eeg(numpy.ones((3, 8)))
+            reader = RingBufferReader(writer.name)
+            window = reader.latest_raw(4)[1][1:]
+            sequence, eeg = reader.latest_eeg(1)
+            self.assertTrue(reader.valid_eeg(sequence, 1))
+            writer.write_eeg(numpy.zeros((1, 8)))
+            self.assertTrue(reader.valid_eeg(sequence, 1))
+            self.assertFalse(reader.valid_eeg(sequence, 2))
+            reader.close()
+        self.assertEqual(window.tolist(), [5, 6, 7])
+        self.assertEqual(eeg.tolist(), [[1] * 8])
+
+    def test_overlapping_write(self):
+        from thinkgear.shm import RingBufferReader, RingBufferWriter
+
+        states = []
+
+        class Ring(numpy.ndarray):
+            # Check the window of the reader while the writer overwrites the ring.
+            def __setitem__(self, key, value):
+                states.append(reader.valid(sequence, 4))
+                super().__setitem__(key, value)
+
+        with RingBufferWriter(capacity=8) as writer:
+            with RingBufferReader(writer.name) as reader:
+                writer.write_raw(numpy.arange(8))
+                sequence, window = reader.latest_raw(4)
+                writer._raw = writer._raw.view(Ring)
+                writer.write_raw(numpy.arange(8, 10))
+                self.assertEqual(states, [True, True])
+                self.assertEqual(window.tolist(), [4, 5, 6, 7])
+                writer.write_raw(numpy.arange(10, 15))
+                self.assertEqual(states[2:], [False, False])
+                self.assertFalse(reader.valid(sequence, 4))
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestFilterMethods(unittest.TestCase):
+    def test_biquad_filter(self):
+        from thinkgear.filters import BiquadFilter, band_pass, notch
+
+        sections = numpy.concatenate((notch(50), band_pass(1, 40)))
+        values = numpy.random.default_rng(0).integers(-2048, 2048, 1000)
+        expected = values.astype(float)
+        for b0, b1, b2, _, a1, a2 in sections:
+            first = second = 0.0
+            for index, value in enumerate(expected):
+                expected[index] = output = b0 * value + first
+                first = b1 * value - a1 * output + second
+                second = b2 * value - a2 * output
+        self.assertTrue(numpy.allclose(BiquadFilter(sections).filter(values), expected))
+        biquad = BiquadFilter(sections, block_size=64)
+        blocks = [
+            biquad.filter(values[start : start + 37]) for start in range(0, 1000, 37)
+        ]
+        self.assertTrue(numpy.allclose(numpy.concatenate(blocks), expected))
+        time = numpy.arange(1024) / 512
+        mains = BiquadFilter(notch(50)).filter(numpy.sin(2 * numpy.pi * 50 * time))
+        self.assertLess(abs(mains[-256:]).max(), 1e-3)
+        with self.assertRaises(ValueError):
+            BiquadFilter(numpy.ones((1, 5)))
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestSpectralMethods(unittest.TestCase):
+    def test_band_powers(self):
+        from thinkgear.spectral import BandPowerEstimator
+
+        time = numpy.arange(512 * 4) / 512
+        values = 100 * numpy.sin(2 * numpy.pi * 10 * time)
+        estimator = BandPowerEstimator(window=512, segment=256, hop=64)
+        powers = []
+        for start in range(0, len(values), 100):
+            powers += estimator.push(values[start : start + 100])
+        self.assertEqual([power.sample for power in powers], list(range(512, 2049, 64)))
+        whole = BandPowerEstimator(512, 512, 256, 64).push(values)
+        self.assertTrue(numpy.allclose(powers, whole))
+        power = BandPowerEstimator().push(values)[-1]
+        self.assertEqual(max(power._fields[1:], key=power._asdict().get), "highAlpha")
+        self.assertAlmostEqual(sum(power[1:]) / 5000, 1, 2)
+        with self.assertRaises(ValueError):
+            BandPowerEstimator(window=512, segment=256, hop=100)
+
+
+class TestPipelineMethods(unittest.TestCase):
+    def test_pipeline(self):
+        from thinkgear.pipeline import Pipeline, frame, map_blocks, parse_payloads
+        from thinkgear.pipeline import buffered, rebatch, tee
+
+        stream = DATASHEET_EXAMPLE * 10
+        chunks = [stream[start : start + 7] for start in range(0, len(stream), 7)]
+        branch = []
+        pipeline = Pipeline(
+            chunks,
+            frame(),
+            buffered(2),
+            tee(lambda blocks: branch.extend(blocks), maxsize=1),
+            parse_payloads(),
+            map_blocks(lambda points: [point.code for point in points], "codes"),
+            rebatch(4),
+        )
+        blocks = []
+        pipeline.run(blocks.append)
+        self.assertEqual(len(branch), 10)
+        self.assertEqual([len(block) for block in blocks], [4] * 10)
+        self.assertEqual(blocks[0], [0x02, 0x83, 0x04, 0x05])
+        stats = pipeline.stats()
+        self.assertEqual([stats.name for stats in stats][-2:], ["codes", "rebatch"])
+        self.assertEqual((stats[0].blocks, stats[0].items), (10, 10))
+        self.assertGreaterEqual(min(stats.seconds for stats in stats), 0)
+
+        def fail(blocks):
+            raise ValueError("Branch failed.")
+
+        with self.assertRaises(ValueError):
+            Pipeline([[1]] * 10, tee(fail, maxsize=1)).run()
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_windows(self):
+        from thinkgear.pipeline import Pipeline, windows
+
+        blocks = list(Pipeline([numpy.arange(5)] * 2, windows(4, 3)))
+        self.assertEqual(
+            [block.tolist() for block in blocks],
+            [[[0, 1, 2, 3]], [[3, 4, 0, 1], [1, 2, 3, 4]]],
+        )
+        blocks = [numpy.arange(4), numpy.arange(4, 12), numpy.arange(12, 13)]
+        blocks += [numpy.arange(13, 17)]
+        self.assertEqual(
+            [block.tolist() for block in Pipeline(blocks, windows(2, 5))],
+            [[[0, 1]], [[5, 6], [10, 11]], [[15, 16]]],
+        )
+
+    def test_buffered_early_stop(self):
+        from thinkgear.pipeline import Pipeline, buffered
+
+        produced = []
+        closed = []
+
+        def source():
+            try:
+                for index in range(100):
+                    produced.append(index)
+                    yield [index]
+            finally:
+                closed.append(threading.current_thread())
+
+        for block in Pipeline(source(), buffered(2)):
+            break
+        self.assertLessEqual(len(produced), 5)
+        self.assertEqual(len(closed), 1)
+        self.assertFalse(closed[0].is_alive())
+
+
+class TestGateMethods(unittest.TestCase):
+    def test_gate(self):
+        from thinkgear.gate import SignalGate
+        from thinkgear.encoder import frame
+
+        def eeg(poor_signal):
+            return bytes((0x02, poor_signal)) + DATASHEET_EXAMPLE[5:-1]
+
+        raw = b"\x80\x02\x00\x01"
+        stream = [eeg(0), raw, eeg(200), raw, raw, eeg(100), raw, eeg(10), raw]
+        device = ThinkGearProtocol()
+        device.gate = SignalGate(recover=50, hold=1)
+        payloads = device.feed(b"".join(map(frame, stream)))
+        self.assertEqual(
+            payloads, [eeg(0), raw, b"\x02\xc8", b"\x02\x64", eeg(10), raw]
+        )
+        self.assertEqual(device.gate.skipped, {0x80: 3, 0x83: 2, 0x04: 2, 0x05: 2})
+        self.assertTrue(device.gate.contact)
+
+        gate = SignalGate(hold=2)
+        points = [point for payload in stream for point in parse(payload)]
+        codes = [point.code for point in gate.filter_points(points)]
+        self.assertEqual(codes[4:], [0x80, 0x02, 0x02, 0x02, 0x83, 0x04, 0x05, 0x80])
+        self.assertEqual(gate.skipped[0x80], 3)
+
+
+class TestMetricsMethods(unittest.TestCase):
+    def test_metrics(self):
+        from urllib.request import urlopen
+        from thinkgear.metrics import MetricsServer
+
+        hub = ThinkGearHub()
+        device = ThinkGearSocket()
+        hub.add('device "1"', device)
+        self.addCleanup(hub.close)
+        invalid = b"\xaa\xaa\x04\x80\x02\x00\x01\x00"
+        stream = b"\x00\x01" + DATASHEET_EXAMPLE + invalid + b"\xaa\xaa\xc8"
+        data = stream + DATASHEET_EXAMPLE + b"\xaa\xaa\x04\x80\x02\x00\x01\x7c"
+        device.feed(data)
+        metrics = device.metrics.snapshot()
+        self.assertEqual(metrics["bytes_received"], len(data))
+        self.assertEqual(metrics["packets"], 3)
+        self.assertEqual(metrics["checksum_errors"], 1)
+        self.assertEqual(metrics["length_errors"], 1)
+        self.assertEqual(metrics["sync_losses"], 2)
+        self.assertEqual(metrics["skipped_bytes"], 2 + len(invalid) + 3)
+        self.assertEqual(metrics["lost_packets"], 3)
+        self.assertEqual(
+            metrics["points"], {0x02: 2, 0x83: 2, 0x04: 2, 0x05: 2, 0x80: 1}
+        )
+        with MetricsServer(hub.metrics, port=0) as server:
+            with urlopen("http://%s:%d/metrics" % server.address) as response:
+                body = response.read().decode()
+        self.assertIn('thinkgear_packets_total{device="device \\"1\\""} 3\n', body)
+        self.assertIn(
+            'thinkgear_points_total{device="device \\"1\\"",code="0x80"} 1', body
+        )
+        self.assertIn("# TYPE thinkgear_bytes_per_second gauge", body)
+
+    def test_resync(self):
+        raw = b"\xaa\xaa\x04\x80\x02\x00\x01\x7c"
+        # A corrupted [PLENGTH] claims a long payload that swallows good packets.
+        corrupted = b"\xaa\xaa\x40\x80\x02\x00\x01\x7c"
+        device = ThinkGearProtocol()
+        payloads = device.feed(corrupted + raw * 3)
+        self.assertEqual(payloads, [])
+        payloads = device.feed(b"\x00" * 40 + raw)
+        self.assertEqual(payloads, [raw[3:-1]] * 4)
+        self.assertEqual(device.metrics.sync_losses, 2)
+        self.assertEqual(device.metrics.skipped_bytes, len(corrupted) + 40)
+        device = ThinkGearProtocol()
+        device.max_plength = 32
+        payloads = device.feed(corrupted + raw * 3)
+        self.assertEqual(payloads, [raw[3:-1]] * 3)
+        self.assertEqual(device.metrics.length_errors, 1)
+        device = ThinkGearProtocol()
+        self.assertEqual(
+            device.feed(b"\xaa" + raw + b"\xaa\xaa" + raw), [raw[3:-1]] * 2
+        )
+        metrics = device.metrics.snapshot()
+        self.assertEqual(metrics["sync_losses"], 0)
+        self.assertEqual(metrics["skipped_bytes"], 0)
+        self.assertEqual(metrics["lost_packets"], 0)
+
+
+class TestTracingMethods(unittest.TestCase):
+    def test_tracer(self):
+        from thinkgear import parser
+        from thinkgear.parser import _create_data_point
+        from thinkgear.tracing import STAGES, Tracer
+
+        device = ThinkGearSocket()
+        self.addCleanup(device.disconnect)
+        self.addCleanup(device.remote.close)
+        tracer = Tracer()
+        device.trace(tracer)
+        device.remote.sendall(DATASHEET_EXAMPLE * 3)
+        self.assertEqual(len(device.read()), 4)
+        device.subscribe(0x04, lambda point: None)
+        device.process()
+        snapshot = tracer.snapshot()
+        self.assertEqual(list(snapshot), list(STAGES))
+        self.assertEqual(snapshot["recv"].count, 1)
+        self.assertEqual(snapshot["sync"].count, 3)
+        self.assertEqual(snapshot["length"].count, 2)
+        self.assertEqual(snapshot["checksum"].count, 2)
+        self.assertEqual(snapshot["create"].count, 4 + 1)
+        self.assertEqual((snapshot["parse"].count, snapshot["dispatch"].count), (1, 1))
+        self.assertEqual(sum(snapshot["frame"].counts), snapshot["frame"].count)
+        self.assertLessEqual(snapshot["parse"].quantile(0.5), 1e9)
+        tracer.reset()
+        self.assertEqual(tracer.snapshot()["recv"].count, 0)
+        device.trace(None)
+        self.assertNotIn("read", vars(device))
+        self.assertIs(parser._create_data_point, _create_data_point)
+        device.read()
+        self.assertEqual(tracer.snapshot()["parse"].count, 0)
+
+
+@unittest.skipIf(serial is None, "pyserial is not installed")
+@unittest.skipIf(not hasattr(os, "openpty"), "pseudo-terminals are not available")
+class TestSimulatorMethods(unittest.TestCase):
+    def test_simulator(self):
+        from thinkgear.serial import ThinkGearSerial
+        from thinkgear.simulator import HeadsetSimulator
+
+        with HeadsetSimulator(speed=None, blink_rate=64, burst=4, seed=1) as simulator:
+            device = ThinkGearSerial(timeout=1)
+            device.connect((simulator.path, 57600))
+            self.addCleanup(device.disconnect)
+            codes = set()
+            while device.metrics.packets < 1100:
+                codes.update(point.code for point in device.read())
+        self.assertEqual(codes, {0x02, 0x83, 0x04, 0x05, 0x16, 0x80})
+        self.assertGreaterEqual(device.metrics.points[0x83], 2)
+        self.assertEqual(device.metrics.checksum_errors, 0)
+        with HeadsetSimulator(speed=None, corruption=0.01, drop=0.01, seed=2) as noisy:
+            device = ThinkGearSerial(timeout=1)
+            device.connect((noisy.path, 57600))
+            self.addCleanup(device.disconnect)
+            while device.metrics.packets < 1000:
+                device.read()
+        self.assertGreater(device.metrics.sync_losses, 0)
+
+
+class TestFactoryMethods(unittest.TestCase):
+    def test_open_file(self):
+        import thinkgear
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "session.tgcap")
+        with CaptureWriter(path) as writer:
+            writer.write(DATASHEET_EXAMPLE[3:-1])
+        device = thinkgear.open(f"file://{path}?speed=none")
+        self.assertIsInstance(device, ThinkGearReplay)
+        self.assertIsNone(device.speed)
+        self.assertEqual(device.read(), parse(DATASHEET_EXAMPLE[3:-1]))
+        device.disconnect()
+        for url in ("http://host", "bt://0C:61:CF:29:D5:9B", "file://", "file://a?b=1"):
+            with self.assertRaises(ValueError):
+                thinkgear.open(url)
+        namespace: dict = {}
+        exec("from thinkgear import *", namespace)
+        self.assertNotIn("open", namespace)
+
+    @unittest.skipIf(serial is None, "pyserial is not installed")
+    @unittest.skipIf(not hasattr(os, "openpty"), "pseudo-terminals are not available")
+    def test_open_serial(self):
+        import thinkgear
+        from thinkgear.simulator import HeadsetSimulator
+
+        with HeadsetSimulator(speed=None) as simulator:
+            device = thinkgear.open(f"serial://{simulator.path}?baud=57600&timeout=1")
+            self.addCleanup(device.disconnect)
+            self.assertEqual(device.device.baudrate, 57600)
+            self.assertTrue(device.read())
+
+    def test_lazy_imports(self):
+        import subprocess
+        import sys
+
+        code = "import sys, thinkgear; print(sorted({'serial', 'thinkgear.replay', 'bluetooth'} & set(sys.modules)))"
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        self.assertEqual(output.strip(), "[]")
+
+
+class TestDiscoverMethods(unittest.TestCase):
+    def test_discover(self):
+        import sys
+        import types
+        from unittest import mock
+        from thinkgear.discover import DiscoveryCache, discover, discover_all
+
+        nearby = {"00:01": "MindWave Mobile", "00:02": "Phone", "00:03": "MindWave"}
+        answering = set(nearby)
+        calls = []
+
+        def discover_devices(lookup_names):
+            calls.append("inquiry")
+            return list(nearby.items())
+
+        def find_service(address):
+            return [{"protocol": "L2CAP", "port": 1}, {"protocol": "RFCOMM", "port": 5}]
+
+        def lookup_name(address, timeout):
+            return nearby[address] if address in answering else None
+
+        bluetooth = types.ModuleType("bluetooth")
+        bluetooth.discover_devices = discover_devices
+        bluetooth.find_service = find_service
+        bluetooth.lookup_name = lookup_name
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = DiscoveryCache(os.path.join(directory.name, "cache", "discover.json"))
+        with mock.patch.dict(sys.modules, {"bluetooth": bluetooth}):
+            headsets = [("00:01", 5), ("00:03", 5)]
+            self.assertEqual(discover_all(cache=cache), headsets)
+            self.assertEqual(cache.get("MindWave"), headsets)
+            self.assertEqual(discover_all(cache=cache), headsets)
+            self.assertEqual(discover(cache=cache), ("00:01", 5))
+            self.assertEqual(calls, ["inquiry"])
+            answering.discard("00:01")
+            self.assertEqual(discover(cache=cache), ("00:03", 5))
+            self.assertEqual(discover_all(cache=cache, workers=1), headsets[1:])
+            self.assertEqual(calls, ["inquiry"])
+            answering.clear()
+            self.assertEqual(discover_all(cache=cache, workers=1), headsets)
+            self.assertEqual(calls, ["inquiry"] * 2)
+            self.assertEqual(os.listdir(os.path.dirname(cache.path)), ["discover.json"])
+            self.assertIsNone(discover("Headband"))
+        cache.ttl = 0
+        self.assertIsNone(cache.get("MindWave"))
+
+
+class TestHubMethods(unittest.TestCase):
+    def test_read(self):
+        hub = ThinkGearHub()
+        first, second = ThinkGearSocket(), ThinkGearSocket()
+        hub.add("first", first)
+        hub.add("second", second)
+        first.remote.send(DATASHEET_EXAMPLE[:10])
+        second.remote.send(b"\xaa\xaa\x04\x80\x02\x01\x02\x7a" * 2)
+        self.assertEqual(
+            hub.read(0),
+            [("second", parse(b"\x80\x02\x01\x02"))] * 2,
+        )
+        self.assertEqual(hub.backlog()["first"], (0, 10))
+        first.remote.send(DATASHEET_EXAMPLE[10:] + b"\x00\xaa")
+        self.assertEqual(hub.poll(0), [("first", DATASHEET_EXAMPLE[3:-1])])
+        self.assertEqual(hub.backlog()["first"], (0, 1))
+        second.remote.close()
+        self.assertEqual(hub.poll(0), [])
+        self.assertEqual(list(hub.devices()), ["first"])
+        self.assertIsInstance(hub.errors["second"], IOError)
+        self.assertEqual(second.device.fileno(), -1)
+        first.remote.close()
+        self.assertEqual(hub.poll(), [])
+        self.assertEqual(hub.poll(), [])
+        self.assertEqual(hub.devices(), {})
+        hub.close()
+
+
+class TestAsyncMethods(unittest.TestCase):
+    def test_read(self):
+        async def run():
+            transport = ThinkGearSocket()
+            tg = AsyncThinkGearProtocol(transport)
+            await tg.connect(None)
+            loop = asyncio.get_running_loop()
+            loop.call_soon(transport.remote.send, DATASHEET_EXAMPLE[:10])
+            loop.call_later(0.01, transport.remote.send, DATASHEET_EXAMPLE[10:])
+            data = await tg.read()
+            self.assertEqual(
+                list(map(type, data)), list(map(type, parse(DATASHEET_EXAMPLE[3:-1])))
+            )
+            transport.remote.send(b"\xaa\xaa\x04\x80\x02\x01\x02\x7a")
+            points = []
+            with self.assertRaises(IOError):
+                async for data_point in tg:
+                    points.append(data_point)
+                    transport.remote.close()
+            self.assertEqual(points, parse(b"\x80\x02\x01\x02"))
+            await tg.disconnect()
+
+        asyncio.run(run())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,30 @@
-from typing import List
-from thinkgear.parser import parse
-from thinkgear.data_points import DataPointType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Union,
+    overload,
+)
+import socket
+import threading
+from thinkgear.parser import RAW_CODE, _iter_rows, parse, parse_codes
+from thinkgear.data_points import DataPointType, LazyDataPoint
+from thinkgear.reader import PointQueue
+from thinkgear.metrics import DeviceMetrics
+
+if TYPE_CHECKING:
+    from thinkgear.gate import SignalGate
+    from thinkgear.tracing import Tracer
 
 SYNC = 0xAA
 EXCODE = 0x55
+SYNC_BYTES = bytes((SYNC, SYNC))
+MAX_PLENGTH = 169
 
 
 class ThinkGearProtocol:
@@ -14,9 +35,30 @@ class ThinkGearProtocol:
     It is intended as an abstract class and should be subclassed to implement the `_recv` method for
     actual device communication.
 
+    Framing is done on an internal buffer and does not depend on I/O, so received bytes can
+    also be handed over in chunks of any size with `feed`.
+
     Attributes:
         _debug (bool): Flag to enable or disable debug mode. If enabled, additional debugging
                       information may be printed or logged.
+        _buffer (bytearray): Received bytes that are not yet framed into a packet.
+        _handlers (Dict[int, List[Callable[[DataPointType], None]]]): Handlers subscribed
+                  to data points, by operation code.
+        _queue (Optional[PointQueue]): Data points parsed by the background reader, if it
+                  is running.
+        _timeout (Optional[float]): Read timeout of the transport in seconds. If set, an
+                  empty receive means that the device was idle for that long, not
+                  that the connection is closed.
+        _tracer (Optional[Tracer]): Tracer recording the durations of the read path, if
+                  tracing is enabled.
+        gate (Optional[SignalGate]): Gate applied to framed payloads, which skips data
+                  while the headset has no contact. None disables gating.
+        metrics (DeviceMetrics): Counters of received bytes, packets and errors.
+        max_plength (int): Largest valid [PLENGTH]. Defaults to 169, the protocol
+                  maximum. Lowering it to the largest payload a device sends, e.g. 32
+                  for the MindWave Mobile, rejects a corrupted [PLENGTH] at once
+                  instead of waiting for up to 173 bytes, which bounds the bytes
+                  held back while resynchronizing.
     """
 
     def __init__(self, debug: bool = False) -> None:
@@ -27,76 +69,555 @@ class ThinkGearProtocol:
             debug (bool): If True, enables debugging mode for additional logging. Defaults to False.
         """
         self._debug: bool = debug
+        self._buffer: bytearray = bytearray()
+        self._handlers: Dict[int, List[Callable[[DataPointType], None]]] = {}
+        self._queue: Optional[PointQueue] = None
+        self._reader_thread: Optional[threading.Thread] = None
+        self._reader_stop: threading.Event = threading.Event()
+        self._timeout: Optional[float] = None
+        self.gate: Optional["SignalGate"] = None
+        self.metrics: DeviceMetrics = DeviceMetrics()
+        self.max_plength: int = MAX_PLENGTH
+        self._lost: int = 0
+        self._failed: int = 0
+        self._tracer: Optional["Tracer"] = None
 
-    def _recv(self, size: int = 1) -> bytes:
+    def _recv(self, size: int = 1) -> Union[bytes, memoryview]:
         """
         Abstract method for receiving bytes from the device.
 
         This method must be overridden by subclasses to implement actual communication
-        with the ThinkGear device.
+        with the ThinkGear device. Implementations may return more than `size` bytes if
+        they are already available, and may return a view of a reusable buffer that is
+        only valid until the next call.
 
         Args:
-            size (int): The number of bytes to read. Defaults to 1.
+            size (int): The minimal number of bytes to read. Defaults to 1.
 
         Returns:
-            bytes: The received bytes.
+            Union[bytes, memoryview]: The received bytes.
 
         Raises:
             NotImplementedError: If this method is not overridden in a subclass.
         """
         raise NotImplementedError("The _recv method must be implemented by subclasses.")
 
-    def read(self) -> List[DataPointType]:
+    def connect(self, address: Any) -> None:
         """
-        Read and parse a single data payload from the ThinkGear device.
+        Abstract method for connecting to the device.
 
-        The method synchronizes on the SYNC bytes, validates the payload length,
-        calculates a checksum, and verifies it against the received checksum.
-        The payload is parsed into a list of data points.
+        Args:
+            address (Any): Transport specific address of the device.
+
+        Raises:
+            NotImplementedError: If this method is not overridden in a subclass.
+        """
+        raise NotImplementedError(
+            "The connect method must be implemented by subclasses."
+        )
+
+    def disconnect(self) -> None:
+        """
+        Abstract method for disconnecting from the device.
+
+        Raises:
+            NotImplementedError: If this method is not overridden in a subclass.
+        """
+        raise NotImplementedError(
+            "The disconnect method must be implemented by subclasses."
+        )
+
+    def fileno(self) -> int:
+        """
+        Abstract method for getting the file descriptor of the connection, so it can be
+        polled with `selectors` or an asyncio event loop.
 
         Returns:
-            List[DataPointType]: A list of parsed data points, or an empty list if parsing fails.
+            int: The file descriptor.
 
         Raises:
-            IOError: If the full payload cannot be read.
+            NotImplementedError: If this method is not overridden in a subclass.
         """
-        while True:
+        raise NotImplementedError(
+            "The fileno method must be implemented by subclasses."
+        )
+
+    def skip_to_beginning(self) -> None:
+        """
+        Drop buffered bytes that precede the first [SYNC] [SYNC] pair.
+
+        If there is no such pair, only the last byte is kept, as it may be the first
+        half of a pair that is not received yet.
+        """
+        index = self._buffer.find(SYNC_BYTES)
+        if index < 0:
+            index = max(len(self._buffer) - 1, 0)
+        if index:
+            del self._buffer[:index]
+
+    @staticmethod
+    def _find_sync(buffer: bytearray, start: int) -> int:
+        """Find the next [SYNC] [SYNC] pair from the start, -1 if there is none."""
+        return buffer.find(SYNC_BYTES, start)
+
+    @staticmethod
+    def _check_length(pLength: int, max_plength: int) -> bool:
+        """Check that the [PLENGTH] byte is valid."""
+        return pLength <= max_plength
+
+    @staticmethod
+    def _checksum(payload: bytes) -> int:
+        """Calculate the [CKSUM] byte of the payload."""
+        return ~sum(payload) & 0xFF
+
+    def _frame(self, limit: int = 0) -> List[bytes]:
+        """
+        Extract complete, checksum-verified payloads from the internal buffer.
+
+        Consumed bytes are removed from the buffer once, after scanning. An incomplete
+        packet at the end of the buffer is kept for the next call. Payloads are passed
+        through the `gate`, if set.
+
+        When a packet fails verification, only its first [SYNC] byte is dropped and the
+        following bytes are scanned again for the next [SYNC] [SYNC] pair, so good
+        packets received after a corrupted one are kept. The bytes dropped and the
+        packets lost until the next verified packet are counted in `metrics`.
+
+        Args:
+            limit (int): Maximum number of payloads to extract. Zero means no limit.
+
+        Returns:
+            List[bytes]: Extracted payloads in the order they were received.
+        """
+        buffer = self._buffer
+        size = len(buffer)
+        max_plength = self.max_plength
+        # Looked up once, as `thinkgear.tracing` wraps them on traced instances.
+        find_sync = self._find_sync
+        check_length = self._check_length
+        checksum_of = self._checksum
+        payloads: List[bytes] = []
+        pos = 0
+        packets = raw = checksum_errors = length_errors = skipped = 0
+        # Bytes skipped and candidates failed since the last verified packet, i.e.
+        # while out of sync.
+        lost = self._lost
+        failed = self._failed
+        sync_losses = lost_packets = 0
+        while not limit or len(payloads) < limit:
             # Synchronize on [SYNC] bytes
-            for _ in range(2):
-                c = self._recv()[0]
-                if c != SYNC:
-                    if self._debug:
-                        print("Failed to synchronize on SYNC byte.")
-                    continue
+            start = find_sync(buffer, pos)
+            if start < 0:
+                # Keep the last byte, it may be the first [SYNC] byte
+                start = max(size - 1, pos)
+                skipped += start - pos
+                lost += start - pos
+                pos = start
+                break
+            if start > pos:
+                skipped += start - pos
+                lost += start - pos
 
             # Parse [PLENGTH] byte
-            while True:
-                pLength = self._recv()[0]
-                if pLength != SYNC:
-                    break
-
-            if pLength > 169:
+            if start + 2 >= size:
+                pos = start
+                break
+            pLength = buffer[start + 2]
+            if pLength == SYNC:
+                # The protocol allows more [SYNC] bytes before [PLENGTH], this is not
+                # a loss of sync.
+                pos = start + 1
+                continue
+            if not check_length(pLength, max_plength):
                 if self._debug:
                     print(f"Invalid payload length: {pLength}.")
+                length_errors += 1
+                skipped += 1
+                lost += 1
+                failed += 1
+                pos = start + 1
                 continue
 
-            # Collect [PAYLOAD...] bytes
-            payload = self._recv(pLength)
-            if len(payload) != pLength:
-                raise IOError("Did not receive the full payload.")
-
-            # Compute [PAYLOAD...] checksum
-            checksum = sum(payload) & 0xFF
-            checksum = ~checksum & 0xFF
-
-            # Parse [CKSUM] byte
-            received_checksum = self._recv()[0]
+            # Collect [PAYLOAD...] bytes and [CKSUM] byte
+            end = start + 3 + pLength
+            if end >= size:
+                pos = start
+                break
+            payload = bytes(buffer[start + 3 : end])
 
-            # Verify [PAYLOAD...] checksum against [CKSUM]
-            if received_checksum != checksum:
+            # Verify [PAYLOAD...] checksum against [CKSUM], and rescan the bytes after
+            # the failed [SYNC] on mismatch, as they may hold good packets
+            checksum = checksum_of(payload)
+            if buffer[end] != checksum:
                 if self._debug:
                     print(
-                        f"Checksum mismatch: calculated={checksum}, received={received_checksum}."
+                        f"Checksum mismatch: calculated={checksum}, received={buffer[end]}."
                     )
+                checksum_errors += 1
+                skipped += 1
+                lost += 1
+                failed += 1
+                pos = start + 1
                 continue
-            return parse(payload)
+            pos = end + 1
+            packets += 1
+            if lost:
+                sync_losses += 1
+                lost_packets += failed or 1
+                lost = failed = 0
+            if pLength == 4 and payload[0] == RAW_CODE and payload[1] == 2:
+                raw += 1
+            else:
+                self._count_points(payload)
+            if self.gate is not None:
+                payload = self.gate.apply(payload)
+                if not payload:
+                    continue
+            payloads.append(payload)
+        if pos:
+            del buffer[:pos]
+        self._lost = lost
+        self._failed = failed
+        metrics = self.metrics
+        metrics.packets += packets
+        if raw:
+            metrics.count_point(RAW_CODE, raw)
+        if skipped or sync_losses:
+            metrics.checksum_errors += checksum_errors
+            metrics.length_errors += length_errors
+            metrics.skipped_bytes += skipped
+            metrics.sync_losses += sync_losses
+            metrics.lost_packets += lost_packets
+        return payloads
+
+    def _count_points(self, payload: bytes) -> None:
+        """
+        Count the data points of a payload in the metrics.
+
+        Args:
+            payload (bytes): A verified payload.
+        """
+        for _, code, _, _ in _iter_rows(payload):
+            self.metrics.count_point(code)
+
+    def _bytes_missing(self) -> int:
+        """
+        Estimate how many bytes are needed to complete the buffered packet.
+
+        Returns:
+            int: A number of bytes that can be read without waiting for the packet
+                 after the buffered one.
+        """
+        buffer = self._buffer
+        if len(buffer) < 3:
+            return 3 - len(buffer)
+        if buffer[0] == SYNC and buffer[1] == SYNC and buffer[2] <= self.max_plength:
+            return max(4 + buffer[2] - len(buffer), 1)
+        return 1
+
+    def feed(self, data: Union[bytes, memoryview]) -> List[bytes]:
+        """
+        Feed received bytes into the framer.
+
+        Args:
+            data (Union[bytes, memoryview]): A chunk of the ThinkGear stream of any size.
+
+        Returns:
+            List[bytes]: All complete, checksum-verified payloads found so far.
+        """
+        self._buffer += data
+        self.metrics.bytes_received += len(data)
+        return self._frame()
+
+    def read_payloads(self) -> List[bytes]:
+        """
+        Receive the bytes that are available on the device and frame them.
+
+        Intended to be called when the file descriptor of the device is readable, so
+        the receive does not block.
+
+        Returns:
+            List[bytes]: All complete, checksum-verified payloads found so far.
+
+        Raises:
+            IOError: If the device returns no data, e.g. the connection is closed.
+        """
+        data = self._recv()
+        if not data:
+            raise IOError("Did not receive any data.")
+        return self.feed(data)
+
+    def pop_packet(self) -> bytes:
+        """
+        Receive bytes from the device and pop the next verified payload.
+
+        Returns:
+            bytes: The payload of the packet, or an empty byte string if the buffer
+                   does not contain a complete packet yet.
+        """
+        data = self._recv()
+        self._buffer += data
+        self.metrics.bytes_received += len(data)
+        payloads = self._frame(1)
+        return payloads[0] if payloads else b""
+
+    def trace(self, tracer: Optional["Tracer"]) -> None:
+        """
+        Enable or disable recording the durations of the read path, see
+        `thinkgear.tracing`.
+
+        Tracing wraps the methods of this instance only, so it costs nothing while
+        disabled.
+
+        Args:
+            tracer (Optional[Tracer]): Tracer to record into, None disables tracing.
+        """
+        if self._tracer is not None:
+            self._tracer.detach(self)
+        self._tracer = tracer
+        if tracer is not None:
+            tracer.attach(self)
+
+    def subscribe(self, code: int, handler: Callable[[DataPointType], None]) -> None:
+        """
+        Subscribe a handler to data points with the given code.
+
+        Args:
+            code (int): Operation code, see `DATA_POINTS`.
+            handler (Callable[[DataPointType], None]): Called with every parsed data point
+                                                       with the code.
+        """
+        self._handlers.setdefault(code, []).append(handler)
+
+    def unsubscribe(self, code: int, handler: Callable[[DataPointType], None]) -> None:
+        """
+        Remove a handler subscribed with `subscribe`.
+
+        Args:
+            code (int): Operation code the handler is subscribed to.
+            handler (Callable[[DataPointType], None]): The subscribed handler.
+
+        Raises:
+            ValueError: If the handler is not subscribed to the code.
+        """
+        handlers = self._handlers.get(code, [])
+        handlers.remove(handler)
+        if not handlers:
+            del self._handlers[code]
+
+    def dispatch(self, payload: bytes) -> None:
+        """
+        Parse the payload and route data points to subscribed handlers.
+
+        Data points with codes that have no handler are not constructed. Handlers may
+        subscribe or unsubscribe during dispatch, the change applies to the next data
+        point.
+
+        Args:
+            payload (bytes): A verified payload, e.g. from `feed` or `pop_packet`.
+        """
+        handlers = self._handlers
+        for data_point in parse_codes(payload, handlers):
+            for handler in tuple(handlers.get(data_point.code, ())):
+                handler(data_point)
+
+    def read_payload(self) -> bytes:
+        """
+        Receive bytes from the device until a complete, verified payload is framed.
+
+        Returns:
+            bytes: The payload.
+
+        Raises:
+            IOError: If the device returns no data.
+        """
+        while True:
+            payloads = self._frame(1)
+            if payloads:
+                return payloads[0]
+            data = self._recv(self._bytes_missing())
+            if not data:
+                raise IOError("Did not receive the full payload.")
+            self._buffer += data
+            self.metrics.bytes_received += len(data)
+
+    def process(self) -> None:
+        """
+        Read a single payload from the ThinkGear device and dispatch it to subscribed
+        handlers, see `subscribe`.
+
+        Raises:
+            IOError: If the device returns no data.
+        """
+        self.dispatch(self.read_payload())
+
+    def _run_reader(self, queue: PointQueue, lazy: bool, stop: threading.Event) -> None:
+        """
+        Receive and parse data into the queue until the reader is stopped.
+
+        A receive that times out while the device is idle does not stop the reader,
+        the stop event is checked again instead.
+
+        Args:
+            queue (PointQueue): The queue of the background reader.
+            lazy (bool): If True, queue `LazyDataPoint` records.
+            stop (threading.Event): Set to stop the reader.
+        """
+        try:
+            while not stop.is_set():
+                try:
+                    data = self._recv(self._bytes_missing())
+                except socket.timeout:
+                    continue
+                if stop.is_set():
+                    break
+                if not data:
+                    if self._timeout is not None:
+                        continue
+                    raise IOError("Did not receive the full payload.")
+                points: List[Any] = []
+                for payload in self.feed(data):
+                    points.extend(parse(payload, lazy))
+                if points:
+                    queue.put(points)
+        except Exception as error:
+            if self._debug:
+                print(f"Background reader stopped: {error}")
+            queue.close(error)
+
+    def start_reader(
+        self,
+        maxsize: int = 4096,
+        droppable: Iterable[int] = (RAW_CODE,),
+        lazy: bool = False,
+    ) -> None:
+        """
+        Start a background thread that continuously receives and parses data into a
+        bounded queue, so a slow consumer does not stall draining of the device.
+
+        While the reader is running, `read` and `poll` take data points from the queue.
+        When the queue is full, the oldest data point with a droppable code is dropped,
+        data points with other codes are never dropped.
+
+        Args:
+            maxsize (int): Maximum number of queued data points. Defaults to 4096.
+            droppable (Iterable[int]): Codes of data points that may be dropped on
+                                       overflow. Defaults to raw values only.
+            lazy (bool): If True, queue `LazyDataPoint` records. Defaults to False.
+
+        Raises:
+            RuntimeError: If the reader is already running.
+        """
+        if self._queue is not None:
+            raise RuntimeError("The background reader is already running.")
+        self._queue = PointQueue(maxsize, droppable)
+        # A new event per reader, so a previous reader that is still blocked in a
+        # receive stops after it returns.
+        self._reader_stop = threading.Event()
+        self._reader_thread = threading.Thread(
+            target=self._run_reader,
+            args=(self._queue, lazy, self._reader_stop),
+            daemon=True,
+        )
+        self._reader_thread.start()
+
+    def stop_reader(self, timeout: Optional[float] = 1.0) -> List[Any]:
+        """
+        Stop the background reader.
+
+        Waits for the thread to finish the receive it is blocked in, i.e. until the
+        next data arrives or the receive times out, but not longer than `timeout`.
+        A thread that is still blocked after that exits when its receive returns and
+        drops the received data, so it does not interfere with a reader started later.
+        Without a transport timeout, disconnect the device to unblock it.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait for the thread in seconds,
+                                       None waits until it exits. Defaults to 1.0.
+
+        Returns:
+            List[Any]: Data points that were queued but not read.
+        """
+        if self._queue is None or self._reader_thread is None:
+            return []
+        self._reader_stop.set()
+        self._reader_thread.join(timeout)
+        queue, self._queue, self._reader_thread = self._queue, None, None
+        try:
+            return queue.get(0)
+        except Exception:
+            return []
+
+    def dropped(self) -> Dict[int, int]:
+        """
+        Get the number of data points dropped by the background reader.
+
+        Returns:
+            Dict[int, int]: Number of dropped data points by code.
+        """
+        if self._queue is None:
+            return {}
+        return dict(self._queue.dropped)
+
+    def poll(self) -> List[Any]:
+        """
+        Take the data points queued by the background reader without waiting.
+
+        Returns:
+            List[Any]: Queued data points, possibly empty.
+
+        Raises:
+            RuntimeError: If the background reader is not running.
+            IOError: If the reader stopped because the device returned no data.
+        """
+        if self._queue is None:
+            raise RuntimeError("The background reader is not running.")
+        return self._queue.get(0)
+
+    @overload
+    def read(
+        self, lazy: Literal[False] = ..., timeout: Optional[float] = ...
+    ) -> List[DataPointType]: ...
+
+    @overload
+    def read(
+        self, lazy: Literal[True], timeout: Optional[float] = ...
+    ) -> List[LazyDataPoint]: ...
+
+    @overload
+    def read(
+        self, lazy: bool, timeout: Optional[float] = ...
+    ) -> Union[List[DataPointType], List[LazyDataPoint]]: ...
+
+    def read(
+        self, lazy: bool = False, timeout: Optional[float] = None
+    ) -> Union[List[DataPointType], List[LazyDataPoint]]:
+        """
+        Read and parse a single data payload from the ThinkGear device.
+
+        The method synchronizes on the SYNC bytes, validates the payload length,
+        calculates a checksum, and verifies it against the received checksum.
+        The payload is parsed into a list of data points.
+
+        If the background reader is running, all data points it has queued are
+        returned instead, see `start_reader`.
+
+        Args:
+            lazy (bool): If True, return `LazyDataPoint` records that decode their
+                         values only when accessed. Defaults to False. Ignored if the
+                         background reader is running.
+            timeout (Optional[float]): Maximum time to wait for the background reader in
+                                       seconds, None waits for data. Defaults to None.
+                                       Reads without the background reader time out as
+                                       configured on the transport.
+
+        Returns:
+            Union[List[DataPointType], List[LazyDataPoint]]: A list of parsed data points,
+                empty if the background reader did not queue any within the timeout.
+
+        Raises:
+            IOError: If the device returns no data.
+        """
+        if self._queue is not None:
+            return self._queue.get(timeout)
+        return parse(self.read_payload(), lazy)
@@ -0,0 +1,320 @@
+"""
+Latency histograms of the stages of the read path.
+
+A `Tracer` attached to a device with `ThinkGearProtocol.trace` wraps the methods of
+that instance only, so devices without a tracer run the unmodified methods. Durations
+are recorded in nanoseconds into histograms with fixed buckets, which only increment
+preallocated counters.
+
+Stages:
+    recv: A call of the transport `_recv`.
+    frame: Framing of the buffer, i.e. all packets found by a call, including the
+           sync, length and checksum stages.
+    sync: A search for the next [SYNC] [SYNC] pair in the buffer.
+    length: A check of the [PLENGTH] byte of a packet.
+    checksum: A calculation of the [CKSUM] byte of a packet.
+    create: Construction of a single data point by the parser, during `read` and
+            `process` of a traced device. Raw values only packets are decoded without
+            it and are not recorded.
+    parse: Parsing a payload in `read`, including the create stage.
+    dispatch: Parsing and dispatching a payload to handlers in `process`, including
+              the create stage.
+
+The parser is shared by all devices, so the create stage is timed by replacing
+`thinkgear.parser._create_data_point` while any tracer is attached. Untraced devices
+then pay only a check of the current thread.
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+from collections import namedtuple
+import bisect
+import threading
+import time
+
+from thinkgear import parser
+from thinkgear.data_points import DataPointType
+
+if TYPE_CHECKING:
+    from thinkgear.think_gear import ThinkGearProtocol
+
+__all__ = ("STAGES", "DEFAULT_BOUNDS", "HistogramSnapshot", "Histogram", "Tracer")
+
+STAGES: Tuple[str, ...] = (
+    "recv",
+    "frame",
+    "sync",
+    "length",
+    "checksum",
+    "create",
+    "parse",
+    "dispatch",
+)
+
+# Upper bounds of the buckets in nanoseconds, from 100 ns doubling up to about 0.8 s.
+DEFAULT_BOUNDS: Tuple[int, ...] = tuple(100 << power for power in range(24))
+
+# Methods wrapped on traced instances.
+_TRACED = (
+    "_recv",
+    "_frame",
+    "_find_sync",
+    "_check_length",
+    "_checksum",
+    "read_payload",
+    "read",
+    "process",
+)
+
+_create_data_point = parser._create_data_point
+# Histogram of the create stage of the traced device parsing in the current thread.
+_parsing = threading.local()
+_lock = threading.Lock()
+_attached = 0
+
+
+def _traced_create_data_point(level: int, code: int, data: bytes) -> DataPointType:
+    """Replacement of `parser._create_data_point` recording into `_parsing`."""
+    histogram: Optional[Histogram] = getattr(_parsing, "histogram", None)
+    if histogram is None:
+        return _create_data_point(level, code, data)
+    start = time.perf_counter_ns()
+    point = _create_data_point(level, code, data)
+    histogram.record(time.perf_counter_ns() - start)
+    return point
+
+
+class HistogramSnapshot(
+    namedtuple("HistogramSnapshot", "bounds, counts, count, total")
+):
+    """
+    A copy of the counters of a histogram.
+
+    Attributes:
+        bounds (Tuple[int, ...]): Upper bounds of the buckets in nanoseconds.
+        counts (Tuple[int, ...]): Number of durations in every bucket, the last bucket
+                                  counts durations above the last bound.
+        count (int): Number of durations.
+        total (int): Sum of the durations in nanoseconds.
+    """
+
+    @property
+    def mean(self) -> float:
+        """
+        Get the mean duration.
+
+        Returns:
+            float: Mean duration in nanoseconds, 0.0 if nothing was recorded.
+        """
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, quantile: float) -> float:
+        """
+        Estimate a quantile of the durations by the upper bound of its bucket.
+
+        Args:
+            quantile (float): The quantile, from 0 to 1.
+
+        Returns:
+            float: Upper bound of the bucket in nanoseconds, infinity if it is above
+                   the last bound, 0.0 if nothing was recorded.
+        """
+        if not self.count:
+            return 0.0
+        rank = quantile * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return float("inf")
+
+
+class Histogram:
+    """
+    Durations counted in fixed buckets.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total")
+
+    def __init__(self, bounds: Sequence[int] = DEFAULT_BOUNDS):
+        """
+        Initialize the Histogram instance.
+
+        Args:
+            bounds (Sequence[int]): Increasing upper bounds of the buckets in
+                                    nanoseconds. Defaults to `DEFAULT_BOUNDS`.
+        """
+        self.bounds: Tuple[int, ...] = tuple(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count: int = 0
+        self.total: int = 0
+
+    def record(self, duration: int) -> None:
+        """
+        Count a duration.
+
+        Args:
+            duration (int): Duration in nanoseconds.
+        """
+        self.counts[bisect.bisect_left(self.bounds, duration)] += 1
+        self.count += 1
+        self.total += duration
+
+    def snapshot(self) -> HistogramSnapshot:
+        """
+        Copy the counters.
+
+        Returns:
+            HistogramSnapshot: The copy.
+        """
+        return HistogramSnapshot(
+            self.bounds, tuple(self.counts), self.count, self.total
+        )
+
+    def reset(self) -> None:
+        """
+        Clear the counters.
+        """
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.total = 0
+
+
+class Tracer:
+    """
+    Histograms of the durations of the `STAGES` of traced devices.
+
+    A tracer may be attached to many devices, e.g. all devices of a hub, to profile
+    them together.
+
+    Attributes:
+        histograms (Dict[str, Histogram]): Histograms by stage.
+    """
+
+    def __init__(self, bounds: Sequence[int] = DEFAULT_BOUNDS):
+        """
+        Initialize the Tracer instance.
+
+        Args:
+            bounds (Sequence[int]): Upper bounds of the buckets in nanoseconds. Defaults
+                                    to `DEFAULT_BOUNDS`.
+        """
+        self.histograms: Dict[str, Histogram] = {
+            stage: Histogram(bounds) for stage in STAGES
+        }
+
+    def snapshot(self) -> Dict[str, HistogramSnapshot]:
+        """
+        Copy the counters of all stages.
+
+        Returns:
+            Dict[str, HistogramSnapshot]: Copies by stage.
+        """
+        return {
+            stage: histogram.snapshot() for stage, histogram in self.histograms.items()
+        }
+
+    def reset(self) -> None:
+        """
+        Clear the counters of all stages.
+        """
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def attach(self, device: "ThinkGearProtocol") -> None:
+        """
+        Wrap the methods of the device instance to record durations.
+
+        Prefer `ThinkGearProtocol.trace`, which also detaches a previous tracer.
+
+        Args:
+            device (ThinkGearProtocol): The device.
+        """
+        global _attached
+        clock = time.perf_counter_ns
+        histograms = self.histograms
+        recv_histogram = histograms["recv"]
+        frame_histogram = histograms["frame"]
+        create_histogram = histograms["create"]
+        parse_histogram = histograms["parse"]
+        dispatch_histogram = histograms["dispatch"]
+        recv, frame = device._recv, device._frame
+        read_payload, read, process = device.read_payload, device.read, device.process
+        # Time spent in `read_payload` during the current `read` or `process`.
+        waited = [0]
+
+        def timed(function: Callable[..., Any], histogram: Histogram) -> Any:
+            def traced(*args: Any) -> Any:
+                start = clock()
+                result = function(*args)
+                histogram.record(clock() - start)
+                return result
+
+            return traced
+
+        def traced_read_payload() -> bytes:
+            start = clock()
+            try:
+                return read_payload()
+            finally:
+                waited[0] += clock() - start
+
+        def traced_read(*args: Any, **kwargs: Any) -> Any:
+            if device._queue is not None:
+                return read(*args, **kwargs)
+            waited[0] = 0
+            previous = getattr(_parsing, "histogram", None)
+            _parsing.histogram = create_histogram
+            start = clock()
+            try:
+                points = read(*args, **kwargs)
+            finally:
+                _parsing.histogram = previous
+            parse_histogram.record(clock() - start - waited[0])
+            return points
+
+        def traced_process() -> None:
+            waited[0] = 0
+            previous = getattr(_parsing, "histogram", None)
+            _parsing.histogram = create_histogram
+            start = clock()
+            try:
+                process()
+            finally:
+                _parsing.histogram = previous
+            dispatch_histogram.record(clock() - start - waited[0])
+
+        wrappers: Dict[str, Callable[..., Any]] = {
+            "_recv": timed(recv, recv_histogram),
+            "_frame": timed(frame, frame_histogram),
+            "_find_sync": timed(device._find_sync, histograms["sync"]),
+            "_check_length": timed(device._check_length, histograms["length"]),
+            "_checksum": timed(device._checksum, histograms["checksum"]),
+            "read_payload": traced_read_payload,
+            "read": traced_read,
+            "process": traced_process,
+        }
+        for name, wrapper in wrappers.items():
+            setattr(device, name, wrapper)
+        with _lock:
+            _attached += 1
+            parser._create_data_point = _traced_create_data_point
+
+    @staticmethod
+    def detach(device: "ThinkGearProtocol") -> None:
+        """
+        Restore the methods of a device wrapped by `attach`.
+
+        Args:
+            device (ThinkGearProtocol): The device.
+        """
+        global _attached
+        if "_frame" not in vars(device):
+            return
+        for name in _TRACED:
+            vars(device).pop(name, None)
+        with _lock:
+            _attached -= 1
+            if not _attached:
+                parser._create_data_point = _create_data_point